@@ -8,7 +8,7 @@ setup(name="opcua-modeler",
       url='https://github.com/FreeOpcUa/opcua-modeler',
       packages=["uamodeler"],
       license="GNU General Public License",
-      install_requires=["asyncua>=0.9.9", "opcua-widgets>=0.5.10"],
+      install_requires=["asyncua>=0.9.92,<1.0", "opcua-widgets>=0.5.10"],
       entry_points={'console_scripts':
                     ['opcua-modeler = uamodeler.uamodeler:main']
                     }
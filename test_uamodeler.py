@@ -1,12 +1,16 @@
 
+import logging
 import sys
 import pytest
 
 from asyncua import ua
+from asyncua.sync import new_struct, new_struct_field
 
 from PyQt5.QtCore import QTimer, QSettings, QModelIndex, Qt, QCoreApplication
+from PyQt5.QtWidgets import QApplication, QAbstractItemDelegate
 
 from uamodeler.uamodeler import UaModeler
+from uamodeler.server_manager import ServerPython
 from uawidgets.new_node_dialogs import NewNodeBaseDialog, NewUaObjectDialog, NewUaVariableDialog, NewUaMethodDialog
 
 
@@ -80,6 +84,471 @@ def test_save_open_ua_model(modeler, mgr):
     mgr.close_model()
 
 
+def test_prewarm(modeler, mgr, tmp_path, monkeypatch):
+    path = str(tmp_path / "test_prewarm.uamodel")
+    mgr.new_model()
+    modeler.tree_ui.expand_to_node("Objects")
+    node = mgr.add_variable(1, "myvar", 0.99)
+    mgr.save_ua_model(path)
+    mgr.save_xml(path)
+    mgr.close_model()
+
+    # another model was opened, prewarmed files are discarded but server is used
+    mgr.prewarm(path)
+    mgr.open(str(tmp_path / "test_prewarm.xml"))
+    assert mgr.server_mgr.get_node(node.nodeid).read_value() == 0.99
+    mgr.close_model()
+
+    mgr.prewarm(path)
+    started = []
+    monkeypatch.setattr(ServerPython, "start_server", lambda self, endpoint: started.append(endpoint))
+    monkeypatch.setattr(mgr.server_mgr, "import_xml", lambda path: pytest.fail("prewarmed model parsed again"))
+    mgr.open(path)
+    assert not started
+    assert mgr.server_mgr.get_node(node.nodeid).read_value() == 0.99
+    assert mgr.current_path.endswith("test_prewarm.xml")
+    mgr.close_model()
+
+
+def test_save_open_binary_model(modeler, mgr):
+    path = "test_save_open.uamodelb"
+    mgr.new_model()
+    modeler.tree_ui.expand_to_node("Objects")
+    folder = mgr.add_folder(1, "myfolder")
+    obj, = mgr.add_object(ua.NodeId(NamespaceIndex=1), ua.QualifiedName("myobj", 1), mgr.server_mgr.get_node(ua.ObjectIds.BaseObjectType))
+    var = folder.add_variable(1, "myvar", [1.5, 2.5])
+    mgr._after_add([var], folder)
+    var.add_reference(obj.nodeid, ua.ObjectIds.HasDescription)
+    mgr.save_binary_model(path)
+    assert not mgr.modified
+    mgr.close_model()
+    mgr.open(path)
+    assert mgr.binary_project
+    var = mgr.server_mgr.get_node(var.nodeid)
+    assert var.read_value() == [1.5, 2.5]
+    assert var.get_parent() == mgr.server_mgr.get_node(folder.nodeid)
+    refs = var.get_references(ua.ObjectIds.HasDescription, ua.BrowseDirection.Forward)
+    assert [ref.NodeId for ref in refs] == [obj.nodeid]
+    assert var in mgr.new_nodes
+    assert mgr.server_mgr.get_node(obj.nodeid).read_browse_name() == ua.QualifiedName("myobj", 1)
+    mgr.close_model()
+
+
+def test_parallel_export_xml(modeler, mgr, model, tmp_path, monkeypatch):
+    from asyncua.sync import XmlExporter
+    from uamodeler import xml_export
+    server = modeler.get_current_server()
+    modeler.tree_ui.expand_to_node(server.nodes.base_object_type)
+    otype = mgr.add_object_type(1, "MyType")
+    objects = server.nodes.objects
+    folder = objects.add_folder(1, "myfolder")
+    nodes = [otype, folder]
+    for i in range(10):
+        nodes.append(folder.add_variable(1, f"myvar{i}", [i * 1.5, 2.5]))
+        nodes.append(folder.add_property(1, f"myprop{i}", f"text{i}"))
+        nodes.extend(mgr.instantiate_many(folder, otype, [f"myobj{i}"]))
+    nodes.append(folder.add_method(1, "mymethod", lambda parent: None, [ua.VariantType.Int64], [ua.VariantType.Boolean]))
+
+    expected = tmp_path / "expected.xml"
+    exporter = XmlExporter(server.get_server())
+    exporter.build_etree(nodes)
+    exporter.write_xml(str(expected))
+    monkeypatch.setattr(xml_export, "MIN_PARTITION_SIZE", 10)
+    for workers in (1, 3):
+        path = tmp_path / f"parallel{workers}.xml"
+        mgr.server_mgr.export_xml(nodes, [], str(path), max_workers=workers)
+        assert path.read_bytes() == expected.read_bytes()
+    # without the XmlExporter internals it uses, export falls back to build_etree
+    monkeypatch.setattr(xml_export, "_EXPORTER_MEMBERS", xml_export._EXPORTER_MEMBERS + ("_missing",))
+    path = tmp_path / "fallback.xml"
+    mgr.server_mgr.export_xml(nodes, [], str(path), max_workers=3)
+    assert path.read_bytes() == expected.read_bytes()
+
+
+def test_export_selection(modeler, mgr, model, tmp_path):
+    server = modeler.get_current_server()
+    modeler.tree_ui.expand_to_node(server.nodes.base_object_type)
+    mgr.add_object_type(1, "MyType")
+    current = modeler.tree_ui.view.currentIndex()
+    modeler.tree_ui.model.fetchMore(current)
+    idx = modeler.tree_ui.model.match(current.child(0, 0), Qt.DisplayRole, "MyType", 1, Qt.MatchExactly)[0]
+    modeler.tree_ui.view.setCurrentIndex(idx)
+    mgr.add_variable(1, "mydecl", 0.5)
+    subtype = mgr.add_object_type(1, "MySubType")
+    modeler.tree_ui.expand_to_node("Objects")
+    machine1 = mgr.add_folder(1, "machine1")
+    machine2 = mgr.add_folder(1, "machine2")
+    mgr.instantiate_many(machine1, subtype, ["obj1"])
+    mgr.instantiate_many(machine2, subtype, ["obj2"])
+
+    path = tmp_path / "selection.xml"
+    exported = mgr.export_selection([machine1], str(path))
+    names = {node.read_browse_name().Name for node in exported}
+    assert names == {"machine1", "obj1", "mydecl", "MySubType", "MyType"}
+    xml = path.read_text()
+    assert "machine1" in xml and "MyType" in xml
+    assert "machine2" not in xml and "obj2" not in xml
+
+    with pytest.raises(ValueError):
+        mgr.export_selection([server.nodes.objects], str(path))
+
+
+def test_compare_with(modeler, mgr, model, tmp_path):
+    from uamodeler.model_diff import diff_files
+    modeler.tree_ui.expand_to_node("Objects")
+    folder = mgr.add_folder(1, "myfolder")
+    var = folder.add_variable(1, "myvar", 1.5)
+    mgr.new_nodes.append(var)
+    old = tmp_path / "old.xml"
+    mgr.export_xml(str(old))
+    assert not diff_files(str(old), str(old))
+
+    var.write_value(2.5)
+    new_var = folder.add_variable(1, "newvar", 3)
+    mgr.new_nodes.append(new_var)
+    diff = mgr.compare_with(str(old))
+    uri = mgr.server_mgr.get_namespace_array()[1]
+    assert diff.added == [f"nsu={uri};i={new_var.nodeid.Identifier}"]
+    assert not diff.removed
+    # adding a child is not a change of its parent
+    assert list(diff.changed) == [f"nsu={uri};i={var.nodeid.Identifier}"]
+    assert diff.changed[f"nsu={uri};i={var.nodeid.Identifier}"] == [("Value", "<Value 1.5>", "<Value 2.5>")]
+
+
+def test_bulk_create(modeler, mgr, model, tmp_path):
+    path = tmp_path / "signals.csv"
+    path.write_text("Name;Data Type;Array Size;Unit;Description;Kind\n"
+                    "Temperature;Double;;degC;Motor temperature;\n"
+                    "Speeds;Float;3;;;variable\n"
+                    "\n"
+                    "State;ServerState;;;;\n"
+                    "Serial;String;;;;property\n")
+    modeler.tree_ui.expand_to_node("Objects")
+    folder = mgr.add_folder(1, "plant")
+    nodes = mgr.bulk_create(folder, str(path))
+    assert len(nodes) == 5  # and EngineeringUnits of Temperature
+    assert all(node in mgr.new_nodes for node in nodes)
+    temp = folder.get_child("1:Temperature")
+    assert temp.read_data_type() == ua.NodeId(ua.ObjectIds.Double)
+    assert temp.read_value() == 0.0
+    assert temp.read_description().Text == "Motor temperature"
+    assert temp.get_child("0:EngineeringUnits").read_value().DisplayName.Text == "degC"
+    speeds = folder.get_child("1:Speeds")
+    assert speeds.read_value() == [0.0, 0.0, 0.0]
+    assert speeds.read_array_dimensions() == [3]
+    assert folder.get_child("1:State").read_data_type_as_variant_type() == ua.VariantType.Int32
+    serial = folder.get_child("1:Serial")
+    assert serial.read_type_definition() == ua.NodeId(ua.ObjectIds.PropertyType)
+
+    # all rows are checked before anything is created
+    path.write_text("Name,DataType\nOther,Double\nTemperature,Double\nBad,NoSuchType\n")
+    with pytest.raises(ValueError) as excinfo:
+        mgr.bulk_create(folder, str(path))
+    assert "row 3" in str(excinfo.value) and "row 4" in str(excinfo.value)
+    with pytest.raises(ua.UaError):
+        folder.get_child("1:Other")
+
+
+def test_gather_reads(mgr, model):
+    from uamodeler.server_manager import BATCH_SIZE
+    server_mgr = mgr.server_mgr
+    nodeids = server_mgr.walk([ua.NodeId(ua.ObjectIds.RootFolder)])
+    assert len(nodeids) > BATCH_SIZE  # requests of several chunks sent concurrently
+    attrs = [ua.AttributeIds.BrowseName, ua.AttributeIds.NodeClass]
+    expected_attrs = server_mgr.read_attributes(nodeids, attrs)
+    expected_refs = server_mgr.browse(nodeids, refs=ua.ObjectIds.References)
+    results, refs = server_mgr.gather(server_mgr.read_attributes_async(nodeids, attrs),
+                                      server_mgr.browse_async(nodeids, refs=ua.ObjectIds.References))
+    assert [[dv.Value for dv in dvs] for dvs in results] == [[dv.Value for dv in dvs] for dvs in expected_attrs]
+    assert refs == expected_refs
+    assert server_mgr.read_attributes([], attrs) == []
+
+
+def test_scheduler_lanes():
+    import asyncio
+    from uamodeler.scheduler import RequestScheduler, INTERACTIVE, BACKGROUND
+    scheduler = RequestScheduler()
+    order = []
+
+    async def request(name, duration):
+        await asyncio.sleep(duration)
+        order.append(name)
+
+    async def batch():
+        # chunks are gathered in the lane, as ServerManager does
+        await asyncio.gather(*(scheduler.send(request(f"background{i}", 0.02)) for i in range(5)))
+
+    async def main():
+        background = asyncio.ensure_future(scheduler._run_in_lane(BACKGROUND, batch()))
+        await asyncio.sleep(0.01)
+        await scheduler._run_in_lane(INTERACTIVE, scheduler.send(request("interactive", 0)))
+        await background
+
+    asyncio.run(main())
+    # sent while a background chunk is in flight and four are queued, it waits for none of them
+    assert order == ["interactive"] + [f"background{i}" for i in range(5)]
+    assert scheduler.metrics[BACKGROUND].requests == 5
+    assert scheduler.metrics[BACKGROUND].depth == 0
+    assert scheduler.metrics[BACKGROUND].max_wait > 0.05
+    assert scheduler.metrics[INTERACTIVE].requests == 1
+
+
+def test_background_lane(mgr, model):
+    from uamodeler.scheduler import BACKGROUND
+    metrics = mgr.server_mgr.scheduler.metrics[BACKGROUND]
+    requests = metrics.requests
+    with mgr.server_mgr.background():
+        nodeids = mgr.server_mgr.walk([ua.NodeId(ua.ObjectIds.Server)])
+    assert metrics.requests > requests
+    assert mgr.server_mgr.scheduler.lane == "interactive"
+    assert len(mgr.server_mgr.read_attributes(nodeids, [ua.AttributeIds.BrowseName])) == len(nodeids)
+
+
+def test_export_python(modeler, mgr, model, tmp_path):
+    import importlib.util
+
+    def dump_address_space():
+        server_mgr = mgr.server_mgr
+        nodeids = [nodeid for nodeid in server_mgr.walk([ua.NodeId(ua.ObjectIds.RootFolder)]) if nodeid.NamespaceIndex == 1]
+        attrs = [ua.AttributeIds.NodeClass, ua.AttributeIds.BrowseName, ua.AttributeIds.DisplayName,
+                 ua.AttributeIds.Value, ua.AttributeIds.DataType, ua.AttributeIds.ValueRank]
+        dump = {}
+        for nodeid, dvs, refs in zip(nodeids, server_mgr.read_attributes(nodeids, attrs),
+                                     server_mgr.browse(nodeids, refs=ua.ObjectIds.References, direction=ua.BrowseDirection.Both)):
+            dump[nodeid] = ([(dv.StatusCode.value, dv.Value) for dv in dvs],
+                            {(ref.ReferenceTypeId, ref.NodeId, ref.IsForward) for ref in refs})
+        return dump
+
+    server = mgr.server_mgr
+    modeler.tree_ui.expand_to_node("Objects")
+    folder = mgr.add_folder(1, "myfolder")
+    mytype = server.get_node(ua.ObjectIds.BaseObjectType).add_object_type(1, "MyType")
+    mytype.add_variable(1, "speed", 0.5).set_modelling_rule(True)
+    obj = folder.add_object(1, "myobj", mytype)
+    var = folder.add_variable(ua.NodeId("myvar", 1), "myvar", [1.5, float("inf")])
+    prop = folder.add_property(1, "label", ua.LocalizedText("Label", "en"))
+    method = folder.add_method(1, "mymethod", lambda parent: None, [ua.VariantType.Int64], [ua.VariantType.Boolean])
+    myenum = server.get_node(ua.ObjectIds.Enumeration).add_data_type(1, "MyEnum")
+    enum_strings = myenum.add_property(ua.NodeId("MyEnumStrings", 1), ua.QualifiedName("EnumStrings", 0), [ua.LocalizedText("On"), ua.LocalizedText("Off")])
+    var.add_reference(obj.nodeid, ua.ObjectIds.HasDescription)
+    nodes = [mytype] + mytype.get_children() + [obj] + obj.get_children() + [var, prop, method] + method.get_children() + [myenum, enum_strings]
+    mgr._after_add(nodes, folder)
+    xml_path = str(tmp_path / "mymodel.xml")
+    py_path = str(tmp_path / "mymodel.py")
+    mgr.export_xml(xml_path)
+    mgr.export_python(py_path)
+
+    mgr.close_model(force=True)
+    mgr.new_model()
+    mgr.server_mgr.import_xml(xml_path)
+    from_xml = dump_address_space()
+    mgr.close_model(force=True)
+    mgr.new_model()
+    spec = importlib.util.spec_from_file_location("mymodel", py_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    added, = mgr.server_mgr.gather(module.build(mgr.server_mgr.get_server().aio_obj))
+    assert var.nodeid in added and len(added) == len(nodes) + 1
+    from_python = dump_address_space()
+    assert len(from_xml) == len(added)
+    assert from_python == from_xml
+
+
+def test_background_save(modeler, mgr, model, tmp_path, monkeypatch):
+    import os
+    import threading
+    import uamodeler.model_manager
+    path = str(tmp_path / "model")
+    modeler.tree_ui.expand_to_node("Objects")
+    mgr.add_folder(1, "before")
+    started = threading.Event()
+    release = threading.Event()
+    write_xml = uamodeler.model_manager.write_xml
+
+    def slow_write_xml(*args):
+        started.set()
+        release.wait(10)
+        write_xml(*args)
+    monkeypatch.setattr(uamodeler.model_manager, "write_xml", slow_write_xml)
+    model_path = mgr.save(path, binary=False, background=True)
+    assert started.wait(10)
+    mgr.add_folder(1, "after")  # editing while the snapshot is written
+    assert not os.path.exists(path + ".xml")
+    release.set()
+    mgr.wait_saved()
+    assert model_path == path + ".uamodel" and os.path.exists(model_path)
+    with open(path + ".xml") as f:
+        xml = f.read()
+    assert "before" in xml and "after" not in xml
+    assert mgr.modified  # edit made during save is not saved
+
+    def failing_write_xml(snapshot, nodeids, uris, tmp_path):
+        with open(tmp_path, "w") as f:
+            f.write("partial")
+        raise OSError("disk full")
+    monkeypatch.setattr(uamodeler.model_manager, "write_xml", failing_write_xml)
+    errors = []
+    mgr.error.connect(errors.append)
+    mgr.save(background=True)
+    mgr.wait_saved()
+    assert [str(ex) for ex in errors] == ["disk full"]
+    assert mgr.modified
+    with open(path + ".xml") as f:
+        assert f.read() == xml  # previous file kept
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+    monkeypatch.setattr(uamodeler.model_manager, "write_xml", write_xml)
+    mgr.save()
+    assert not mgr.modified
+
+
+def test_log_view(modeler, capsys):
+    from PyQt5.QtWidgets import QTextEdit
+    from uamodeler.log_view import BufferedQtHandler, MAX_MESSAGE_LENGTH
+
+    class Counted:
+        formatted = 0
+
+        def __str__(self):
+            Counted.formatted += 1
+            return "counted"
+
+    widget = QTextEdit()
+    handler = BufferedQtHandler(widget, max_lines=5)
+    log = logging.getLogger("test_log_view")
+    log.setLevel(logging.DEBUG)
+    log.propagate = False  # only our handler sees records
+    log.addHandler(handler)
+    try:
+        log.debug("hidden %s", Counted())
+        assert Counted.formatted == 0  # dropped before formatting
+        log.info("x" * (MAX_MESSAGE_LENGTH * 3))
+        for i in range(20):
+            log.info("message %s", i)
+        assert widget.document().isEmpty()  # added on timer only
+        assert not capsys.readouterr().out  # nor printed
+        handler.flush()
+        lines = widget.toPlainText().split("\n")
+        assert len(lines) == 5
+        assert lines[-1].endswith("message 19")
+        assert lines[0] == "... 17 log messages dropped"
+        widget.clear()
+        log.info("x" * (MAX_MESSAGE_LENGTH * 3))
+        handler.flush()
+        assert len(widget.toPlainText()) < MAX_MESSAGE_LENGTH + 100
+    finally:
+        log.removeHandler(handler)
+        handler.close()
+
+
+def test_virtual_refs(modeler, mgr, model, monkeypatch):
+    import uamodeler.virtual_refs
+    monkeypatch.setattr(uamodeler.virtual_refs, "PAGE_SIZE", 10)
+    server_mgr = mgr.server_mgr
+    mytype = server_mgr.get_node(ua.ObjectIds.BaseObjectType).add_object_type(1, "MyType")
+    folder = server_mgr.get_node(ua.ObjectIds.ObjectsFolder).add_folder(1, "instances")
+    for i in range(25):
+        folder.add_object(1, f"obj{i:02d}", mytype)
+    reads = []
+    read_attributes = server_mgr.read_attributes
+
+    def read_names(nodeids, attrs):
+        if attrs == [ua.AttributeIds.DisplayName]:
+            reads.append(nodeids)
+        return read_attributes(nodeids, attrs)
+    monkeypatch.setattr(server_mgr, "read_attributes", read_names)
+    refs = modeler.refs_ui.model
+    modeler.refs_ui.show_refs(folder)
+    assert refs.rowCount() == 10 and refs.canFetchMore(QModelIndex())
+    while refs.canFetchMore(QModelIndex()):
+        refs.fetchMore(QModelIndex())
+    assert refs.rowCount() == 26  # HasTypeDefinition and Organizes of the objects
+    assert not reads  # no name read before rows are shown
+    rows = [row for row in range(refs.rowCount()) if refs.data(refs.index(row, 2)).startswith("1:obj")]
+    assert len(rows) == 25
+    assert refs.data(refs.index(rows[0], 3)) == mytype.nodeid.to_string()
+    assert refs.data(refs.index(rows[0], 0)) == "Organizes"
+    refs.resolve_pending()
+    assert reads == [[mytype.nodeid]]
+    assert [refs.data(refs.index(row, 3)) for row in rows] == ["MyType"] * 25
+    refs.resolve_pending()
+    assert len(reads) == 1  # names are cached
+    assert refs.index(rows[0], 0).data(Qt.UserRole).NodeId == folder.get_child("1:obj00").nodeid
+
+
+def test_paged_tree(modeler, mgr, model, monkeypatch):
+    import uamodeler.paged_tree
+    monkeypatch.setattr(uamodeler.paged_tree, "PAGE_SIZE", 10)
+    modeler.tree_ui.expand_to_node("Objects")
+    folder = mgr.add_folder(1, "many")
+    modeler.tree_ui.expand_to_node(folder)
+    for i in range(25):
+        folder.add_variable(1, f"var{i:02d}", 0.0)
+    tree = modeler.tree_ui.model
+    item = tree.itemFromIndex(modeler.tree_ui.view.currentIndex())
+    modeler.tree_ui.reload(item)
+    tree.fetchMore(tree.indexFromItem(item))
+    assert item.rowCount() == 11
+    placeholder = item.child(10, 0)
+    assert placeholder.text() == "15 more..."
+    modeler.tree_ui.view.setCurrentIndex(placeholder.index())
+    assert modeler.tree_ui.get_current_node() is None
+    tree.fetch_next_page(placeholder)
+    assert item.rowCount() == 21
+    # loads the last page to find the last variable
+    last = folder.get_child("1:var24")
+    modeler.tree_ui.expand_to_node(last)
+    assert modeler.tree_ui.get_current_node() == last
+    assert item.rowCount() == 25
+
+    modeler.tree_ui.set_children_filter(item, "var1")
+    assert item.rowCount() == 11  # a full page of matches, other children not checked yet
+    tree.fetch_next_page(item.child(10, 0))
+    names = [item.child(row, 0).text() for row in range(item.rowCount())]
+    assert names == [f"var{i}" for i in range(10, 20)]
+    modeler.tree_ui.set_children_filter(item, "")
+    assert item.rowCount() == 11
+
+
+def test_bulk_edit(modeler, mgr, model):
+    from PyQt5.QtCore import QItemSelectionModel
+    modeler.tree_ui.expand_to_node("Objects")
+    folder = mgr.add_folder(1, "myfolder")
+    variables = [folder.add_variable(1, f"pump{i}_speed", 1.0) for i in range(3)]
+    mgr.new_nodes.extend(variables)
+    current = modeler.tree_ui.view.currentIndex()
+    modeler.tree_ui.model.fetchMore(current)
+    idx = modeler.tree_ui.model.match(current.child(0, 0), Qt.DisplayRole, "myfolder", 1, Qt.MatchExactly)[0]
+    modeler.tree_ui.view.selectionModel().select(idx, QItemSelectionModel.Select | QItemSelectionModel.Rows)
+    selected = modeler.get_selected_nodes()
+    assert folder in selected and len(selected) == 2
+
+    mgr.rename([folder], "^my", "your")
+    assert folder.read_browse_name() == ua.QualifiedName("yourfolder", 1)
+    assert idx.data() == "yourfolder"  # tree updated
+
+    mgr.rename(variables, r"pump(\d)_speed", r"P\1.Speed")
+    assert [var.read_browse_name().Name for var in variables] == ["P0.Speed", "P1.Speed", "P2.Speed"]
+    assert variables[1].read_display_name().Text == "P1.Speed"
+    with pytest.raises(ValueError):
+        mgr.rename(variables, "(", "")
+    with pytest.raises(ValueError):
+        mgr.rename(variables, ".*", "")
+
+    mgr.write_attribute(variables, ua.AttributeIds.Description, ua.Variant(ua.LocalizedText("pump speed")))
+    assert all(var.read_description().Text == "pump speed" for var in variables)
+
+    mgr.set_access_level(variables + [folder], ua.AccessLevel.CurrentRead.mask | ua.AccessLevel.CurrentWrite.mask)
+    assert all(var.read_attribute(ua.AttributeIds.UserAccessLevel).Value.Value == 3 for var in variables)
+
+    optional = ua.NodeId(ua.ObjectIds.ModellingRule_Optional)
+    mgr.set_modelling_rule(variables, ua.NodeId(ua.ObjectIds.ModellingRule_Mandatory))
+    mgr.set_modelling_rule(variables, optional)
+    assert all([ref.NodeId for ref in var.get_references(ua.ObjectIds.HasModellingRule)] == [optional] for var in variables)
+    mgr.set_modelling_rule(variables, None)
+    assert all(not var.get_references(ua.ObjectIds.HasModellingRule) for var in variables)
+    assert mgr.modified
+
+
 #@pytest.mark.skip("Something wrong with expand_to_node")
 def test_delete_save(modeler, mgr, model):
     path = "test_delete_save.uamodel"
@@ -195,6 +664,435 @@ def test_structs_2(modeler, mgr):
     mgr.close_model()
 
 
+def test_paste_node(modeler, mgr, model):
+    modeler.tree_ui.expand_to_node("Objects")
+    objects = modeler.get_current_server().nodes.objects
+    folder = mgr.add_folder(1, "myfolder")
+    var = folder.add_variable(1, "myvar", 0.99)
+    prop = folder.add_property(1, "myprop", "toto")
+    var.add_reference(prop, ua.ObjectIds.HasDescription)
+    mgr.paste_node(folder, 3)
+    copies = [node for node in objects.get_children() if node.read_browse_name().Name == "myfolder"]
+    assert len(copies) == 4
+    for copy in copies[1:]:
+        assert copy != folder
+        assert copy in mgr.new_nodes
+        copy_var = copy.get_child("1:myvar")
+        copy_prop = copy.get_child("1:myprop")
+        assert copy_var.read_value() == 0.99
+        assert copy_prop.read_value() == "toto"
+        # internal reference must point to the copied property
+        refs = copy_var.get_references(ua.ObjectIds.HasDescription, ua.BrowseDirection.Forward)
+        assert [ref.NodeId for ref in refs] == [copy_prop.nodeid]
+
+
+def test_instantiate_many(modeler, mgr, model):
+    server = modeler.get_current_server()
+    modeler.tree_ui.expand_to_node(server.nodes.base_object_type)
+    otype = mgr.add_object_type(1, "MyType")
+    var = otype.add_variable(1, "myvar", 1.5)
+    var.set_modelling_rule(True)
+    otype.add_variable(1, "notinstantiated", 2)
+    objects = server.nodes.objects
+    nodes = mgr.instantiate_many(objects, otype, ["obj1", "obj2", "obj3"])
+    assert len(nodes) == 6
+    for name in ("obj1", "obj2", "obj3"):
+        obj = objects.get_child(f"1:{name}")
+        assert obj.read_type_definition() == otype.nodeid
+        assert obj.read_attribute(ua.AttributeIds.EventNotifier).Value.Value == 0
+        assert obj.get_child("1:myvar").read_value() == 1.5
+        with pytest.raises(ua.UaError):
+            obj.get_child("1:notinstantiated")
+
+    # adding a declaration to type must invalidate cached template
+    current = modeler.tree_ui.view.currentIndex()
+    modeler.tree_ui.model.fetchMore(current)
+    idx = modeler.tree_ui.model.match(current.child(0, 0), Qt.DisplayRole, "MyType", 1, Qt.MatchExactly)[0]
+    modeler.tree_ui.view.setCurrentIndex(idx)
+    var2 = mgr.add_variable(1, "myvar2", 3)
+    assert var2.get_parent() == otype
+    var2.set_modelling_rule(True)
+    obj = mgr.instantiate_many(objects, otype, ["obj4"])[0]
+    assert obj.get_child("1:myvar2").read_value() == 3
+
+    # so must adding a modelling rule to a child of type in references widget
+    var3 = mgr.add_variable(1, "myvar3", 4)
+    mgr.instantiate_many(objects, otype, ["obj5"])
+    var3.set_modelling_rule(True)
+    modeler.refs_ui.reference_changed.emit(var3)
+    obj = mgr.instantiate_many(objects, otype, ["obj6"])[0]
+    assert obj.get_child("1:myvar3").read_value() == 4
+
+    # and making a declaration of a node whose first parent is not the type
+    var4 = objects.add_variable(1, "myvar4", 5)
+    otype.add_reference(var4, ua.ObjectIds.HasComponent)
+    mgr.instantiate_many(objects, otype, ["obj7"])
+    var4.set_modelling_rule(True)
+    modeler.refs_ui.reference_changed.emit(var4)
+    obj = mgr.instantiate_many(objects, otype, ["obj8"])[0]
+    assert obj.get_child("1:myvar4").read_value() == 5
+
+
+def test_struct_dict_parse_cache(modeler, mgr, model):
+    xml = b"""<opc:TypeDictionary xmlns:opc="http://opcfoundation.org/BinarySchema/" xmlns:ua="http://opcfoundation.org/UA/" TargetNamespace="urn://modeller/testing">
+  <opc:StructuredType BaseType="ua:ExtensionObject" Name="MyStruct">
+    <opc:Field TypeName="opc:Float" Name="MyFloat" />
+  </opc:StructuredType>
+</opc:TypeDictionary>"""
+    structs = mgr._parse_struct_dict(xml)
+    assert [struct.name for struct in structs] == ["MyStruct"]
+    assert mgr._parse_struct_dict(xml) is structs
+    assert mgr._parse_struct_dict(xml.replace(b"MyFloat", b"MyFloat2")) is not structs
+
+
+def test_validation(modeler, mgr, model):
+    modeler.tree_ui.expand_to_node("Objects")
+    var = mgr.add_variable(1, "myvar", 1.0)
+    assert not mgr.validate()
+    # nodes using a removed namespace index are checked again
+    ns_node = mgr.server_mgr.get_node(ua.ObjectIds.Server_NamespaceArray)
+    uris = ns_node.read_value()
+    ns_node.write_value(uris[:1])
+    mgr.validator.namespaces_changed()
+    problems = mgr.validator.get_problems(var.nodeid)
+    assert problems
+    assert "Namespace index 1" in problems[0].message
+    assert modeler.problems_ui.model.rowCount() == len(mgr.validator.get_problems())
+    ns_node.write_value(uris)
+    mgr.validator.namespaces_changed()
+    assert not mgr.validator.get_problems()
+    assert modeler.problems_ui.model.rowCount() == 0
+    # deleted nodes are forgotten
+    var.write_attribute(ua.AttributeIds.DataType, ua.DataValue(ua.NodeId(9999, 1)))
+    mgr.validator.update([var])
+    assert "Unknown DataType" in mgr.validator.get_problems(var.nodeid)[0].message
+    # with the problems reported by other components
+    mgr.validator.report(var.nodeid, "Reported problem")
+    assert len(mgr.validator.get_problems(var.nodeid)) == 2
+    mgr.delete_node(var, False)
+    assert not mgr.validator.get_problems()
+    assert modeler.problems_ui.model.rowCount() == 0
+
+
+def test_find_usages_and_delete(modeler, mgr, model):
+    server = modeler.get_current_server()
+    modeler.tree_ui.expand_to_node(server.nodes.base_object_type)
+    otype = mgr.add_object_type(1, "MyType")
+    objects = server.nodes.objects
+    obj1, obj2 = mgr.instantiate_many(objects, otype, ["obj1", "obj2"])
+    modeler.tree_ui.expand_to_node("Objects")
+    var = mgr.add_variable(1, "myvar", 1.0)
+    var.add_reference(obj1.nodeid, ua.ObjectIds.HasDescription)
+    mgr._reference_changed(var)
+    usages = mgr.find_usages(otype)
+    assert {node for node, _ in usages} == {obj1, obj2}
+    assert all(reftype == ua.NodeId(ua.ObjectIds.HasTypeDefinition) for _, reftype in usages)
+    assert (var, None) in mgr.find_usages(server.get_node(ua.ObjectIds.Double))
+
+    mgr.delete_node(obj1, False)
+    assert not var.get_references(ua.ObjectIds.HasDescription, ua.BrowseDirection.Forward)
+    assert obj1 not in objects.get_children()
+    assert [node for node, _ in mgr.find_usages(otype)] == [obj2]
+    assert not mgr.find_usages(obj1)
+
+
+def test_search(modeler, mgr, model):
+    mgr.search_index.build(background=False)
+    assert mgr.search_index.is_ready()
+    server = modeler.get_current_server()
+    assert server.nodes.objects in mgr.search("objects")
+    modeler.tree_ui.expand_to_node("Objects")
+    var = mgr.add_variable(1, "MotorTemperature", 1.0)
+    assert mgr.search("motor temp") == [var]
+    assert mgr.search("motortemp", new_nodes_only=True) == [var]
+    assert mgr.search(var.nodeid.to_string()) == [var]
+    assert not mgr.search("server", new_nodes_only=True)
+    var.write_attribute(ua.AttributeIds.DisplayName, ua.DataValue(ua.LocalizedText("Pressure")))
+    mgr.search_index.update([var])
+    assert var in mgr.search("pressure")
+    mgr.delete_node(var, False)
+    assert not mgr.search("motortemp")
+
+
+def test_query(modeler, mgr, model):
+    from uamodeler.query import Query
+    server = modeler.get_current_server()
+    modeler.tree_ui.expand_to_node(server.nodes.base_object_type)
+    otype = mgr.add_object_type(1, "LineType")
+    var = otype.add_variable(1, "Speed", 1.0)
+    var.set_modelling_rule(True)
+    mgr._update_indexes([var])
+    objects = server.nodes.objects
+    line1, line2 = mgr.instantiate_many(objects, otype, ["Line1", "Line2"])[:2]
+    modeler.tree_ui.expand_to_node("Objects")
+    other = mgr.add_variable(1, "Other", 1)
+
+    doubles = Query(nodeclass=ua.NodeClass.Variable, datatype=ua.NodeId(ua.ObjectIds.Double))
+    assert {node.read_browse_name().Name for node in mgr.query(doubles)} == {"Speed"}
+    assert len(mgr.query(doubles)) == 3
+    doubles.under = line1.nodeid
+    assert mgr.query(doubles) == [line1.get_child("1:Speed")]
+    assert set(mgr.query(Query(typedef=otype.nodeid))) == {line1, line2}
+    assert other in mgr.query(Query(name="^oth", namespace=1))
+
+    missing = Query(typedef=otype.nodeid, missing_mandatory=True)
+    assert not mgr.query(missing)
+    # instances need not have children of a placeholder declaration
+    placeholder = otype.add_object(1, "<Motor>")
+    placeholder.add_reference(ua.NodeId(ua.ObjectIds.ModellingRule_MandatoryPlaceholder), ua.ObjectIds.HasModellingRule)
+    modeler.refs_ui.reference_changed.emit(placeholder)
+    assert not mgr.query(missing)
+    mgr.delete_node(line2.get_child("1:Speed"), False)
+    assert mgr.query(missing) == [line2]
+
+
+def test_results_selection(modeler, mgr, model, monkeypatch):
+    from PyQt5.QtCore import QItemSelectionModel, QPoint
+    import uamodeler.uamodeler
+
+    class InputDialog:
+        @staticmethod
+        def getText(parent, title, label):
+            return ("^pump" if "expression" in label else "motor"), True
+
+    monkeypatch.setattr(uamodeler.uamodeler, "QInputDialog", InputDialog)
+    modeler.tree_ui.expand_to_node("Objects")
+    objects = modeler.get_current_server().nodes.objects
+    variables = [objects.add_variable(1, f"pump{i}", 1.0) for i in range(3)]
+    mgr.new_nodes.extend(variables)
+    mgr._update_indexes(variables)
+    modeler.results_ui.set_nodes(mgr.server_mgr, [(var.nodeid, "") for var in variables])
+    for row in (0, 2):
+        idx = modeler.results_ui.model.index(row, 0)
+        modeler.ui.resultsView.selectionModel().select(idx, QItemSelectionModel.Select | QItemSelectionModel.Rows)
+
+    # actions of the context menu of results apply to the selected results
+    menu = modeler._resultsContextMenu
+    monkeypatch.setattr(menu, "exec_", lambda pos: modeler.ui.actionRename.trigger())
+    modeler._show_context_menu_results(QPoint())
+    assert [var.read_browse_name().Name for var in variables] == ["motor0", "pump1", "motor2"]
+    assert objects in modeler.get_selected_nodes()  # back to tree selection
+
+    monkeypatch.setattr(menu, "exec_", lambda pos: modeler.ui.actionDelete.trigger())
+    modeler._show_context_menu_results(QPoint())
+    assert variables[0] not in objects.get_children()
+    assert variables[2] not in objects.get_children()
+    assert variables[1] in objects.get_children()
+    assert modeler.results_ui.get_nodeids() == [variables[1].nodeid]
+    assert mgr.new_nodes == [variables[1]]
+
+
+def test_remove_namespace_remaps_nodes(modeler, mgr, model):
+    server = modeler.get_current_server()
+    server.get_server().register_namespace("urn:unused")
+    idx = server.get_server().register_namespace("urn:moved")
+    assert idx == 3
+    modeler.tree_ui.expand_to_node("Objects")
+    folder = mgr.add_folder(idx, "myfolder")
+    var = folder.add_variable(ua.NodeId("myvar", idx), ua.QualifiedName("myvar", idx), 1.5)
+    var.add_reference(folder.nodeid, ua.ObjectIds.HasDescription)
+    mgr._after_add([var], folder)
+    # encoding nodes of a struct are only reached through HasEncoding references
+    struct_node, _ = new_struct(server.get_server(), idx, "MyRemappedStruct", [new_struct_field("MyInt", ua.VariantType.Int32)])
+    encoding = server.get_node(struct_node.get_references(ua.ObjectIds.HasEncoding)[0].NodeId)
+    mgr.new_nodes.append(struct_node)
+
+    with pytest.raises(RuntimeError):
+        mgr.remove_namespace("urn:moved")
+    mgr.remove_namespace("urn:unused")
+    new_struct_node = server.get_node(ua.NodeId(struct_node.nodeid.Identifier, 2))
+    new_encoding = server.get_node(ua.NodeId(encoding.nodeid.Identifier, 2))
+    assert new_encoding.read_browse_name().Name == "Default Binary"
+    refs = new_struct_node.get_references(ua.ObjectIds.HasEncoding, ua.BrowseDirection.Forward)
+    assert [ref.NodeId for ref in refs] == [new_encoding.nodeid]
+    assert new_struct_node.read_attribute(ua.AttributeIds.DataTypeDefinition).Value.Value.DefaultEncodingId == new_encoding.nodeid
+    with pytest.raises(ua.UaError):
+        encoding.read_browse_name()
+    assert server.get_namespace_array()[2] == "urn:moved"
+    new_folder = server.nodes.objects.get_child("2:myfolder")
+    assert new_folder.nodeid == ua.NodeId(folder.nodeid.Identifier, 2)
+    new_var = new_folder.get_child("2:myvar")
+    assert new_var.nodeid == ua.NodeId("myvar", 2)
+    assert new_var.read_value() == 1.5
+    refs = new_var.get_references(ua.ObjectIds.HasDescription, ua.BrowseDirection.Forward)
+    assert [ref.NodeId for ref in refs] == [new_folder.nodeid]
+    assert new_var in mgr.new_nodes and var not in mgr.new_nodes
+    with pytest.raises(ua.UaError):
+        var.read_value()
+
+    mgr.merge_namespaces("urn:moved", server.get_namespace_array()[1])
+    assert "urn:moved" not in server.get_namespace_array()
+    assert server.nodes.objects.get_child("1:myfolder").get_child("1:myvar").read_value() == 1.5
+
+
+def test_remove_namespace_rewrites_users(modeler, mgr, model):
+    server = modeler.get_current_server()
+    server.get_server().register_namespace("urn:unused")
+    idx = server.get_server().register_namespace("urn:moved")
+    objects = server.nodes.objects
+    dtype = server.get_node(ua.ObjectIds.BaseDataType).add_data_type(ua.NodeId(1, idx), "MyMovedType")
+    # node of namespace 1 using namespace idx in its attributes and a reference only stored in it
+    var = objects.add_variable(ua.NodeId("user", 1), ua.QualifiedName("user", idx), ua.NodeId(2, idx), datatype=dtype.nodeid)
+    var.add_reference(dtype.nodeid, ua.ObjectIds.HasDescription, bidirectional=False)
+    # namespace only used by a BrowseName is still used
+    unused = objects.add_object(ua.NodeId("unused", 1), ua.QualifiedName("unused", 2))
+    with pytest.raises(RuntimeError):
+        mgr.remove_namespace("urn:unused")
+    assert server.get_namespace_array()[2] == "urn:unused"
+    assert var.read_browse_name() == ua.QualifiedName("user", idx)
+
+    mgr.delete_node(unused, False)
+    mgr.remove_namespace("urn:unused")
+    assert server.get_namespace_array()[2] == "urn:moved"
+    assert var.read_browse_name() == ua.QualifiedName("user", 2)
+    assert var.read_data_type() == ua.NodeId(1, 2)
+    assert var.read_value() == ua.NodeId(2, 2)
+    refs = var.get_references(ua.ObjectIds.HasDescription, ua.BrowseDirection.Forward)
+    assert [ref.NodeId for ref in refs] == [ua.NodeId(1, 2)]
+    assert server.get_node(ua.NodeId(1, 2)).read_browse_name().Name == "MyMovedType"
+
+
+def _write_nodeset(path, uri, required=()):
+    """
+    write a minimal nodeset with an ObjectType, subtype of the type of the first required model,
+    and the NamespaceMetadata object asyncua checks RequiredModels against
+    """
+    models = "".join(f'<RequiredModel ModelUri="{req}" Version="1.0" PublicationDate="2020-01-01T00:00:00Z"/>' for req in required)
+    uris = "".join(f"<Uri>{u}</Uri>" for u in [uri, *required])
+    parent_type = "ns=2;i=1" if required else "i=58"
+    props = ""
+    for i, name, dtype, val in [(3, "NamespaceUri", "String", uri),
+                                (4, "NamespaceVersion", "String", "1.0"),
+                                (5, "NamespacePublicationDate", "DateTime", "2020-01-01T00:00:00Z")]:
+        props += f"""
+  <UAVariable NodeId="ns=1;i={i}" BrowseName="{name}" DataType="{dtype}">
+    <DisplayName>{name}</DisplayName>
+    <References>
+      <Reference ReferenceType="HasProperty" IsForward="false">ns=1;i=2</Reference>
+      <Reference ReferenceType="HasTypeDefinition">i=68</Reference>
+    </References>
+    <Value><{dtype} xmlns="http://opcfoundation.org/UA/2008/02/Types.xsd">{val}</{dtype}></Value>
+  </UAVariable>"""
+    path.write_text(f"""<?xml version="1.0" encoding="utf-8"?>
+<UANodeSet xmlns="http://opcfoundation.org/UA/2011/03/UANodeSet.xsd">
+  <NamespaceUris>{uris}</NamespaceUris>
+  <Models><Model ModelUri="{uri}" Version="1.0" PublicationDate="2020-01-01T00:00:00Z">{models}</Model></Models>
+  <UAObjectType NodeId="ns=1;i=1" BrowseName="1:{uri[4:]}Type">
+    <DisplayName>{uri[4:]}Type</DisplayName>
+    <References><Reference ReferenceType="HasSubtype" IsForward="false">{parent_type}</Reference></References>
+  </UAObjectType>
+  <UAObject NodeId="ns=1;i=2" BrowseName="1:{uri}">
+    <DisplayName>{uri}</DisplayName>
+    <References>
+      <Reference ReferenceType="HasComponent" IsForward="false">i=11715</Reference>
+      <Reference ReferenceType="HasTypeDefinition">i=11616</Reference>
+    </References>
+  </UAObject>{props}
+</UANodeSet>""")
+    return str(path)
+
+
+def test_import_nodesets_in_dependency_order(modeler, mgr, model, tmp_path, monkeypatch):
+    base = _write_nodeset(tmp_path / "base.xml", "urn:base")
+    derived = _write_nodeset(tmp_path / "derived.xml", "urn:derived", ["urn:base"])
+    builds = []
+    monkeypatch.setattr(mgr.search_index, "build", lambda: builds.append(1))
+    reloads = []
+    monkeypatch.setattr(modeler.tree_ui, "reload", lambda: reloads.append(1))
+    modeler.nodesets_ui.import_nodesets([derived, base])
+    assert modeler.nodesets_ui.nodesets == ["base.xml", "derived.xml"]
+    assert len(builds) == 1  # search index is built once for all nodesets
+    assert len(reloads) == 1  # so is the tree
+    server = modeler.get_current_server()
+    uris = server.get_namespace_array()
+    base_type = server.get_node(ua.NodeId(1, uris.index("urn:base")))
+    derived_type = server.get_node(ua.NodeId(1, uris.index("urn:derived")))
+    assert derived_type.get_parent() == base_type
+
+    from uamodeler.nodeset_loader import parse_nodesets
+    cycle = _write_nodeset(tmp_path / "cycle.xml", "urn:cycle", ["urn:other"])
+    other = _write_nodeset(tmp_path / "other.xml", "urn:other", ["urn:cycle"])
+    with pytest.raises(ValueError):
+        parse_nodesets([cycle, other], max_workers=2)
+    missing = _write_nodeset(tmp_path / "missing.xml", "urn:needsmissing", ["urn:missing"])
+    with pytest.raises(ValueError):
+        modeler.nodesets_ui.import_nodesets([missing])
+    assert "missing.xml" not in modeler.nodesets_ui.nodesets
+
+    # without the XmlImporter internals it uses, parsed nodesets are imported from their file
+    from uamodeler import nodeset_loader
+    monkeypatch.setattr(nodeset_loader, "_IMPORTER_MEMBERS", nodeset_loader._IMPORTER_MEMBERS + ("_missing",))
+    fallback = _write_nodeset(tmp_path / "fallback.xml", "urn:fallback", ["urn:base"])
+    modeler.nodesets_ui.import_nodesets([fallback])
+    uris = server.get_namespace_array()
+    assert server.get_node(ua.NodeId(1, uris.index("urn:fallback"))).get_parent() == base_type
+
+
+def test_nodeset_library(modeler, mgr, model, tmp_path):
+    from uamodeler.nodeset_library import NodeSetLibrary, scan_nodeset
+    base = _write_nodeset(tmp_path / "base.xml", "urn:base")
+    derived = _write_nodeset(tmp_path / "derived.xml", "urn:derived", ["urn:base"])
+    library = NodeSetLibrary(str(tmp_path))
+    assert library.refresh()
+    assert not library.refresh()
+    assert "node_count" not in library.catalog["base.xml"]  # only the header is read
+    assert library.catalog["base.xml"]["namespaces"] == ["urn:base"]
+    servers = tmp_path / "servers"
+    servers.mkdir()
+    path = _write_nodeset(servers / "servers.xml", "urn:servers")
+    with open(path, encoding="utf-8") as f:
+        text = f.read().replace("</NamespaceUris>", "</NamespaceUris><ServerUris><Uri>urn:server</Uri></ServerUris>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    assert scan_nodeset(path)["namespaces"] == ["urn:servers"]
+    assert library.catalog["derived.xml"]["version"] == "1.0"
+    assert library.find("urn:derived") == "derived.xml"
+    assert NodeSetLibrary(str(tmp_path)).catalog == library.catalog  # persisted
+
+    modeler.nodesets_ui.library = library
+    assert modeler.nodesets_ui.get_dependencies(derived) == [base]
+    modeler.nodesets_ui.import_nodesets(modeler.nodesets_ui.get_dependencies(derived) + [derived])
+    assert modeler.nodesets_ui.nodesets == ["base.xml", "derived.xml"]
+    assert modeler.nodesets_ui.get_dependencies(derived) == []
+    # nodes are counted when imported
+    assert library.describe("base.xml") == "urn:base 1.0 (base.xml, 5 nodes)"
+    assert NodeSetLibrary(str(tmp_path)).catalog["derived.xml"]["node_count"] == 5
+
+
+def test_memory_report(modeler, mgr):
+    import tracemalloc
+    from uamodeler.memory_report import deep_sizeof
+    mgr.new_model()
+    # tracemalloc also sees allocations of the background build started by new_model
+    mgr.search_index.build(background=False)
+    objects = mgr.server_mgr.get_node(ua.ObjectIds.ObjectsFolder)
+    nodes = [objects.add_variable(1, f"myvar{i}", i) for i in range(20)]
+    mgr._after_add(nodes, objects)
+    report = mgr.memory_report()
+    aspace = report.get_row("Server address space")
+    assert aspace.count == len(mgr.server_mgr.get_address_space())
+    assert aspace.size > 0 and aspace.average == aspace.size / aspace.count
+    new_nodes = report.get_row("New nodes")
+    assert new_nodes.count == len(mgr.new_nodes) == 20
+    assert 0 < new_nodes.saving < new_nodes.size
+    assert report.get_row("Struct design nodes").count == 0
+    assert report.get_row("Undo state").size == 0
+    assert report.get_row("Type template cache").saving == report.get_row("Type template cache").size
+    assert report.format().startswith("Estimated Python memory")
+    assert "could save" in report.format()
+    # estimates agree with what tracemalloc sees for a narrow operation
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        values = [ua.Variant(i * 1.5) for i in range(1000)]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    traced = sum(stat.size_diff for stat in after.filter_traces(filters).compare_to(before.filter_traces(filters), "filename"))
+    assert 0.5 < deep_sizeof(values) / traced < 2
+
+
 def test_set_current_node(modeler, mgr, model):
     objects = modeler.get_current_server().nodes.objects
     modeler.tree_ui.expand_to_node("Objects")
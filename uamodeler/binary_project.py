@@ -0,0 +1,191 @@
+import logging
+import struct
+import zlib
+
+from asyncua import ua
+from asyncua.common.utils import Buffer
+from asyncua.ua.ua_binary import Primitives, struct_to_binary, struct_from_binary, nodeid_to_binary, nodeid_from_binary
+
+from uamodeler.subtree import read_node_records, group_by_depth
+from uamodeler.namespace_remap import map_value
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"UAMODELB"
+FORMAT_VERSION = 1
+CHUNK_SIZE = 1000  # items per compressed section, also items per AddNodes request when opening
+
+SECTION_NAMESPACES = 1
+SECTION_NODESETS = 2
+SECTION_NODES = 3
+SECTION_REFERENCES = 4
+SECTION_CURRENT_NODE = 5
+
+_SECTION_HEADER = struct.Struct("<BII")  # kind, item count, compressed size
+
+_ENCODERS = {
+    SECTION_NAMESPACES: Primitives.String.pack,
+    SECTION_NODESETS: Primitives.String.pack,
+    SECTION_NODES: struct_to_binary,
+    SECTION_REFERENCES: struct_to_binary,
+    SECTION_CURRENT_NODE: nodeid_to_binary,
+}
+
+_DECODERS = {
+    SECTION_NAMESPACES: Primitives.String.unpack,
+    SECTION_NODESETS: Primitives.String.unpack,
+    SECTION_NODES: lambda data: struct_from_binary(ua.AddNodesItem, data),
+    SECTION_REFERENCES: lambda data: struct_from_binary(ua.AddReferencesItem, data),
+    SECTION_CURRENT_NODE: nodeid_from_binary,
+}
+
+
+class BinaryProject:
+    """
+    Model saved as AddNodes and AddReferences items in OPC UA binary encoding,
+    in zlib compressed sections of at most CHUNK_SIZE items.
+    Opening it does not need any XML parsing and nodes are added with
+    one AddNodes request per section
+    """
+
+    def __init__(self):
+        self.namespaces = []  # namespace array without namespace 0
+        self.nodesets = []  # reference nodesets
+        self.nodes = []  # AddNodesItem, parents before their children
+        self.references = []  # AddReferencesItem not created by AddNodes
+        self.current_node = None
+
+    @classmethod
+    def from_server(cls, server_mgr, nodeids):
+        """
+        read nodes from server with batched requests
+        """
+        project = cls()
+        project.namespaces = server_mgr.get_namespace_array()[1:]
+        if not nodeids:
+            return project
+        records, refs, outside = read_node_records(server_mgr, nodeids)
+        for level in group_by_depth(records):
+            for rec in level:
+                item = ua.AddNodesItem()
+                item.RequestedNewNodeId = rec.nodeid
+                item.BrowseName = rec.bname
+                if rec.parent is not None:
+                    item.ParentNodeId = rec.parent
+                    item.ReferenceTypeId = rec.reftype
+                item.TypeDefinition = rec.typedef
+                item.NodeClass = rec.nodeclass
+                item.NodeAttributes = rec.attrs
+                project.nodes.append(item)
+        for source, reftype, target, forward in refs + _existing_references(server_mgr, outside):
+            item = ua.AddReferencesItem()
+            item.SourceNodeId = source
+            item.ReferenceTypeId = reftype
+            item.TargetNodeId = target
+            item.IsForward = forward
+            project.references.append(item)
+        return project
+
+    def write(self, path):
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(Primitives.UInt32.pack(FORMAT_VERSION))
+            _write_section(f, SECTION_NAMESPACES, self.namespaces)
+            _write_section(f, SECTION_NODESETS, self.nodesets)
+            if self.current_node is not None:
+                _write_section(f, SECTION_CURRENT_NODE, [self.current_node])
+            for i in range(0, len(self.nodes), CHUNK_SIZE):
+                _write_section(f, SECTION_NODES, self.nodes[i:i + CHUNK_SIZE])
+            for i in range(0, len(self.references), CHUNK_SIZE):
+                _write_section(f, SECTION_REFERENCES, self.references[i:i + CHUNK_SIZE])
+
+    @classmethod
+    def read(cls, path):
+        project = cls()
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a binary OPC UA model")
+            version = Primitives.UInt32.unpack(Buffer(f.read(4)))
+            if version > FORMAT_VERSION:
+                raise ValueError(f"{path} has format version {version}, only version {FORMAT_VERSION} is supported")
+            while True:
+                header = f.read(_SECTION_HEADER.size)
+                if not header:
+                    break
+                kind, count, size = _SECTION_HEADER.unpack(header)
+                data = Buffer(zlib.decompress(f.read(size)))
+                decode = _DECODERS.get(kind)
+                if decode is None:
+                    logger.warning("Skipping unknown section %s in %s", kind, path)
+                    continue
+                items = [decode(data) for _ in range(count)]
+                if kind == SECTION_NAMESPACES:
+                    project.namespaces.extend(items)
+                elif kind == SECTION_NODESETS:
+                    project.nodesets.extend(items)
+                elif kind == SECTION_NODES:
+                    project.nodes.extend(items)
+                elif kind == SECTION_REFERENCES:
+                    project.references.extend(items)
+                elif kind == SECTION_CURRENT_NODE:
+                    project.current_node = items[0]
+        return project
+
+    def get_namespace_mapping(self, server_mgr):
+        """
+        register namespaces missing in server and return a dict
+        saved namespace index -> server namespace index for indexes which differ
+        """
+        uris = server_mgr.get_namespace_array()
+        mapping = {}
+        for idx, uri in enumerate(self.namespaces, start=1):
+            if uri in uris:
+                new_idx = uris.index(uri)
+            else:
+                new_idx = server_mgr.get_server().register_namespace(uri)
+                uris = server_mgr.get_namespace_array()
+            if new_idx != idx:
+                mapping[idx] = new_idx
+        return mapping
+
+    def apply(self, server_mgr):
+        """
+        add nodes and references of project to server, after mapping
+        them to the namespace indexes of server
+        return nodeids of added nodes
+        """
+        mapping = self.get_namespace_mapping(server_mgr)
+        if mapping:
+            logger.info("Mapping namespaces of binary model: %s", mapping)
+            self.nodes = [map_value(item, mapping) for item in self.nodes]
+            self.references = [map_value(item, mapping) for item in self.references]
+            self.current_node = map_value(self.current_node, mapping)
+        added = []
+        for i in range(0, len(self.nodes), CHUNK_SIZE):
+            for res in server_mgr.add_nodes(self.nodes[i:i + CHUNK_SIZE]):
+                res.StatusCode.check()
+                added.append(res.AddedNodeId)
+        for item, res in zip(self.references, server_mgr.add_references(self.references)):
+            if not res.is_good():
+                logger.warning("Could not add reference %s: %s", item, res)
+        return added
+
+
+def _existing_references(server_mgr, refs):
+    """
+    return the references, as (source, reftype, target, forward) tuples, which exist in server.
+    Nodes outside the model hold opposite references only if they were created,
+    by XML import for example, AddNodes does not create them
+    """
+    sources = list({ref[0] for ref in refs})
+    existing = set()
+    for source, descs in zip(sources, server_mgr.browse(sources, refs=ua.ObjectIds.References, direction=ua.BrowseDirection.Both)):
+        existing.update((source, desc.ReferenceTypeId, desc.NodeId, desc.IsForward) for desc in descs)
+    return [ref for ref in refs if ref in existing]
+
+
+def _write_section(f, kind, items):
+    encode = _ENCODERS[kind]
+    data = zlib.compress(b"".join(encode(item) for item in items))
+    f.write(_SECTION_HEADER.pack(kind, len(items), len(data)))
+    f.write(data)
@@ -0,0 +1,52 @@
+from PyQt5.QtWidgets import QDialog, QFormLayout, QComboBox, QSpinBox, QDialogButtonBox, QLabel
+
+from uamodeler.bulk_import import COLUMNS, guess_mapping
+
+_LABELS = {
+    "name": "Name",
+    "datatype": "DataType",
+    "array_size": "Array size",
+    "unit": "Engineering unit",
+    "description": "Description",
+    "kind": "Kind (variable or property)",
+}
+
+
+class BulkCreateDialog(QDialog):
+    """
+    Dialog to map the columns of a signal list to the attributes
+    of the variables to create
+    """
+
+    def __init__(self, parent, path, headers, row_count, namespace_idx=1):
+        QDialog.__init__(self, parent)
+        self.setWindowTitle("Create Variables From Signal List")
+        layout = QFormLayout(self)
+        layout.addRow(QLabel(f"{row_count} rows in {path}", self))
+        mapping = guess_mapping(headers)
+        self._combos = {}
+        for attr in COLUMNS:
+            combo = QComboBox(self)
+            combo.addItem("Not used", None)
+            for idx, header in enumerate(headers):
+                combo.addItem(header, idx)
+            if attr in mapping:
+                combo.setCurrentIndex(mapping[attr] + 1)
+            layout.addRow(_LABELS[attr], combo)
+            self._combos[attr] = combo
+
+        self.namespaceSpinBox = QSpinBox(self)
+        self.namespaceSpinBox.setRange(0, 65535)
+        self.namespaceSpinBox.setValue(namespace_idx)
+        layout.addRow("Namespace index", self.namespaceSpinBox)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def get_mapping(self):
+        return {attr: combo.currentData() for attr, combo in self._combos.items() if combo.currentData() is not None}
+
+    def get_namespace_idx(self):
+        return self.namespaceSpinBox.value()
@@ -0,0 +1,129 @@
+import logging
+import re
+
+from asyncua import ua
+from asyncua.common.ua_utils import string_to_variant
+
+logger = logging.getLogger(__name__)
+
+# attributes which can be set to the same value on many nodes -> VariantType of their value
+EDITABLE_ATTRIBUTES = {
+    ua.AttributeIds.DisplayName: ua.VariantType.LocalizedText,
+    ua.AttributeIds.Description: ua.VariantType.LocalizedText,
+    ua.AttributeIds.WriteMask: ua.VariantType.UInt32,
+    ua.AttributeIds.UserWriteMask: ua.VariantType.UInt32,
+    ua.AttributeIds.IsAbstract: ua.VariantType.Boolean,
+    ua.AttributeIds.DataType: ua.VariantType.NodeId,
+    ua.AttributeIds.ValueRank: ua.VariantType.Int32,
+    ua.AttributeIds.MinimumSamplingInterval: ua.VariantType.Double,
+    ua.AttributeIds.Historizing: ua.VariantType.Boolean,
+}
+
+# name -> nodeid of ModellingRule, None removes the modelling rule
+MODELLING_RULES = {
+    "Mandatory": ua.NodeId(ua.ObjectIds.ModellingRule_Mandatory),
+    "Optional": ua.NodeId(ua.ObjectIds.ModellingRule_Optional),
+    "MandatoryPlaceholder": ua.NodeId(ua.ObjectIds.ModellingRule_MandatoryPlaceholder),
+    "OptionalPlaceholder": ua.NodeId(ua.ObjectIds.ModellingRule_OptionalPlaceholder),
+    "None": None,
+}
+
+# name -> AccessLevel of variables
+ACCESS_LEVELS = {
+    "Read": ua.AccessLevel.CurrentRead.mask,
+    "Read, Write": ua.AccessLevel.CurrentRead.mask | ua.AccessLevel.CurrentWrite.mask,
+    "Read, History Read": ua.AccessLevel.CurrentRead.mask | ua.AccessLevel.HistoryRead.mask,
+    "Read, Write, History Read, History Write": ua.AccessLevel.CurrentRead.mask | ua.AccessLevel.CurrentWrite.mask
+                                                | ua.AccessLevel.HistoryRead.mask | ua.AccessLevel.HistoryWrite.mask,
+}
+
+
+def parse_attribute_value(attr, text):
+    """
+    return the Variant of text for attribute attr, raise ValueError if attr cannot be edited in bulk
+    """
+    if attr not in EDITABLE_ATTRIBUTES:
+        raise ValueError(f"Attribute {attr.name} cannot be set on several nodes")
+    return string_to_variant(text, EDITABLE_ATTRIBUTES[attr])
+
+
+def make_write_values(nodeids, attr, variant):
+    """
+    one WriteValue of variant to attribute attr per nodeid
+    """
+    wvs = []
+    for nodeid in nodeids:
+        wv = ua.WriteValue()
+        wv.NodeId = nodeid
+        wv.AttributeId = attr
+        wv.Value = ua.DataValue(variant)
+        wvs.append(wv)
+    return wvs
+
+
+def make_access_level_values(server_mgr, nodeids, level):
+    """
+    WriteValues setting AccessLevel and UserAccessLevel of the variables of nodeids,
+    other nodes have no access level and are skipped
+    """
+    variables = [nodeid for nodeid, (nclass,) in zip(nodeids, server_mgr.read_attributes(nodeids, [ua.AttributeIds.NodeClass]))
+                 if nclass.Value.Value == ua.NodeClass.Variable]
+    variant = ua.Variant(level, ua.VariantType.Byte)
+    return make_write_values(variables, ua.AttributeIds.AccessLevel, variant) + \
+        make_write_values(variables, ua.AttributeIds.UserAccessLevel, variant)
+
+
+def make_rename_values(server_mgr, nodeids, pattern, repl):
+    """
+    WriteValues replacing regular expression pattern with repl in the BrowseName
+    and DisplayName of nodeids, names which do not match are not written.
+    Raise ValueError if pattern is invalid or a name would become empty
+    """
+    try:
+        regex = re.compile(pattern)
+    except re.error as ex:
+        raise ValueError(f"Invalid regular expression {pattern}: {ex}")
+    wvs = []
+    attrs = [ua.AttributeIds.BrowseName, ua.AttributeIds.DisplayName]
+    for nodeid, (bname, dname) in zip(nodeids, server_mgr.read_attributes(nodeids, attrs)):
+        bname = bname.Value.Value
+        dname = dname.Value.Value
+        new_name = regex.sub(repl, bname.Name)
+        new_text = regex.sub(repl, dname.Text or "")
+        if not new_name or not new_text:
+            raise ValueError(f"Renaming {bname.Name} with {pattern} gives an empty name")
+        if new_name != bname.Name:
+            wvs.extend(make_write_values([nodeid], ua.AttributeIds.BrowseName, ua.Variant(ua.QualifiedName(new_name, bname.NamespaceIndex))))
+        if new_text != dname.Text:
+            wvs.extend(make_write_values([nodeid], ua.AttributeIds.DisplayName, ua.Variant(ua.LocalizedText(new_text, dname.Locale))))
+    return wvs
+
+
+def make_modelling_rule_items(server_mgr, nodeids, rule):
+    """
+    return the AddReferencesItem and DeleteReferencesItem giving all nodeids the
+    modelling rule rule, or no modelling rule if rule is None.
+    As Node.set_modelling_rule, HasModellingRule references are only stored in nodes
+    """
+    to_add = []
+    to_delete = []
+    for nodeid, descs in zip(nodeids, server_mgr.browse(nodeids, refs=ua.ObjectIds.HasModellingRule)):
+        current = [desc.NodeId for desc in descs]
+        for target in current:
+            if target != rule:
+                item = ua.DeleteReferencesItem()
+                item.SourceNodeId = nodeid
+                item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasModellingRule)
+                item.TargetNodeId = target
+                item.IsForward = True
+                item.DeleteBidirectional = False
+                to_delete.append(item)
+        if rule is not None and rule not in current:
+            item = ua.AddReferencesItem()
+            item.SourceNodeId = nodeid
+            item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasModellingRule)
+            item.TargetNodeId = rule
+            item.IsForward = True
+            item.TargetNodeClass = ua.NodeClass.Object
+            to_add.append(item)
+    return to_add, to_delete
@@ -0,0 +1,294 @@
+import csv
+import logging
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError as ex:
+    logger.info("Could not import openpyxl, reading Excel files is disabled: %s", ex)
+    openpyxl = None
+
+MAX_REPORTED_ERRORS = 20
+
+EU_NAMESPACE = "http://www.opcfoundation.org/UA/units/un/cefact"
+
+# attribute -> column headers recognized for it, compared in lower case without spaces
+COLUMNS = {
+    "name": ("name", "browsename", "signal", "tag"),
+    "datatype": ("datatype", "type"),
+    "array_size": ("arraysize", "size", "length"),
+    "unit": ("unit", "engineeringunit", "engineeringunits", "eu"),
+    "description": ("description", "comment"),
+    "kind": ("kind", "nodetype"),
+}
+
+KINDS = ("variable", "property")
+
+# values of these types have no useful default, variables start with a null value
+_NULL_VARIANT_TYPES = (ua.VariantType.Variant, ua.VariantType.ExtensionObject, ua.VariantType.DiagnosticInfo, ua.VariantType.DataValue)
+
+
+def read_table(path):
+    """
+    read a CSV or Excel file, return its header row and its other rows as lists of strings
+    """
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        rows = _read_excel(path)
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            rows = [row for row in csv.reader(f, dialect)]
+    if not rows:
+        raise ValueError(f"{path} is empty")
+    return rows[0], rows[1:]
+
+
+def _read_excel(path):
+    if openpyxl is None:
+        raise RuntimeError("Reading Excel files needs openpyxl, install it or export the sheet to CSV")
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return [["" if cell is None else str(cell) for cell in row] for row in book.active.iter_rows(values_only=True)]
+    finally:
+        book.close()
+
+
+def guess_mapping(headers):
+    """
+    return a dict attribute -> index of the column holding it, from the column headers
+    """
+    mapping = {}
+    for idx, header in enumerate(headers):
+        key = header.strip().lower().replace(" ", "").replace("_", "")
+        for attr, names in COLUMNS.items():
+            if attr not in mapping and key in names:
+                mapping[attr] = idx
+    return mapping
+
+
+class DataTypeCatalog:
+    """
+    All DataTypes of server by BrowseName, read once with batched requests,
+    with the VariantType used for values of each of them
+    """
+
+    def __init__(self, server_mgr):
+        self.by_name = {}  # BrowseName name, and "idx:name", -> nodeid, None if name is ambiguous
+        self._parents = {}
+        self._variant_types = {}
+        root = ua.NodeId(ua.ObjectIds.BaseDataType)
+        nodeids = [root]
+        level = [root]
+        while level:
+            next_level = []
+            for nodeid, descs in zip(level, server_mgr.browse(level, refs=ua.ObjectIds.HasSubtype)):
+                for desc in descs:
+                    if desc.NodeId not in self._parents:
+                        self._parents[desc.NodeId] = nodeid
+                        next_level.append(desc.NodeId)
+            nodeids.extend(next_level)
+            level = next_level
+        for nodeid, (bname,) in zip(nodeids, server_mgr.read_attributes(nodeids, [ua.AttributeIds.BrowseName])):
+            name = bname.Value.Value
+            self.by_name[name.to_string()] = nodeid
+            if name.Name in self.by_name and self.by_name[name.Name] != nodeid:
+                self.by_name[name.Name] = None
+            else:
+                self.by_name[name.Name] = nodeid
+
+    def __contains__(self, nodeid):
+        return nodeid in self._parents or nodeid == ua.NodeId(ua.ObjectIds.BaseDataType)
+
+    def get(self, text):
+        """
+        return nodeid of DataType named text, given as name, "idx:name" or NodeId string.
+        Raise ValueError if it is unknown or ambiguous
+        """
+        text = text.strip()
+        if text in self.by_name:
+            nodeid = self.by_name[text]
+            if nodeid is None:
+                raise ValueError(f"DataType {text} exists in several namespaces, use idx:{text}")
+            return nodeid
+        if "=" in text:
+            try:
+                nodeid = ua.NodeId.from_string(text)
+            except Exception:
+                nodeid = None
+            if nodeid in self:
+                return nodeid
+        raise ValueError(f"Unknown DataType {text}")
+
+    def get_variant_type(self, nodeid):
+        """
+        VariantType of values of DataType nodeid, from its nearest builtin supertype
+        """
+        if nodeid not in self._variant_types:
+            current = nodeid
+            while current is not None:
+                if current.NamespaceIndex == 0 and isinstance(current.Identifier, int):
+                    if current.Identifier == ua.ObjectIds.Enumeration:
+                        vtype = ua.VariantType.Int32
+                        break
+                    if current.Identifier in ua.VariantType._value2member_map_ and current.Identifier != 0:
+                        vtype = ua.VariantType(current.Identifier)
+                        break
+                current = self._parents.get(current)
+            else:
+                vtype = ua.VariantType.Variant
+            self._variant_types[nodeid] = vtype
+        return self._variant_types[nodeid]
+
+
+class SignalSpec:
+    """
+    One validated row of a signal list
+    """
+
+    def __init__(self, row, name, datatype, vtype, array_size=None, unit=None, description=None, kind="variable"):
+        self.row = row  # line number in file, for messages
+        self.name = name
+        self.datatype = datatype
+        self.vtype = vtype
+        self.array_size = array_size  # None for a scalar
+        self.unit = unit
+        self.description = description
+        self.kind = kind
+
+
+def parse_rows(rows, mapping, catalog, existing_names=(), first_row=2):
+    """
+    validate all rows before creating anything, return the list of SignalSpec.
+    Raise ValueError listing the invalid rows
+    """
+    for attr in ("name", "datatype"):
+        if mapping.get(attr) is None:
+            raise ValueError(f"No column is mapped to {attr}")
+    names = set(existing_names)
+    specs = []
+    errors = []
+
+    def get(row, attr):
+        idx = mapping.get(attr)
+        if idx is None or idx >= len(row):
+            return ""
+        return row[idx].strip()
+
+    for line, row in enumerate(rows, start=first_row):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            name = get(row, "name")
+            if not name:
+                raise ValueError("name is empty")
+            if name in names:
+                raise ValueError(f"name {name} is used twice under parent")
+            names.add(name)
+            datatype = catalog.get(get(row, "datatype"))
+            size = get(row, "array_size")
+            array_size = None
+            if size:
+                try:
+                    array_size = int(float(size))
+                except ValueError:
+                    raise ValueError(f"array size {size} is not a number")
+                if array_size < 0:
+                    raise ValueError(f"array size {size} is negative")
+            kind = get(row, "kind").lower() or "variable"
+            if kind not in KINDS:
+                raise ValueError(f"kind {kind} is not one of {', '.join(KINDS)}")
+            unit = get(row, "unit") or None
+            if unit and kind == "property":
+                raise ValueError("a property cannot have an engineering unit")
+            specs.append(SignalSpec(line, name, datatype, catalog.get_variant_type(datatype), array_size, unit,
+                                    get(row, "description") or None, kind))
+        except ValueError as ex:
+            errors.append(f"row {line}: {ex}")
+    if errors:
+        more = f"\n... and {len(errors) - MAX_REPORTED_ERRORS} other errors" if len(errors) > MAX_REPORTED_ERRORS else ""
+        raise ValueError(f"{len(errors)} invalid rows, nothing was created:\n" + "\n".join(errors[:MAX_REPORTED_ERRORS]) + more)
+    return specs
+
+
+def _default_value(vtype, array_size):
+    if vtype in _NULL_VARIANT_TYPES:
+        return ua.Variant()
+    if array_size is None:
+        return ua.Variant(ua.get_default_value(vtype), vtype)
+    return ua.Variant([ua.get_default_value(vtype) for _ in range(array_size)], vtype)
+
+
+def _make_variable_item(parent, spec, idx):
+    """
+    AddNodesItem creating spec as Node.add_variable and Node.add_property do
+    """
+    item = ua.AddNodesItem()
+    item.RequestedNewNodeId = ua.NodeId(NamespaceIndex=idx)
+    item.BrowseName = ua.QualifiedName(spec.name, idx)
+    item.NodeClass = ua.NodeClass.Variable
+    item.ParentNodeId = parent
+    if spec.kind == "property":
+        item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasProperty)
+        item.TypeDefinition = ua.NodeId(ua.ObjectIds.PropertyType)
+    else:
+        item.ReferenceTypeId = ua.NodeId(ua.ObjectIds.HasComponent)
+        item.TypeDefinition = ua.NodeId(ua.ObjectIds.BaseDataVariableType)
+    attrs = ua.VariableAttributes()
+    attrs.DisplayName = ua.LocalizedText(spec.name)
+    attrs.Description = ua.LocalizedText(spec.description or spec.name)
+    attrs.DataType = spec.datatype
+    attrs.Value = _default_value(spec.vtype, spec.array_size)
+    if spec.array_size is None:
+        attrs.ValueRank = ua.ValueRank.Scalar
+        attrs.ArrayDimensions = None
+    else:
+        attrs.ValueRank = ua.ValueRank.OneDimension
+        attrs.ArrayDimensions = [spec.array_size]
+    attrs.WriteMask = 0
+    attrs.UserWriteMask = 0
+    attrs.Historizing = False
+    attrs.AccessLevel = ua.AccessLevel.CurrentRead.mask
+    attrs.UserAccessLevel = ua.AccessLevel.CurrentRead.mask
+    item.NodeAttributes = attrs
+    return item
+
+
+def _make_eu_item(parent, unit):
+    spec = SignalSpec(None, "EngineeringUnits", ua.NodeId(ua.ObjectIds.EUInformation), ua.VariantType.ExtensionObject, kind="property")
+    item = _make_variable_item(parent, spec, 0)
+    item.RequestedNewNodeId = ua.NodeId(NamespaceIndex=parent.NamespaceIndex)
+    eu = ua.EUInformation()
+    eu.NamespaceUri = EU_NAMESPACE
+    eu.UnitId = -1
+    eu.DisplayName = ua.LocalizedText(unit)
+    eu.Description = ua.LocalizedText(unit)
+    item.NodeAttributes.Value = ua.Variant(eu)
+    return item
+
+
+def create_variables(server_mgr, parent, specs, idx=1):
+    """
+    create the variables and properties of specs under parent nodeid with batched
+    AddNodes requests, then their EngineeringUnits properties.
+    return nodeids of all added nodes
+    """
+    items = [_make_variable_item(parent, spec, idx) for spec in specs]
+    added = []
+    for res in server_mgr.add_nodes(items):
+        res.StatusCode.check()
+        added.append(res.AddedNodeId)
+    eu_items = [_make_eu_item(nodeid, spec.unit) for nodeid, spec in zip(added, specs) if spec.unit]
+    for res in server_mgr.add_nodes(eu_items):
+        res.StatusCode.check()
+        added.append(res.AddedNodeId)
+    logger.info("Created %s nodes from %s signals under %s", len(added), len(specs), parent)
+    return added
+
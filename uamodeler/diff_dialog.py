@@ -0,0 +1,46 @@
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QTreeView, QDialogButtonBox, QLabel
+
+from uamodeler.model_diff import format_value
+
+
+class DiffDialog(QDialog):
+    """
+    Show a ModelDiff: added and removed nodes, and the changed
+    fields of changed nodes with their old and new values
+    """
+
+    def __init__(self, parent, diff, title="Model Differences"):
+        QDialog.__init__(self, parent)
+        self.setWindowTitle(title)
+        self.diff = diff
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"{len(diff.added)} added, {len(diff.removed)} removed, {len(diff.changed)} changed nodes", self))
+        self.model = QStandardItemModel(self)
+        self.model.setHorizontalHeaderLabels(["Node", "Old", "New"])
+        self.view = QTreeView(self)
+        self.view.setModel(self.model)
+        self.view.setUniformRowHeights(True)
+        layout.addWidget(self.view)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, self)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        self._fill()
+        self.view.expandToDepth(0)
+        self.view.resizeColumnToContents(0)
+        self.resize(900, 500)
+
+    def _fill(self):
+        for title, keys, snapshot in (("Added", self.diff.added, self.diff.new), ("Removed", self.diff.removed, self.diff.old)):
+            group = QStandardItem(f"{title} ({len(keys)})")
+            for key in keys:
+                group.appendRow([QStandardItem(f"{snapshot.records[key].name} {key}")])
+            self.model.appendRow([group])
+        group = QStandardItem(f"Changed ({len(self.diff.changed)})")
+        for key, fields in self.diff.changed.items():
+            item = QStandardItem(f"{self.diff.new.records[key].name} {key}")
+            for field, old, new in fields:
+                item.appendRow([QStandardItem(field), QStandardItem(format_value(old)), QStandardItem(format_value(new))])
+            group.appendRow([item])
+        self.model.appendRow([group])
+
@@ -0,0 +1,73 @@
+import collections
+import logging
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCursor
+
+MAX_LINES = 2000  # lines kept in log view, older lines are removed
+MAX_MESSAGE_LENGTH = 1000  # longer messages are cut
+FLUSH_INTERVAL = 200  # ms between updates of log view
+
+
+class BufferedQtHandler(logging.Handler):
+    """
+    Logging handler writing to a QTextEdit without slowing down the code logging.
+    Records below the level of the handler are dropped by logging before they
+    are formatted. Messages are cut to MAX_MESSAGE_LENGTH and queued in a ring
+    buffer of MAX_LINES, so a burst of records drops the oldest ones, and the
+    queue is added to the view every FLUSH_INTERVAL ms in one edit.
+    The view keeps at most MAX_LINES lines.
+    Records can be emitted from any thread, the view is only edited in the thread
+    of the handler
+    """
+
+    def __init__(self, widget, level=logging.INFO, max_lines=MAX_LINES):
+        logging.Handler.__init__(self, level)
+        self.setFormatter(logging.Formatter("%(name)s - %(levelname)s - %(message)s"))
+        self.widget = widget
+        self.widget.document().setMaximumBlockCount(max_lines)
+        self._queue = collections.deque(maxlen=max_lines)
+        self._received = 0  # records queued since last flush, dropped ones included
+        self._timer = QTimer(widget)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start(FLUSH_INTERVAL)
+
+    def emit(self, record):
+        try:
+            msg = self.format(record)
+            if len(msg) > MAX_MESSAGE_LENGTH:
+                msg = f"{msg[:MAX_MESSAGE_LENGTH]}... ({len(msg) - MAX_MESSAGE_LENGTH} characters cut)"
+            self._queue.append(msg)
+            self._received += 1
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """
+        add queued messages to view
+        """
+        lines = []
+        while True:
+            try:
+                lines.append(self._queue.popleft())
+            except IndexError:
+                break
+        received, self._received = self._received, 0
+        if not lines or self.widget is None:
+            return
+        if received > len(lines):
+            # replace oldest message, so the notice is not dropped by the view
+            lines[0] = f"... {received - len(lines) + 1} log messages dropped"
+        cursor = QTextCursor(self.widget.document())
+        cursor.movePosition(QTextCursor.End)
+        if not self.widget.document().isEmpty():
+            cursor.insertBlock()
+        cursor.insertText("\n".join(lines))
+        self.widget.moveCursor(QTextCursor.End)
+
+    def close(self):
+        if self.widget is not None:
+            self._timer.stop()
+            self.flush()
+            self.widget = None  # logging flushes handlers again at exit, after widgets are deleted
+        logging.Handler.close(self)
@@ -0,0 +1,160 @@
+import enum
+import logging
+import sys
+import threading
+import types
+
+from PyQt5.QtCore import QObject
+
+from asyncua.sync import SyncNode
+from asyncua.common.node import Node
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SIZE = 500  # nodes of address space measured to compute the average size of a node
+
+# objects never counted as part of a subsystem, they are shared by the whole application
+_OPAQUE = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    threading.Thread,
+    logging.Logger,
+    enum.Enum,
+    QObject,
+)
+
+
+def deep_sizeof(obj, seen=None, stop=()):
+    """
+    size in bytes of obj and of all objects it references, as given by sys.getsizeof.
+    Objects in seen are not counted, seen is updated.
+    Objects in stop, classes, functions, enums, threads and QObjects other than obj
+    itself are not followed.
+    For nodes only the node object and its nodeid are counted,
+    not the server they are bound to
+    """
+    if seen is None:
+        seen = set()
+    seen.update(id(o) for o in stop)
+    size = 0
+    root = obj
+    todo = [obj]
+    while todo:
+        obj = todo.pop()
+        if id(obj) in seen or (obj is not root and isinstance(obj, _OPAQUE)):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, SyncNode):
+            size += sys.getsizeof(obj.__dict__)
+            todo.append(obj.aio_obj)
+        elif isinstance(obj, Node):
+            size += sys.getsizeof(obj.__dict__)
+            todo.append(obj.nodeid)
+        elif isinstance(obj, dict):
+            todo.extend(obj.keys())
+            todo.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            todo.extend(obj)
+        elif not isinstance(obj, (str, bytes, bytearray, int, float, complex)):
+            attrs = getattr(obj, "__dict__", None)
+            if attrs is not None and id(attrs) not in seen:
+                # attribute names are interned strings, shared by all instances
+                seen.add(id(attrs))
+                size += sys.getsizeof(attrs)
+                todo.extend(attrs.values())
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    todo.append(getattr(obj, slot))
+    return size
+
+
+def sample_sizeof(objs, count, sample_size=SAMPLE_SIZE):
+    """
+    estimate total size of count objects from the average size of
+    up to sample_size objects evenly spread in objs
+    """
+    if not count:
+        return 0
+    step = max(1, count // sample_size)
+    sample = objs[::step][:sample_size]
+    return sum(deep_sizeof(obj) for obj in sample) * count / len(sample)
+
+
+class MemoryRow:
+    """
+    memory held by one subsystem.
+    size is an estimate in bytes, None when it cannot be estimated from Python,
+    saving is what shrinking the subsystem as described in note would save
+    """
+
+    def __init__(self, name, size, count=None, saving=None, note=""):
+        self.name = name
+        self.size = size
+        self.count = count
+        self.saving = saving
+        self.note = note
+
+    @property
+    def average(self):
+        if self.size is None or not self.count:
+            return None
+        return self.size / self.count
+
+
+class MemoryReport:
+    """
+    Memory used by the subsystems of the modeler, estimated by walking their objects
+    and adding the sizes given by sys.getsizeof, or from a sample of them.
+    Objects shared between subsystems are counted in each of them.
+    Memory allocated by Qt in C++, for example by QStandardItem, is not included
+    """
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, name, size, count=None, saving=None, note=""):
+        row = MemoryRow(name, size, count, saving, note)
+        self.rows.append(row)
+        return row
+
+    def get_row(self, name):
+        for row in self.rows:
+            if row.name == name:
+                return row
+        return None
+
+    @property
+    def total(self):
+        return sum(row.size for row in self.rows if row.size is not None)
+
+    @property
+    def total_saving(self):
+        return sum(row.saving for row in self.rows if row.saving is not None)
+
+    def format(self):
+        lines = [f"Estimated Python memory: {_format_size(self.total)}, shrinking could save {_format_size(self.total_saving)}", ""]
+        for row in sorted(self.rows, key=lambda row: row.size or 0, reverse=True):
+            line = f"{row.name}: "
+            line += "not estimated" if row.size is None else "~" + _format_size(row.size)
+            if row.count is not None:
+                line += f", {row.count} objects"
+            if row.average is not None:
+                line += f", ~{_format_size(row.average)} per object"
+            if row.saving:
+                line += f", could save {_format_size(row.saving)}"
+            lines.append(line)
+            if row.note:
+                lines.append(f"    {row.note}")
+        return "\n".join(lines)
+
+
+def _format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
@@ -0,0 +1,272 @@
+import hashlib
+import logging
+import xml.etree.ElementTree as Et
+
+logger = logging.getLogger(__name__)
+
+_NODE_TAGS = {"UAObject", "UAObjectType", "UAVariable", "UAVariableType", "UAMethod", "UAReferenceType", "UADataType", "UAView"}
+_NODEID_ATTRIBUTES = {"ParentNodeId", "DataType", "MethodDeclarationId"}
+
+
+_local_names = {}
+
+
+def _local(tag):
+    name = _local_names.get(tag)
+    if name is None:
+        name = _local_names[tag] = tag.rsplit("}", 1)[-1]
+    return name
+
+
+class NodeRecord:
+    """
+    Canonical content of one node of a nodeset: NodeIds and BrowseNames
+    use namespace uris and aliases are resolved, so the same node gives the
+    same record whatever the namespace indexes and aliases of the file
+    """
+
+    __slots__ = ("key", "parent", "fields", "hash", "subtree_hash")
+
+    def __init__(self, key, parent, fields):
+        self.key = key  # canonical NodeId string
+        self.parent = parent  # canonical NodeId string of parent or None
+        self.fields = fields  # field name -> canonical string
+        self.hash = None
+        self.subtree_hash = None
+
+    @property
+    def name(self):
+        return self.fields.get("BrowseName", self.key)
+
+
+class ModelSnapshot:
+    """
+    Records of all nodes of a nodeset, with a Merkle hash per subtree:
+    the hash of a node and the subtree hashes of its children
+    """
+
+    def __init__(self):
+        self.records = {}  # key -> NodeRecord
+        self.children = {}  # key -> list of child keys, sorted
+        self.roots = []  # keys of nodes whose parent is not in nodeset, sorted
+
+    def __len__(self):
+        return len(self.records)
+
+    @classmethod
+    def from_xml(cls, path):
+        snapshot = cls()
+        tree = Et.parse(path)
+        root = tree.getroot()
+        uris = ["http://opcfoundation.org/UA/"]
+        aliases = {}
+        for el in root:
+            tag = _local(el.tag)
+            if tag == "NamespaceUris":
+                uris.extend(uri.text for uri in el)
+            elif tag == "Aliases":
+                aliases = {alias.attrib["Alias"]: alias.text for alias in el}
+        canon = _Canonicalizer(uris, aliases)
+        for el in root:
+            if _local(el.tag) in _NODE_TAGS:
+                rec = canon.make_record(el)
+                snapshot.records[rec.key] = rec
+        snapshot._link()
+        snapshot._hash()
+        return snapshot
+
+    def _link(self):
+        for rec in self.records.values():
+            if rec.parent in self.records:
+                self.children.setdefault(rec.parent, []).append(rec.key)
+                # the reference to the parent and from the parent are the tree structure itself,
+                # they are compared as children, not as fields
+                self.records[rec.parent].fields.pop(_reference_field(rec.fields.get("ParentReference"), True, rec.key), None)
+                rec.fields.pop(_reference_field(rec.fields.get("ParentReference"), False, rec.parent), None)
+            else:
+                self.roots.append(rec.key)
+        for keys in self.children.values():
+            keys.sort()
+        self.roots.sort()
+
+    def _hash(self):
+        # children before parents, without recursion since models can be deep
+        order = []
+        todo = list(self.roots)
+        while todo:
+            key = todo.pop()
+            order.append(key)
+            todo.extend(self.children.get(key, ()))
+        for key in reversed(order):
+            rec = self.records[key]
+            rec.hash = _digest(f"{k}\0{v}" for k, v in sorted(rec.fields.items()))
+            rec.subtree_hash = _digest([rec.hash] + [self.records[child].subtree_hash for child in self.children.get(key, ())])
+
+    def get_subtree(self, key):
+        """
+        return keys of key and all its descendants
+        """
+        result = []
+        todo = [key]
+        while todo:
+            key = todo.pop()
+            result.append(key)
+            todo.extend(self.children.get(key, ()))
+        return result
+
+
+class _Canonicalizer:
+
+    def __init__(self, uris, aliases):
+        self.uris = uris
+        self.aliases = aliases
+        self._nodeids = {None: None}  # the same NodeIds, reference types for example, appear in many nodes
+
+    def nodeid(self, text):
+        result = self._nodeids.get(text)
+        if result is None:
+            result = self._nodeids[text] = self._canonical_nodeid(text)
+        return result
+
+    def _canonical_nodeid(self, text):
+        text = self.aliases.get(text, text).strip()
+        if text.startswith("ns="):
+            idx, rest = text[3:].split(";", 1)
+            idx = int(idx)
+            if idx < len(self.uris):
+                return f"nsu={self.uris[idx]};{rest}"
+        return text
+
+    def qualified_name(self, text):
+        idx, sep, name = text.partition(":")
+        if sep and idx.isdigit() and int(idx) < len(self.uris):
+            return f"{self.uris[int(idx)]}:{name}"
+        return text
+
+    def make_record(self, el):
+        fields = {"NodeClass": _local(el.tag)[2:]}
+        for name, value in el.attrib.items():
+            if name == "NodeId":
+                continue
+            if name in _NODEID_ATTRIBUTES:
+                value = self.nodeid(value)
+            elif name == "BrowseName":
+                value = self.qualified_name(value)
+            fields[name] = value
+        parent_reftype = None
+        key = self.nodeid(el.attrib["NodeId"])
+        parent = self.nodeid(el.attrib.get("ParentNodeId"))
+        for child in el:
+            tag = _local(child.tag)
+            if tag == "References":
+                for ref in child:
+                    reftype = self.nodeid(ref.attrib["ReferenceType"])
+                    forward = ref.attrib.get("IsForward", "true").lower() != "false"
+                    target = self.nodeid(ref.text)
+                    if not forward and parent is None:
+                        parent = target  # nodeset written without ParentNodeId
+                    if not forward and target == parent and parent_reftype is None:
+                        parent_reftype = reftype
+                    fields[_reference_field(reftype, forward, target)] = "present"
+            else:
+                fields[tag] = _canonical_xml(child)
+        if parent_reftype is not None:
+            fields["ParentReference"] = parent_reftype
+        return NodeRecord(key, parent, fields)
+
+
+def _reference_field(reftype, forward, target):
+    return f"Reference {reftype} {'->' if forward else '<-'} {target}"
+
+
+def _canonical_xml(el):
+    """
+    element content as a string independent of namespace prefixes and indentation
+    """
+    if not len(el) and not el.attrib:
+        return (el.text or "").strip()
+    parts = [_local(el.tag)]
+    parts.extend(f"{_local(k)}={v}" for k, v in sorted(el.attrib.items()))
+    text = (el.text or "").strip()
+    if text:
+        parts.append(text)
+    parts.extend(_canonical_xml(child) for child in el)
+    return "<" + " ".join(parts) + ">"
+
+
+def _digest(parts):
+    return hashlib.sha1("\1".join(parts).encode("utf-8")).hexdigest()
+
+
+class ModelDiff:
+    """
+    Nodes added, removed and changed between two model snapshots.
+    Only subtrees whose hashes differ are compared node by node.
+    A node moved to another parent is reported as removed and added
+    """
+
+    def __init__(self, old, new):
+        self.old = old
+        self.new = new
+        self.added = []  # keys of nodes only in new
+        self.removed = []  # keys of nodes only in old
+        self.changed = {}  # key -> list of (field, old value, new value), None when node has no such field
+        self.compared = 0  # nodes compared field by field
+        self._compare()
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def _compare(self):
+        todo = [(self.old.roots, self.new.roots)]
+        while todo:
+            old_keys, new_keys = todo.pop()
+            old_set = set(old_keys)
+            new_set = set(new_keys)
+            for key in old_keys:
+                if key not in new_set:
+                    self.removed.extend(self.old.get_subtree(key))
+            for key in new_keys:
+                if key not in old_set:
+                    self.added.extend(self.new.get_subtree(key))
+                    continue
+                old_rec = self.old.records[key]
+                new_rec = self.new.records[key]
+                if old_rec.subtree_hash == new_rec.subtree_hash:
+                    continue
+                if old_rec.hash != new_rec.hash:
+                    self.compared += 1
+                    self.changed[key] = _compare_fields(old_rec.fields, new_rec.fields)
+                todo.append((self.old.children.get(key, []), self.new.children.get(key, [])))
+
+    def format(self):
+        lines = [f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed nodes"]
+        for title, keys, snapshot in (("Added", self.added, self.new), ("Removed", self.removed, self.old)):
+            for key in keys:
+                lines.append(f"{title} {snapshot.records[key].name} {key}")
+        for key, fields in self.changed.items():
+            lines.append(f"Changed {self.new.records[key].name} {key}")
+            for field, old, new in fields:
+                lines.append(f"    {field}: {format_value(old)} -> {format_value(new)}")
+        return "\n".join(lines)
+
+
+def format_value(value):
+    return "absent" if value is None else value
+
+
+def _compare_fields(old, new):
+    result = []
+    for field in sorted(set(old) | set(new)):
+        old_value = old.get(field)
+        new_value = new.get(field)
+        if old_value != new_value:
+            result.append((field, old_value, new_value))
+    return result
+
+
+def diff_files(old_path, new_path):
+    """
+    compare two NodeSet2 XML files, no server is needed
+    """
+    return ModelDiff(ModelSnapshot.from_xml(old_path), ModelSnapshot.from_xml(new_path))
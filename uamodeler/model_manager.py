@@ -1,22 +1,43 @@
+import hashlib
 import logging
 import os
+import tempfile
 import xml.etree.ElementTree as Et
 from collections import OrderedDict
+from threading import Thread
 
 
-from PyQt5.QtCore import pyqtSignal, QObject, QSettings
+from PyQt5.QtCore import pyqtSignal, QObject, QSettings, Qt
 
 from asyncua import ua
-from asyncua.sync import copy_node, new_node, instantiate, data_type_to_variant_type
+from asyncua.sync import new_node, data_type_to_variant_type
 from asyncua.common.structures import Struct, StructGenerator
 from asyncua.sync import DataTypeDictionaryBuilder
 
 from uawidgets.utils import trycatchslot
 
 from uamodeler.server_manager import ServerManager
+from uamodeler.subtree import SubtreeSnapshot
+from uamodeler.type_templates import TypeTemplateCache
+from uamodeler.validation import ModelValidator
+from uamodeler.reference_index import ReferenceIndex
+from uamodeler.search_index import SearchIndex
+from uamodeler.query import QueryIndex
+from uamodeler.namespace_remap import NamespaceRemapper, compact_mapping
+from uamodeler.binary_project import BinaryProject
+from uamodeler.model_diff import ModelDiff, ModelSnapshot
+from uamodeler.prewarm import Prewarmer, PrewarmedModel, read_ua_model, get_binary_nodeset_paths
+from uamodeler.bulk_import import read_table, guess_mapping, parse_rows, create_variables, DataTypeCatalog
+from uamodeler.bulk_edit import make_write_values, make_access_level_values, make_rename_values, make_modelling_rule_items
+from uamodeler.memory_report import MemoryReport, deep_sizeof, sample_sizeof
+from uamodeler.xml_export import ExportSnapshot, write_xml
+from uamodeler.save_job import SaveJob
+from uamodeler.python_export import write_python
 
 logger = logging.getLogger(__name__)
 
+ENDPOINT = "opc.tcp://0.0.0.0:48400/freeopcua/uamodeler/"
+
 
 class _Struct:
     def __init__(self, name, typename):
@@ -34,45 +55,177 @@ class ModelManager(QObject):
     error = pyqtSignal(Exception)
     titleChanged = pyqtSignal(str)
     modelChanged = pyqtSignal()
+    saved = pyqtSignal(str)  # path of model file, after a background save
+    _saveDone = pyqtSignal(object)  # SaveJob written by worker thread
 
     def __init__(self, modeler):
         QObject.__init__(self, modeler)
         self.modeler = modeler
         self.server_mgr = ServerManager(self.modeler.ui.actionUseOpenUa)
+        self.type_templates = TypeTemplateCache(self.server_mgr)
+        self.validator = ModelValidator(self.server_mgr)
+        self.ref_index = ReferenceIndex(self.server_mgr)
+        self.search_index = SearchIndex(self.server_mgr)
+        self.query_index = QueryIndex(self.server_mgr, self.type_templates)
+        self.prewarmer = Prewarmer()
         self.new_nodes = []  # the added nodes we will save
+        self._struct_models = {}  # digest of type dictionary -> parsed structs
+        self._shown_structs = {}  # struct nodeid -> fields of its design nodes
         self.current_path = None
+        self.binary_project = False  # current path is a binary model, see save_binary_model
         self.settings = QSettings()
-        self.modified = False
+        self._edits = 0  # count of edits, modified is True while it differs from count when last saved
+        self._saved_edits = 0
+        self._save_job = None  # SaveJob written in background
+        self._save_thread = None
+        self._saveDone.connect(self._save_done)
         self.modeler.attrs_ui.attr_written.connect(self._attr_written)
+        self.modeler.refs_ui.reference_changed.connect(self._reference_changed)
+        self.modeler.idx_ui.namespaces_changed.connect(self.validator.namespaces_changed)
+        self.modeler.idx_ui.remove_handler = self.remove_namespace
+        self.modeler.problems_ui.set_validator(self.validator)
+        self.modeler.nodesets_ui.nodesets_imported.connect(self._nodesets_changed)
+        self.modeler.nodesets_ui.nodeset_removed.connect(self._nodesets_changed)
 
     def delete_node(self, node, interactive=True):
         logger.warning("Deleting: %s", node)
         if node:
-            deleted_nodes = node.delete(delete_references=True, recursive=True)
-            for dn in deleted_nodes:
-                # make sure we remove ALL instances of node
-                self.new_nodes[:] = (node for node in self.new_nodes if node != dn)
+            self.type_templates.invalidate(node.nodeid)
+            deleted_nodes = self._delete_subtree(node)
+            self.type_templates.invalidate(*(dn.nodeid for dn in deleted_nodes))
+            # make sure we remove ALL instances of nodes
+            deleted = set(deleted_nodes)
+            self.new_nodes[:] = (node for node in self.new_nodes if node not in deleted)
+            self._remove_from_indexes(deleted_nodes)
             if interactive:
                 self.modeler.tree_ui.remove_current_item()
+            return deleted_nodes
+        return []
+
+    def delete_nodes(self, nodes):
+        """
+        delete nodes and their children, a node already deleted with one of its parents is skipped
+        return the deleted nodes
+        """
+        deleted_nodes = []
+        deleted = set()
+        for node in nodes:
+            if node not in deleted:
+                subtree = self.delete_node(node, False)
+                deleted.update(subtree)
+                deleted_nodes.extend(subtree)
+        return deleted_nodes
+
+    def _delete_subtree(self, node):
+        """
+        delete node and its children, return the deleted nodes
+        references to deleted nodes are removed using the references stored
+        in deleted nodes and the reference index, not by scanning the whole
+        address space as the DeleteTargetReferences flag of DeleteNodes does
+        """
+        nodeids = self.server_mgr.walk([node.nodeid])
+        deleted = set(nodeids)
+        to_delete = set()  # (source, reftype, target, forward)
+        for nodeid, refs in zip(nodeids, self.server_mgr.browse(nodeids, refs=ua.ObjectIds.References, direction=ua.BrowseDirection.Both)):
+            for ref in refs:
+                if ref.NodeId not in deleted:
+                    # opposite reference stored in other node
+                    to_delete.add((ref.NodeId, ref.ReferenceTypeId, nodeid, not ref.IsForward))
+            for source, reftype in self.ref_index.get_referrers(nodeid):
+                if reftype is not None and source not in deleted:
+                    to_delete.add((source, reftype, nodeid, True))
+        items = []
+        for source, reftype, target, forward in to_delete:
+            item = ua.DeleteReferencesItem()
+            item.SourceNodeId = source
+            item.ReferenceTypeId = reftype
+            item.TargetNodeId = target
+            item.IsForward = forward
+            item.DeleteBidirectional = False
+            items.append(item)
+        # references stored in only one direction return BadNotFound, this is fine
+        self.server_mgr.delete_references(items)
+        for res in self.server_mgr.delete_nodes(nodeids):
+            res.check()
+        deleted_nodes = [self.server_mgr.get_node(nodeid) for nodeid in nodeids]
+        sources = {source for source, _, _, _ in to_delete if source in self.ref_index}
+        self.ref_index.update([self.server_mgr.get_node(nodeid) for nodeid in sources])
+        return deleted_nodes
+
+    def _update_indexes(self, nodes):
+        """
+        index again added or modified nodes and check them
+        """
+        self.ref_index.update(nodes)
+        self.search_index.update(nodes)
+        self.query_index.update(nodes)
+        self.validator.update(nodes)
+
+    def _remove_from_indexes(self, nodes):
+        self.ref_index.remove(nodes)
+        self.search_index.remove(nodes)
+        self.query_index.remove(nodes)
+        self.validator.remove(nodes)
+
+    def query(self, query):
+        """
+        return the model nodes matching a Query
+        """
+        return [self.server_mgr.get_node(nodeid) for nodeid in self.query_index.run(query)]
+
+    def find_usages(self, node):
+        """
+        return the list of (node, reftype) of model nodes referencing node
+        reftype is None when node is the DataType of the referencing node
+        """
+        return [(self.server_mgr.get_node(source), reftype) for source, reftype in self.ref_index.get_referrers(node.nodeid)]
 
-    def paste_node(self, node):
+    def paste_node(self, node, count=1):
+        """
+        copy node and its children count times under current node
+        the source subtree is only read once
+        """
         parent = self.modeler.get_current_node()
         try:
-            added_nodes = copy_node(parent, node)
+            snapshot = SubtreeSnapshot(self.server_mgr, node)
+            added_nodes = snapshot.paste(parent, count)
         except Exception as ex:
             self.modeler.show_error(ex)
             raise
+        self.type_templates.invalidate(parent.nodeid)
+        if parent.nodeid in self.ref_index:
+            self.ref_index.update([parent])
         self.new_nodes.extend(added_nodes)
+        self._update_indexes(added_nodes)
         self.modeler.tree_ui.reload_current()
         self.modeler.show_refs()
         self.modified = True
 
+    @property
+    def modified(self):
+        return self._edits != self._saved_edits
+
+    @modified.setter
+    def modified(self, val):
+        if val:
+            self._edits += 1
+        else:
+            self._saved_edits = self._edits
+
     def close_model(self, force=False):
+        self.wait_saved()
         if not force and self.modified:
             raise RuntimeError("Model is modified, use force to close it")
         self.modeler.actions.disable_all_actions()
+        self.type_templates.clear()
+        self.validator.clear()
+        self.ref_index.clear()
+        self.search_index.clear()
+        self.query_index.clear()
+        self._shown_structs.clear()
         self.server_mgr.stop_server()
         self.current_path = None
+        self.binary_project = False
         self.modified = False
         self.titleChanged.emit("")
         self.modeler.clear_all_widgets()
@@ -82,10 +235,10 @@ class ModelManager(QObject):
             raise RuntimeError("Model is modified, cannot create new model")
         del (self.new_nodes[:])  # empty list while keeping reference
 
-        endpoint = "opc.tcp://0.0.0.0:48400/freeopcua/uamodeler/"
-        logger.info("Starting server on %s", endpoint)
-        self.server_mgr.start_server(endpoint)
+        logger.info("Starting server on %s", ENDPOINT)
+        self.server_mgr.start_server(ENDPOINT)
         self.server_mgr.add_default_namespace()
+        self.search_index.build()
 
         self.modeler.tree_ui.set_root_node(self.server_mgr.nodes.root)
         self.modeler.idx_ui.set_node(self.server_mgr.get_node(ua.ObjectIds.Server_NamespaceArray))
@@ -93,28 +246,51 @@ class ModelManager(QObject):
         self.modified = False
         self.modeler.actions.enable_model_actions()
         self.current_path = None
+        self.binary_project = False
         self.titleChanged.emit("No Name")
         return True
 
-    def import_xml(self, path):
-        new_nodes = self.server_mgr.import_xml(path)
-        self.new_nodes.extend([self.server_mgr.get_node(node) for node in new_nodes])
+    def prewarm(self, path):
+        """
+        start the server and read the files of model at path in background threads,
+        opening that model then only has to add the nodes to the server
+        """
+        self.server_mgr.prewarm(ENDPOINT)
+        self.prewarmer.start(path)
+
+    def discard_prewarmed(self):
+        self.prewarmer.take(None)
+        self.server_mgr.discard_prewarmed()
+
+    def import_xml(self, path, nodeset=None):
+        """
+        import XML file at path, nodeset is the ParsedNodeSet of path if it was already parsed
+        """
+        with self.server_mgr.background():
+            if nodeset is None:
+                nodeids = self.server_mgr.import_xml(path)
+            else:
+                nodeids = self.server_mgr.import_parsed_nodeset(nodeset)
+            new_nodes = [self.server_mgr.get_node(node) for node in nodeids]
+            self.type_templates.clear()
+            self.new_nodes.extend(new_nodes)
+            self._update_indexes(new_nodes)
         self.modified = True
         # we maybe should only reload the imported nodes
         self.modeler.tree_ui.reload()
         self.modeler.idx_ui.reload()
         return path
 
-    def open_xml(self, path):
+    def open_xml(self, path, prewarmed=None):
         self.new_model()
         try:
-            self._open_xml(path)
+            self._open_xml(path, prewarmed or PrewarmedModel(path))
         except:
             self.close_model(force=True)
             raise
 
-    def _open_xml(self, path):
-        path = self.import_xml(path)
+    def _open_xml(self, path, prewarmed):
+        path = self.import_xml(path, prewarmed.nodesets.get(path))
         self.server_mgr.load_enums()
         self.server_mgr.load_type_definitions()
         self._show_structs()
@@ -126,6 +302,7 @@ class ModelManager(QObject):
         base_struct = self.server_mgr.get_node(ua.ObjectIds.Structure)
         opc_binary = self.server_mgr.get_node(ua.ObjectIds.OPCBinarySchema_TypeSystem)
         opc_schema = self.server_mgr.get_node(ua.ObjectIds.OpcUa_BinarySchema)
+        dtypes = {}  # datatype lookups are expensive, share them between structs
         for node in opc_binary.get_children():
             if node == opc_schema:
                 continue  # This is standard namespace structures
@@ -137,37 +314,60 @@ class ModelManager(QObject):
                 idx = 1
             xml = node.read_value()
             if not xml:
-                return
+                continue
+            for el in self._parse_struct_dict(xml):
+                self._add_design_node(base_struct, idx, el, dtypes)
 
-            xml = xml.decode("utf-8")
+    def _parse_struct_dict(self, xml):
+        """
+        return structs defined in a type dictionary
+        parsing is skipped if the dictionary has already been seen
+        """
+        digest = hashlib.sha1(xml).hexdigest()
+        structs = self._struct_models.get(digest)
+        if structs is None:
             generator = StructGenerator()
-            generator.make_model_from_string(xml)
-            for el in generator.model:
-                # we only care about structs, ignoring enums
-                if isinstance(el, Struct):
-                    self._add_design_node(base_struct, idx, el)
+            generator.make_model_from_string(xml.decode("utf-8"))
+            # we only care about structs, ignoring enums
+            structs = [el for el in generator.model if isinstance(el, Struct)]
+            self._struct_models[digest] = structs
+        else:
+            logger.debug("Type dictionary %s unchanged, not parsing it", digest)
+        return structs
 
-    def _add_design_node(self, base_struct, idx, el):
+    def _add_design_node(self, base_struct, idx, el, dtypes=None):
+        if dtypes is None:
+            dtypes = {}
         try:
             struct_node = base_struct.get_child(f"{idx}:{el.name}")
         except ua.UaError:
             logger.warning("Could not find struct %s under %s", el.name, base_struct)
             return
+        definition = [(field.name, field.uatype, field.array) for field in el.fields]
+        if self._shown_structs.get(struct_node.nodeid) == definition:
+            return  # design nodes are up to date
+        for child in struct_node.get_children(refs=ua.ObjectIds.HasComponent):
+            self.delete_node(child, False)
+        self._shown_structs.pop(struct_node.nodeid, None)
+        self.validator.clear_reported(struct_node.nodeid)
         for field in el.fields:
-            if hasattr(ua.ObjectIds, field.uatype):
-                dtype = self.server_mgr.get_node(getattr(ua.ObjectIds, field.uatype))
-            else:
-                dtype = self._get_datatype_from_string(idx, field.uatype)
-                if not dtype:
-                    logger.warning("Could not find datatype of name %s %s", field.uatype, type(field.uatype))
-                    return
+            if (idx, field.uatype) not in dtypes:
+                if hasattr(ua.ObjectIds, field.uatype):
+                    dtypes[(idx, field.uatype)] = self.server_mgr.get_node(getattr(ua.ObjectIds, field.uatype))
+                else:
+                    dtypes[(idx, field.uatype)] = self._get_datatype_from_string(idx, field.uatype)
+            dtype = dtypes[(idx, field.uatype)]
+            if not dtype:
+                logger.warning("Could not find datatype of name %s %s", field.uatype, type(field.uatype))
+                self.validator.report(struct_node.nodeid, f"Struct field {field.name} has unknown type {field.uatype}")
+                return
             vtype = data_type_to_variant_type(dtype)
             val = ua.get_default_value(vtype)
             node = struct_node.add_variable(idx, field.name, val, varianttype=vtype, datatype=dtype.nodeid)
             if field.array:
                 node.write_value_rank(ua.ValueRank.OneDimension)
                 node.set_array_dimensions([1])
-
+        self._shown_structs[struct_node.nodeid] = definition
 
     def _get_datatype_from_string(self, idx, name):
         #FIXME: this is very heavy and missing recusion, what is the correct way to do that?
@@ -180,31 +380,55 @@ class ModelManager(QObject):
         return None
 
     def open(self, path):
+        prewarmed = self.prewarmer.take(path)
         if path.endswith(".xml"):
-            self.open_xml(path)
+            self.open_xml(path, prewarmed)
+        elif path.endswith(".uamodelb"):
+            self.open_binary_model(path, prewarmed)
         else:
-            self.open_ua_model(path)
+            self.open_ua_model(path, prewarmed)
+
+    def open_binary_model(self, path, prewarmed=None):
+        self.new_model()
+        try:
+            self._open_binary_model(path, prewarmed or PrewarmedModel(path))
+        except:
+            self.close_model(force=True)
+            raise
+
+    def _open_binary_model(self, path, prewarmed):
+        project = prewarmed.project or BinaryProject.read(path)
+        refpaths = get_binary_nodeset_paths(path, project)
+        self.modeler.nodesets_ui.import_nodesets(refpaths, prewarmed.nodesets)
+        new_nodes = [self.server_mgr.get_node(nodeid) for nodeid in project.apply(self.server_mgr)]
+        self.type_templates.clear()
+        self.new_nodes.extend(new_nodes)
+        self._update_indexes(new_nodes)
+        self.modeler.tree_ui.reload()
+        self.modeler.idx_ui.reload()
+        self.server_mgr.load_enums()
+        self.server_mgr.load_type_definitions()
+        self._show_structs()
+        self.modified = False
+        self.binary_project = True
+        self.current_path = path
+        self.titleChanged.emit(self.current_path)
+        if project.current_node is not None:
+            self.modeler.tree_ui.expand_to_node(self.server_mgr.get_node(project.current_node))
 
-    def open_ua_model(self, path):
+    def open_ua_model(self, path, prewarmed=None):
         self.new_model()
         try:
-            self._open_ua_model(path)
+            self._open_ua_model(path, prewarmed or PrewarmedModel(path))
         except:
             self.close_model(force=True)
             raise
 
-    def _open_ua_model(self, path):
-        tree = Et.parse(path)
-        root = tree.getroot()
-        for ref_el in root.findall("Reference"):
-            refpath = ref_el.attrib['path']
-            self.modeler.nodesets_ui.import_nodeset(refpath)
-        mod_el = root.find("Model")
-        dirname = os.path.dirname(path)
-        xmlpath = os.path.join(dirname, mod_el.attrib['path'])
-        self._open_xml(xmlpath)
-        if "current_node" in mod_el.attrib:
-            current_node_str = mod_el.attrib['current_node']
+    def _open_ua_model(self, path, prewarmed):
+        refpaths, xmlpath, current_node_str = read_ua_model(path)
+        self.modeler.nodesets_ui.import_nodesets(refpaths, prewarmed.nodesets)
+        self._open_xml(xmlpath, prewarmed)
+        if current_node_str is not None:
             nodeid = ua.NodeId.from_string(current_node_str)
             current_node = self.server_mgr.get_node(nodeid)
             self.modeler.tree_ui.expand_to_node(current_node)
@@ -218,22 +442,179 @@ class ModelManager(QObject):
         self.titleChanged.emit(self.current_path)
         return self.current_path
 
+    def save(self, path=None, binary=None, background=False):
+        """
+        save model to path, or to current path, as a binary model, or as NodeSet2 XML
+        with a .uamodel file, binary defaults to the format of current path.
+        A snapshot of the model is taken at once. With background, it is written in
+        a worker thread while the model can be edited, saved is emitted when done.
+        Return the path of the model file
+        """
+        if binary is None:
+            binary = self.binary_project
+        path = self._get_path(path)
+        if binary:
+            job = SaveJob(path + ".uamodelb", self._edits, binary=True)
+            self._add_binary_model_writer(job, job.path)
+        else:
+            job = SaveJob(path + ".uamodel", self._edits, binary=False)
+            self._add_xml_writer(job, path + ".xml")
+            self._add_ua_model_writer(job, path)
+        if background:
+            self._start_save(job)
+        else:
+            job.write()
+            self._finish_save(job)
+        return job.path
+
+    def _start_save(self, job):
+        self.wait_saved()  # files of a previous save must not be written after ours
+        self._save_job = job
+        self._save_thread = Thread(target=self._write_job, args=(job,), daemon=True)
+        self._save_thread.start()
+
+    def _write_job(self, job):
+        try:
+            job.write()
+        except Exception as ex:
+            logger.exception("Saving %s failed", job.path)
+            job.error = ex
+        self._saveDone.emit(job)
+
+    def _save_done(self, job):
+        if job is not self._save_job:
+            return  # already finished by wait_saved
+        self._save_thread.join()
+        self._save_thread = None
+        self._save_job = None
+        self._finish_save(job)
+
+    def _finish_save(self, job):
+        if job.error is not None:
+            self.error.emit(job.error)
+            return
+        # edits made during a background save keep the model modified
+        self._saved_edits = job.edits
+        self.binary_project = job.binary
+        self.saved.emit(job.path)
+
+    def wait_saved(self):
+        """
+        wait for the end of a background save
+        """
+        if self._save_job is not None:
+            self._save_thread.join()
+            self._save_done(self._save_job)
+
     def save_xml(self, path=None):
+        path = self._get_path(path) + ".xml"
+        job = SaveJob(path, self._edits, binary=False)
+        self._add_xml_writer(job, path)
+        job.write()
+        self._finish_save(job)
+
+    def export_xml(self, path):
+        """
+        write model to a NodeSet2 XML file, without changing current path of model
+        """
+        job = SaveJob(path, self._edits, binary=False)
+        self._add_xml_writer(job, path)
+        job.write()
+
+    def _add_xml_writer(self, job, path):
+        """
+        read nodes of model from server and add the writer of NodeSet2 XML file path to job
+        """
         self._save_structs()
-        path = self._get_path(path)
-        path += ".xml"
-        logger.info("Saving nodes to %s", path)
-        logger.info("Exporting  %s nodes: %s", len(self.new_nodes), self.new_nodes)
-        logger.info("and namespaces: %s ", self.server_mgr.get_namespace_array()[1:])
-        uris = self.server_mgr.get_namespace_array()[1:]
-        self.new_nodes = list(OrderedDict.fromkeys(self.new_nodes))  # remove any potential duplicate
-        self.server_mgr.export_xml(self.new_nodes, uris, path)
-        self.modified = False
-        logger.info("%s saved", path)
-        self._show_structs()  #_save_structs has delete our design nodes for structure, we need to recreate them
+        try:
+            uris = self.server_mgr.get_namespace_array()[1:]
+            self.new_nodes = list(OrderedDict.fromkeys(self.new_nodes))  # remove any potential duplicate
+            logger.info("Saving %s nodes and namespaces %s to %s", len(self.new_nodes), uris, path)
+            nodeids = [node.nodeid for node in self.new_nodes]
+            with self.server_mgr.background():
+                snapshot = ExportSnapshot.from_server(self.server_mgr, nodeids)
+        finally:
+            self._show_structs()  # _save_structs has deleted our design nodes for structures, we need to recreate them
+        job.add_writer(path, lambda tmp_path: write_xml(snapshot, nodeids, uris, tmp_path))
+
+    def export_selection(self, nodes, path):
+        """
+        write nodes, their children and the model types they use, found with
+        the reference index, to a NodeSet2 XML file
+        """
+        self._save_structs()
+        try:
+            hierarchical = set(self.server_mgr.walk([ua.NodeId(ua.ObjectIds.HierarchicalReferences)], refs=ua.ObjectIds.HasSubtype))
+            selected = self.ref_index.collect([node.nodeid for node in nodes], hierarchical)
+            if not selected:
+                raise ValueError(f"{', '.join(str(node) for node in nodes)} not part of the model, nothing to export")
+            to_export = [node for node in OrderedDict.fromkeys(self.new_nodes) if node.nodeid in selected]
+            logger.info("Exporting %s of %s model nodes to %s", len(to_export), len(self.new_nodes), path)
+            with self.server_mgr.background():
+                self.server_mgr.export_xml(to_export, [], path)
+        finally:
+            self._show_structs()
+        return to_export
+
+    def compare_with(self, path):
+        """
+        compare the NodeSet2 XML file at path, an older revision of the model
+        for example, to the current model. Return a ModelDiff
+        """
+        fd, tmp_path = tempfile.mkstemp(suffix=".xml")
+        os.close(fd)
+        try:
+            self.export_xml(tmp_path)
+            return ModelDiff(ModelSnapshot.from_xml(path), ModelSnapshot.from_xml(tmp_path))
+        finally:
+            os.remove(tmp_path)
+
+    def save_binary_model(self, path=None):
+        """
+        save model, with its reference nodesets, to one binary file
+        """
+        return self.save(path, binary=True)
+
+    def export_python(self, path):
+        """
+        write model to a Python module building it in an asyncua server with batched
+        AddNodes requests, see python_export. Current path of model is not changed
+        """
+        self._save_structs()
+        try:
+            self.new_nodes = list(OrderedDict.fromkeys(self.new_nodes))  # remove any potential duplicate
+            logger.info("Exporting %s nodes to Python module %s", len(self.new_nodes), path)
+            with self.server_mgr.background():
+                project = BinaryProject.from_server(self.server_mgr, [node.nodeid for node in self.new_nodes])
+        finally:
+            self._show_structs()
+        job = SaveJob(path, self._edits, binary=False)
+        job.add_writer(path, lambda tmp_path: write_python(project, tmp_path))
+        job.write()
+
+    def _add_binary_model_writer(self, job, path):
+        self._save_structs()
+        try:
+            logger.info("Saving binary model to %s", path)
+            self.new_nodes = list(OrderedDict.fromkeys(self.new_nodes))  # remove any potential duplicate
+            with self.server_mgr.background():
+                project = BinaryProject.from_server(self.server_mgr, [node.nodeid for node in self.new_nodes])
+        finally:
+            self._show_structs()
+        project.nodesets = list(self.modeler.nodesets_ui.nodesets)
+        c_node = self.modeler.tree_ui.get_current_node()
+        if c_node:
+            project.current_node = c_node.nodeid
+        job.add_writer(path, project.write)
 
     def save_ua_model(self, path=None):
         path = self._get_path(path)
+        job = SaveJob(path + ".uamodel", self._edits, binary=False)
+        self._add_ua_model_writer(job, path)
+        job.write()
+        return job.path
+
+    def _add_ua_model_writer(self, job, path):
         model_path = path + ".uamodel"
         logger.info("Saving model to %s", model_path)
         etree = Et.ElementTree(Et.Element('UAModel'))
@@ -245,17 +626,22 @@ class ModelManager(QObject):
         for refpath in self.modeler.nodesets_ui.nodesets:
             node_el = Et.SubElement(etree.getroot(), "Reference")
             node_el.attrib["path"] = refpath
-        etree.write(model_path, encoding='utf-8', xml_declaration=True)
-        return model_path
-
-    def _after_add(self, new_nodes):
+        job.add_writer(model_path, lambda tmp_path: etree.write(tmp_path, encoding='utf-8', xml_declaration=True))
+
+    def _after_add(self, new_nodes, parent=None):
+        if parent is None:
+            parent = self.modeler.tree_ui.get_current_node()
+        self.type_templates.invalidate(parent.nodeid)
+        if parent.nodeid in self.ref_index:
+            self.ref_index.update([parent])
         if isinstance(new_nodes, (list, tuple)):
-            for node in new_nodes:
-                if node not in self.new_nodes:
-                    self.new_nodes.append(node)
+            existing = set(self.new_nodes)
+            self.new_nodes.extend(node for node in new_nodes if node not in existing)
+            self._update_indexes(new_nodes)
         else:
             if new_nodes not in self.new_nodes:
                 self.new_nodes.append(new_nodes)
+            self._update_indexes([new_nodes])
         self.modeler.tree_ui.reload_current()
         self.modeler.show_refs()
         self.modified = True
@@ -288,10 +674,42 @@ class ModelManager(QObject):
         parent = self.modeler.tree_ui.get_current_node()
         logger.info("Creating object with args: %s", args)
         nodeid, bname, otype = args
-        new_nodes = instantiate(parent, otype, bname=bname, nodeid=nodeid, dname=ua.LocalizedText(bname.Name))
+        template = self.type_templates.get(otype)
+        new_nodes = template.instantiate(parent, [(nodeid, bname, ua.LocalizedText(bname.Name))])
         self._after_add(new_nodes)
         return new_nodes
 
+    def instantiate_many(self, parent, otype, names, idx=1):
+        """
+        create one instance of otype under parent for each name, using batched requests
+        return the list of added nodes
+        """
+        logger.info("Creating %s instances of %s under %s", len(names), otype, parent)
+        roots = []
+        for name in names:
+            if not isinstance(name, ua.QualifiedName):
+                name = ua.QualifiedName(name, idx)
+            roots.append((ua.NodeId(NamespaceIndex=idx), name, ua.LocalizedText(name.Name)))
+        new_nodes = self.type_templates.get(otype).instantiate(parent, roots)
+        self._after_add(new_nodes, parent)
+        return new_nodes
+
+    def bulk_create(self, parent, path, mapping=None, idx=1):
+        """
+        create variables and properties under parent from the rows of a CSV or Excel file.
+        mapping is a dict attribute -> column index, guessed from the column headers by default.
+        All rows are validated against the DataTypes of server before anything is created
+        """
+        headers, rows = read_table(path)
+        if mapping is None:
+            mapping = guess_mapping(headers)
+        existing = {desc.BrowseName.Name for desc in self.server_mgr.browse([parent.nodeid])[0]}
+        specs = parse_rows(rows, mapping, DataTypeCatalog(self.server_mgr), existing)
+        logger.info("Creating %s variables from %s under %s", len(specs), path, parent)
+        new_nodes = [self.server_mgr.get_node(nodeid) for nodeid in create_variables(self.server_mgr, parent.nodeid, specs, idx)]
+        self._after_add(new_nodes, parent)
+        return new_nodes
+
     def add_data_type(self, *args):
         parent = self.modeler.tree_ui.get_current_node()
         logger.info("Creating data type with args: %s", args)
@@ -321,14 +739,192 @@ class ModelManager(QObject):
         self._after_add(new_node)
         return new_node
 
+    def write_attribute(self, nodes, attr, variant):
+        """
+        write the same value to attribute attr of all nodes with one batched Write
+        """
+        logger.info("Writing %s of %s nodes", attr.name, len(nodes))
+        self._write(nodes, make_write_values([node.nodeid for node in nodes], attr, variant),
+                    attr in (ua.AttributeIds.BrowseName, ua.AttributeIds.DisplayName))
+
+    def set_access_level(self, nodes, level):
+        """
+        set AccessLevel and UserAccessLevel of the variables of nodes, other nodes are skipped
+        """
+        logger.info("Setting access level %s of %s nodes", level, len(nodes))
+        self._write(nodes, make_access_level_values(self.server_mgr, [node.nodeid for node in nodes], level))
+
+    def rename(self, nodes, pattern, repl):
+        """
+        replace regular expression pattern with repl in BrowseName and DisplayName of nodes
+        """
+        logger.info("Renaming %s nodes, replacing %s with %s", len(nodes), pattern, repl)
+        self._write(nodes, make_rename_values(self.server_mgr, [node.nodeid for node in nodes], pattern, repl), True)
+
+    def set_modelling_rule(self, nodes, rule):
+        """
+        set the modelling rule of all nodes to rule nodeid, remove it if rule is None
+        """
+        logger.info("Setting modelling rule %s of %s nodes", rule, len(nodes))
+        to_add, to_delete = make_modelling_rule_items(self.server_mgr, [node.nodeid for node in nodes], rule)
+        results = list(self.server_mgr.delete_references(to_delete))
+        results.extend(self.server_mgr.add_references(to_add))
+        self._after_edit(nodes)
+        for res in results:
+            res.check()
+
+    def _write(self, nodes, wvs, names_changed=False):
+        results = self.server_mgr.write(wvs)
+        self._after_edit(nodes, names_changed)
+        # nodes written before a failure are shown as they are now before raising
+        for res in results:
+            res.check()
+
+    def _after_edit(self, nodes, names_changed=False):
+        """
+        one update of caches, indexes and widgets after editing many nodes
+        """
+        nodeids = [node.nodeid for node in nodes]
+        self.type_templates.invalidate(*nodeids)
+        self._update_indexes(nodes)
+        if names_changed:
+            self.modeler.update_tree_names(nodeids)
+            self.modeler.refs_ui.clear_cache()
+        self.modeler.show_attrs()
+        self.modeler.show_refs()
+        self.modified = True
+
     @trycatchslot
     def _attr_written(self, attr, dv):
         self.modified = True
+        if self.modeler.attrs_ui.current_node is not None:
+            self.type_templates.invalidate(self.modeler.attrs_ui.current_node.nodeid)
+            self._update_indexes([self.modeler.attrs_ui.current_node])
+        if attr == ua.AttributeIds.DisplayName:
+            self.modeler.refs_ui.clear_cache()
         if attr == ua.AttributeIds.BrowseName:
             self.modeler.tree_ui.update_browse_name_current_item(dv.Value.Value)
         elif attr == ua.AttributeIds.DisplayName:
             self.modeler.tree_ui.update_display_name_current_item(dv.Value.Value)
 
+    @trycatchslot
+    def _reference_changed(self, node):
+        # adding a modelling rule makes node an instance declaration of its parents
+        self.type_templates.invalidate(node.nodeid)
+        self._update_indexes([node])
+
+    @trycatchslot
+    def _nodesets_changed(self, paths):
+        self.search_index.build()
+
+    def search(self, text, new_nodes_only=False, limit=None):
+        """
+        return the nodes whose names, description or nodeid match all words of text
+        """
+        nodeids = [node.nodeid for node in self.new_nodes] if new_nodes_only else None
+        return [self.server_mgr.get_node(nodeid) for nodeid in self.search_index.search(text, nodeids, limit)]
+
+    def remove_namespace(self, uri):
+        """
+        remove uri from namespace array, nodes in namespaces after it are
+        moved to the previous index so the array stays compact
+        """
+        uris = self.server_mgr.get_namespace_array()
+        idx = uris.index(uri)
+        if idx == 0:
+            raise ValueError("Cannot remove OPC UA namespace")
+        self._remap_namespaces(compact_mapping(len(uris), idx), removed=idx)
+        del uris[idx]
+        self._write_namespace_array(uris)
+
+    def merge_namespaces(self, uri, target_uri):
+        """
+        move all nodes of namespace uri to namespace target_uri and remove uri
+        """
+        uris = self.server_mgr.get_namespace_array()
+        idx = uris.index(uri)
+        target = uris.index(target_uri)
+        mapping = compact_mapping(len(uris), idx)
+        mapping[idx] = mapping.get(target, target)
+        self._remap_namespaces(mapping)
+        del uris[idx]
+        self._write_namespace_array(uris)
+
+    def _remap_namespaces(self, mapping, removed=None):
+        new_ids = NamespaceRemapper(self.server_mgr).remap(mapping, removed)
+        if not new_ids:
+            return
+        self._remove_from_indexes(self.new_nodes)
+        self.new_nodes[:] = [self.server_mgr.get_node(new_ids.get(node.nodeid, node.nodeid)) for node in self.new_nodes]
+        self.type_templates.clear()
+        self._shown_structs.clear()
+        self.search_index.build()
+        self._update_indexes(self.new_nodes)
+        self.modified = True
+        self.modeler.tree_ui.reload()
+
+    def _write_namespace_array(self, uris):
+        logger.info("Writting namespace array: %s", uris)
+        self.server_mgr.get_node(ua.ObjectIds.Server_NamespaceArray).write_value(uris)
+        self.modified = True
+        self.validator.namespaces_changed()
+
+    def memory_report(self):
+        """
+        return a MemoryReport of the memory used by server address space,
+        Qt item models and bookkeeping of ModelManager
+        """
+        report = MemoryReport()
+        stop = (self.server_mgr, self.modeler)
+        aspace = self.server_mgr.get_address_space()
+        if aspace is None:
+            report.add("Server address space", None, note="address space is not accessible from Python with this server backend")
+        else:
+            datas = list(aspace.values())
+            report.add("Server address space", int(sample_sizeof(datas, len(datas))), len(datas))
+            design = [child for nodeid in self._shown_structs for child in self._get_design_nodeids(aspace, nodeid)]
+            size = deep_sizeof([aspace[nodeid] for nodeid in design]) + deep_sizeof(self._shown_structs, stop=stop)
+            report.add("Struct design nodes", size, len(design), note="included in server address space, recreated when a struct is edited")
+        for name, model in (("Tree model", self.modeler.tree_ui.model),
+                            ("Attributes and references models", self.modeler.attrs_ui.model)):
+            count, objs = _get_item_data(model)
+            row = report.get_row(name) or report.add(name, 0, 0, note="Python data of items only, items are allocated by Qt in C++")
+            row.size += deep_sizeof(objs, stop=stop)
+            row.count += count
+        refs = self.modeler.refs_ui.model.get_refs()
+        row = report.get_row("Attributes and references models")
+        row.size += deep_sizeof(refs, stop=stop)
+        row.count += len(refs)
+        size = deep_sizeof(self.new_nodes, stop=stop)
+        nodeids_size = deep_sizeof([node.nodeid for node in self.new_nodes])
+        report.add("New nodes", size, len(self.new_nodes), size - nodeids_size, note="keeping NodeIds instead of Node objects")
+        for name, obj in (("Reference index", self.ref_index),
+                          ("Search index", self.search_index),
+                          ("Query index", self.query_index),
+                          ("Validator", self.validator)):
+            report.add(name, deep_sizeof(obj, stop=stop))
+        for name, obj in (("Type template cache", self.type_templates),
+                          ("Struct model cache", self._struct_models)):
+            size = deep_sizeof(obj, stop=stop)
+            report.add(name, size, saving=size, note="cache, rebuilt on demand")
+        report.add("Undo state", 0, note="the modeler keeps no undo history")
+        return report
+
+    def _get_design_nodeids(self, aspace, nodeid):
+        data = aspace.get(nodeid)
+        if data is None:
+            return []
+        return [ref.NodeId for ref in data.references
+                if ref.IsForward and ref.ReferenceTypeId == ua.NodeId(ua.ObjectIds.HasComponent) and ref.NodeId in aspace]
+
+    def validate(self):
+        """
+        check all nodes of model again, and return the problems found
+        """
+        with self.server_mgr.background():
+            self.validator.validate(self.new_nodes)
+        return self.validator.get_problems()
+
     def _create_type_dict_node(self, idx, urn, name):
         node_id = None
         # first delete current dict node and its children
@@ -366,6 +962,7 @@ class ModelManager(QObject):
                     dict_builder = self._create_type_dict_node(idx, urn, dict_name)
                     dict_node = self.server_mgr.get_node(dict_builder.dict_id)
                 have_structs = True
+                self._shown_structs.pop(node.nodeid, None)  # design nodes are deleted below
                 bname = node.read_browse_name()
                 try:
                     dict_node.get_child(f"{idx}:{bname.Name}")
@@ -399,3 +996,24 @@ class ModelManager(QObject):
         for node in to_delete:
             self.delete_node(node, False)
 
+
+def _get_item_data(model):
+    """
+    number of items of a QStandardItemModel, children included,
+    and the Python objects stored in them
+    """
+    count = 0
+    objs = []
+    items = [model.invisibleRootItem()]
+    while items:
+        item = items.pop()
+        for row in range(item.rowCount()):
+            for col in range(item.columnCount()):
+                child = item.child(row, col)
+                if child is not None:
+                    count += 1
+                    data = child.data(Qt.UserRole)
+                    if data is not None:
+                        objs.append(data)
+                    items.append(child)
+    return count, objs
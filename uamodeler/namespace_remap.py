@@ -0,0 +1,252 @@
+import copy
+import dataclasses
+import logging
+
+from asyncua import ua
+
+from uamodeler.subtree import read_node_records, group_by_depth
+
+logger = logging.getLogger(__name__)
+
+
+def compact_mapping(size, removed):
+    """
+    mapping of namespace indexes when index removed is removed from an array of size elements
+    """
+    return {idx: idx - 1 for idx in range(removed + 1, size)}
+
+
+def map_nodeid(nodeid, mapping):
+    if nodeid is None or nodeid.NamespaceIndex not in mapping:
+        return nodeid
+    return dataclasses.replace(nodeid, NamespaceIndex=mapping[nodeid.NamespaceIndex])
+
+
+def map_value(val, mapping):
+    """
+    return val with NodeIds and QualifiedNames, also inside lists and structures, remapped
+    """
+    if isinstance(val, ua.NodeId):
+        return map_nodeid(val, mapping)
+    if isinstance(val, ua.QualifiedName):
+        if val.NamespaceIndex in mapping:
+            return ua.QualifiedName(val.Name, mapping[val.NamespaceIndex])
+        return val
+    if isinstance(val, ua.Variant):
+        new = map_value(val.Value, mapping)
+        if new is val.Value:
+            return val
+        return ua.Variant(new, val.VariantType, val.Dimensions, val.is_array)
+    if isinstance(val, list):
+        new = [map_value(v, mapping) for v in val]
+        if all(a is b for a, b in zip(new, val)):
+            return val
+        return new
+    if dataclasses.is_dataclass(val) and not isinstance(val, type):
+        changes = {}
+        for field in dataclasses.fields(val):
+            old = getattr(val, field.name)
+            new = map_value(old, mapping)
+            if new is not old:
+                changes[field.name] = new
+        if changes:
+            val = dataclasses.replace(val, **changes)
+        return val
+    return val
+
+
+def uses_namespaces(val, namespaces):
+    """
+    return True if val holds a NodeId or QualifiedName with an index in namespaces
+    """
+    # map_value returns a new object when it finds an index of the mapping
+    return map_value(val, {idx: idx for idx in namespaces}) is not val
+
+
+class NamespaceRemapper:
+    """
+    Change the namespace indexes of all nodes in a set of namespaces in one pass:
+    NodeIds, BrowseNames, DataType and NodeIds inside values and references.
+    NodeIds cannot be modified in OPC UA, so nodes are read with batched
+    requests, deleted and added again with their new NodeIds. References
+    stored in other nodes are rewritten too, and so are the BrowseName,
+    DataType, Value and references of nodes of other namespaces which use
+    one of the remapped indexes
+    """
+
+    def __init__(self, server_mgr):
+        self.server_mgr = server_mgr
+        self.records = {}
+        self.levels = []
+
+    def remap(self, mapping, removed=None):
+        """
+        change namespace index of nodes as in mapping, a dict old index -> new index
+        if removed is given, fail if a node still uses that namespace index
+        return a dict old nodeid -> new nodeid of remapped nodes and of rewritten
+        nodes, which keep their nodeid
+        """
+        mapping = {old: new for old, new in mapping.items() if old != new}
+        if not mapping and removed is None:
+            return {}
+        nodeids = []
+        others = []
+        for nodeid in self._collect():
+            if nodeid.NamespaceIndex == removed:
+                raise RuntimeError(f"Namespace {removed} is still used, for example by node {nodeid.to_string()}")
+            if nodeid.NamespaceIndex in mapping:
+                nodeids.append(nodeid)
+            else:
+                others.append(nodeid)
+        new_ids = {nodeid: map_nodeid(nodeid, mapping) for nodeid in nodeids}
+        self._check_collisions(new_ids)
+        refs, outside = self._read(nodeids) if nodeids else ([], [])
+        writes, user_refs = self._find_users(others, mapping, removed, outside)
+        if not nodeids and not writes and not user_refs:
+            return {}
+        logger.info("Remapping %s nodes and rewriting %s values and %s references with namespace mapping %s",
+                    len(nodeids), len(writes), len(user_refs), mapping)
+        # references are stored in each node, only the side stored in the node using the namespace is
+        # replaced, it is deleted while remapped nodes still exist, as servers check both ends
+        self.server_mgr.delete_references([_make_delete_ref_item(*ref) for ref in user_refs])
+        if nodeids:
+            existing = self._delete(nodeids, outside)
+            self._add(new_ids, mapping)
+            self._add_references(refs, [ref for ref, status in zip(outside, existing) if status.is_good()], mapping)
+        self._rewrite_users(writes, user_refs, mapping)
+        for nodeid in [wv.NodeId for wv in writes] + [ref[0] for ref in user_refs]:
+            new_ids.setdefault(nodeid, nodeid)
+        return new_ids
+
+    def _collect(self):
+        """
+        return nodeids of all nodes: nodes of the hierarchy and nodes only
+        reached through non hierarchical references, the encodings of a struct for example
+        """
+        seen = set()
+        result = []
+        level = self.server_mgr.walk([ua.NodeId(ua.ObjectIds.RootFolder)])
+        seen.update(level)
+        while level:
+            result.extend(level)
+            next_level = []
+            for descs in self.server_mgr.browse(level, refs=ua.ObjectIds.NonHierarchicalReferences, direction=ua.BrowseDirection.Both):
+                for desc in descs:
+                    if desc.NodeId not in seen:
+                        seen.add(desc.NodeId)
+                        next_level.append(desc.NodeId)
+            level = next_level
+        return result
+
+    def _find_users(self, nodeids, mapping, removed, outside):
+        """
+        find the BrowseName, DataType and Value attributes and the references of nodeids,
+        nodes which are not remapped, using an index of mapping or removed.
+        return the WriteValues of the remapped attributes and the (source, reftype, target, forward)
+        references to rewrite, references stored in nodeids to remapped nodes which store the
+        opposite reference are in outside and already rewritten
+        """
+        namespaces = set(mapping)
+        if removed is not None:
+            namespaces.add(removed)
+        attrs = [ua.AttributeIds.BrowseName, ua.AttributeIds.DataType, ua.AttributeIds.Value]
+        results, allrefs = self.server_mgr.gather(
+            self.server_mgr.read_attributes_async(nodeids, attrs),
+            self.server_mgr.browse_async(nodeids, refs=ua.ObjectIds.References, direction=ua.BrowseDirection.Both))
+        outside = set(outside)
+        writes = []
+        user_refs = []
+        for nodeid, dvs, node_refs in zip(nodeids, results, allrefs):
+            for attr, dv in zip(attrs, dvs):
+                if not dv.StatusCode.is_good() or not uses_namespaces(dv.Value, namespaces):
+                    continue
+                self._check_removed(dv.Value, removed, nodeid)
+                wv = ua.WriteValue()
+                wv.NodeId = nodeid
+                wv.AttributeId = attr
+                wv.Value = ua.DataValue(map_value(dv.Value, mapping))
+                writes.append(wv)
+            for ref in node_refs:
+                item = (nodeid, ref.ReferenceTypeId, ref.NodeId, ref.IsForward)
+                if item in outside or not uses_namespaces([ref.ReferenceTypeId, ref.NodeId], namespaces):
+                    continue
+                self._check_removed([ref.ReferenceTypeId, ref.NodeId], removed, nodeid)
+                user_refs.append(item)
+        return writes, user_refs
+
+    def _check_removed(self, val, removed, nodeid):
+        if removed is not None and uses_namespaces(val, {removed}):
+            raise RuntimeError(f"Namespace {removed} is still used, for example by node {nodeid.to_string()}")
+
+    def _rewrite_users(self, writes, user_refs, mapping):
+        for wv, res in zip(writes, self.server_mgr.write(writes)):
+            if not res.is_good():
+                raise RuntimeError(f"Could not write {ua.AttributeIds(wv.AttributeId).name} of {wv.NodeId.to_string()} after remapping: {res}")
+        if user_refs:
+            self._add_references(user_refs, [], mapping)
+
+    def _check_collisions(self, new_ids):
+        targets = [nodeid for nodeid in set(new_ids.values()) if nodeid not in new_ids]
+        if not targets:
+            return
+        for nodeid, (nclass,) in zip(targets, self.server_mgr.read_attributes(targets, [ua.AttributeIds.NodeClass])):
+            if nclass.StatusCode.is_good():
+                raise RuntimeError(f"Cannot remap namespaces, node {nodeid.to_string()} already exists")
+
+    def _read(self, nodeids):
+        records, refs, outside = read_node_records(self.server_mgr, nodeids)
+        self.records = records
+        self.levels = group_by_depth(records)
+        return refs, outside
+
+    def _delete(self, nodeids, outside):
+        items = [_make_delete_ref_item(*ref) for ref in outside]
+        existing = self.server_mgr.delete_references(items)
+        for res in self.server_mgr.delete_nodes(nodeids):
+            res.check()
+        return existing
+
+    def _add(self, new_ids, mapping):
+        for level in self.levels:
+            items = []
+            for rec in level:
+                item = ua.AddNodesItem()
+                item.RequestedNewNodeId = new_ids[rec.nodeid]
+                item.BrowseName = map_value(rec.bname, mapping)
+                if rec.parent is not None:
+                    item.ParentNodeId = map_nodeid(rec.parent, mapping)
+                    item.ReferenceTypeId = map_nodeid(rec.reftype, mapping)
+                item.TypeDefinition = map_nodeid(rec.typedef, mapping)
+                item.NodeClass = rec.nodeclass
+                attrs = copy.copy(rec.attrs)
+                for name in attrs.__dict__.keys():
+                    if attrs.SpecifiedAttributes & getattr(ua.NodeAttributesMask, name, 0):
+                        setattr(attrs, name, map_value(getattr(attrs, name), mapping))
+                item.NodeAttributes = attrs
+                items.append(item)
+            for res in self.server_mgr.add_nodes(items):
+                res.StatusCode.check()
+
+    def _add_references(self, refs, outside, mapping):
+        items = []
+        for source, reftype, target, forward in refs + outside:
+            item = ua.AddReferencesItem()
+            item.SourceNodeId = map_nodeid(source, mapping)
+            item.ReferenceTypeId = map_nodeid(reftype, mapping)
+            item.TargetNodeId = map_nodeid(target, mapping)
+            item.IsForward = forward
+            items.append(item)
+        failed = [f"{item.SourceNodeId.to_string()} -> {item.TargetNodeId.to_string()}: {res}"
+                  for item, res in zip(items, self.server_mgr.add_references(items)) if not res.is_good()]
+        if failed:
+            raise RuntimeError(f"Could not add {len(failed)} references after remapping: " + ", ".join(failed[:10]))
+
+
+def _make_delete_ref_item(source, reftype, target, forward):
+    item = ua.DeleteReferencesItem()
+    item.SourceNodeId = source
+    item.ReferenceTypeId = reftype
+    item.TargetNodeId = target
+    item.IsForward = forward
+    item.DeleteBidirectional = False
+    return item
@@ -15,6 +15,7 @@ logger = logging.getLogger(__name__)
 class NamespaceWidget(QObject):
 
     error = pyqtSignal(Exception)
+    namespaces_changed = pyqtSignal()
 
     def __init__(self, view):
         QObject.__init__(self, view)
@@ -25,6 +26,7 @@ class NamespaceWidget(QObject):
         delegate.error.connect(self.error.emit)
         self.view.setItemDelegate(delegate)
         self.node = None
+        self.remove_handler = None  # called with uri to remove instead of only writing namespace array
         self.view.header().setSectionResizeMode(1)
 
         self.addNamespaceAction = QAction("Add Namespace", self.model)
@@ -56,11 +58,15 @@ class NamespaceWidget(QObject):
         idx = idx.sibling(idx.row(), 2)
         item = self.model.itemFromIndex(idx)
         uri = item.text()
-        uries = self.node.read_value()
-        uries.remove(uri)
-        logger.info("Writting namespace array: %s", uries)
-        self.node.write_value(uries)
+        if self.remove_handler is not None:
+            self.remove_handler(uri)
+        else:
+            uries = self.node.read_value()
+            uries.remove(uri)
+            logger.info("Writting namespace array: %s", uries)
+            self.node.write_value(uries)
         self.reload()
+        self.namespaces_changed.emit()
 
     def set_node(self, node):
         self.model.clear()
@@ -131,5 +137,6 @@ class MyDelegate(QStyledItemDelegate):
             uries.append(child.text())
         logger.info("Writting namespace array: %s", uries)
         self.widget.node.write_value(uries)
+        self.widget.namespaces_changed.emit()
 
 
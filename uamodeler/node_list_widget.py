@@ -0,0 +1,75 @@
+import logging
+
+from PyQt5.QtCore import pyqtSignal, Qt, QObject
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5.QtWidgets import QAbstractItemView
+
+from asyncua import ua
+
+from uawidgets.utils import trycatchslot
+
+
+logger = logging.getLogger(__name__)
+
+
+class NodeListWidget(QObject):
+    """
+    Flat list of nodes, for example the result of a search.
+    Display names are read with one batched Read request
+    """
+
+    error = pyqtSignal(Exception)
+    node_activated = pyqtSignal(ua.NodeId)
+
+    def __init__(self, view):
+        QObject.__init__(self, view)
+        self.view = view
+        self.model = QStandardItemModel()
+        self.view.setModel(self.model)
+        self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.clear()
+        self.view.doubleClicked.connect(self._activated)
+
+    def clear(self):
+        self.model.clear()
+        self.model.setHorizontalHeaderLabels(['DisplayName', 'NodeId', 'Details'])
+
+    def set_nodes(self, server_mgr, rows):
+        """
+        show rows, a list of (nodeid, details) tuples
+        """
+        self.clear()
+        nodeids = [nodeid for nodeid, _ in rows]
+        names = server_mgr.read_attributes(nodeids, [ua.AttributeIds.DisplayName]) if nodeids else []
+        for (nodeid, details), (dname,) in zip(rows, names):
+            name = dname.Value.Value.Text if dname.StatusCode.is_good() else ""
+            name_item = QStandardItem(name)
+            name_item.setData(nodeid, Qt.UserRole)
+            self.model.appendRow([name_item, QStandardItem(nodeid.to_string()), QStandardItem(details)])
+        self.view.resizeColumnToContents(0)
+
+    def get_nodeids(self):
+        return [self.model.item(row, 0).data(Qt.UserRole) for row in range(self.model.rowCount())]
+
+    def get_selected_nodeids(self):
+        """
+        return the nodeids of selected rows, so operations can be applied to a set of results
+        """
+        rows = sorted(idx.row() for idx in self.view.selectionModel().selectedRows())
+        return [self.model.item(row, 0).data(Qt.UserRole) for row in rows]
+
+    def remove_nodeids(self, nodeids):
+        """
+        remove the rows of nodeids, for example after deleting them
+        """
+        nodeids = set(nodeids)
+        for row in reversed(range(self.model.rowCount())):
+            if self.model.item(row, 0).data(Qt.UserRole) in nodeids:
+                self.model.removeRow(row)
+
+    @trycatchslot
+    def _activated(self, idx):
+        item = self.model.itemFromIndex(idx.sibling(idx.row(), 0))
+        if item:
+            self.node_activated.emit(item.data(Qt.UserRole))
@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import xml.etree.ElementTree as Et
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAME = "nodesets_catalog.json"
+
+
+# elements of nodeset header, nodes come after them
+_HEADER_TAGS = {"NamespaceUris", "ServerUris", "Models", "Aliases", "Extensions"}
+
+
+def scan_nodeset(path):
+    """
+    read the metadata of a nodeset file from its header, without reading its nodes:
+    provided models, required models and namespaces
+    """
+    info = {
+        "model_uri": None,
+        "version": None,
+        "publication_date": None,
+        "required": [],
+        "namespaces": [],
+    }
+    tags = []  # tags of open elements
+    with open(path, "rb") as f:
+        for event, el in Et.iterparse(f, events=("start", "end")):
+            tag = el.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                tags.append(tag)
+                if len(tags) == 2 and tag not in _HEADER_TAGS:
+                    break  # first node, header is read
+                if tag == "Model" and info["model_uri"] is None:
+                    info["model_uri"] = el.attrib.get("ModelUri")
+                    info["version"] = el.attrib.get("Version")
+                    info["publication_date"] = el.attrib.get("PublicationDate")
+                elif tag == "RequiredModel":
+                    info["required"].append(dict(el.attrib))
+                continue
+            tags.pop()
+            if tag == "Uri" and tags[-1] == "NamespaceUris":
+                info["namespaces"].append(el.text)
+    if info["model_uri"] is None and info["namespaces"]:
+        info["model_uri"] = info["namespaces"][0]
+    return info
+
+
+class NodeSetLibrary:
+    """
+    Directory of nodeset files with a persistent catalog of their metadata.
+    Only files which changed since the last refresh are scanned again
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.catalog = {}  # file name -> info dict from scan_nodeset, plus mtime, size and node_count once imported
+        self._load()
+
+    @property
+    def catalog_path(self):
+        return os.path.join(self.directory, CATALOG_NAME)
+
+    def _load(self):
+        try:
+            with open(self.catalog_path, encoding="utf-8") as f:
+                self.catalog = json.load(f)
+        except (OSError, ValueError):
+            self.catalog = {}
+
+    def _save(self):
+        try:
+            with open(self.catalog_path, "w", encoding="utf-8") as f:
+                json.dump(self.catalog, f, indent=1, sort_keys=True)
+        except OSError as ex:
+            logger.warning("Could not save nodeset catalog %s: %s", self.catalog_path, ex)
+
+    def refresh(self):
+        """
+        scan new and modified files of directory, forget removed ones
+        return True if catalog changed
+        """
+        changed = False
+        names = set()
+        for name in sorted(os.listdir(self.directory)):
+            if not name.lower().endswith(".xml"):
+                continue
+            names.add(name)
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            entry = self.catalog.get(name)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                continue
+            try:
+                entry = scan_nodeset(path)
+            except Et.ParseError as ex:
+                logger.warning("Could not read nodeset %s: %s", path, ex)
+                entry = {"model_uri": None, "required": [], "error": str(ex)}
+            entry["mtime"] = stat.st_mtime
+            entry["size"] = stat.st_size
+            self.catalog[name] = entry
+            changed = True
+        for name in set(self.catalog) - names:
+            del self.catalog[name]
+            changed = True
+        if changed:
+            self._save()
+        return changed
+
+    def set_node_count(self, path, count):
+        """
+        record the number of nodes of nodeset at path, if it is in library.
+        Nodes are counted when a nodeset is parsed for import, scanning only reads headers
+        """
+        entry = self.catalog.get(os.path.basename(path))
+        if entry is None or os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            return
+        if entry.get("node_count") != count:
+            entry["node_count"] = count
+            self._save()
+
+    def describe(self, name):
+        """
+        one line description of nodeset name for the user
+        """
+        entry = self.catalog[name]
+        details = name
+        if entry.get("node_count") is not None:
+            details += f", {entry['node_count']} nodes"
+        return f"{entry['model_uri']} {entry.get('version') or ''} ({details})"
+
+    def get_path(self, name):
+        return os.path.join(self.directory, name)
+
+    def find(self, model_uri):
+        """
+        return file name of the newest nodeset providing model_uri, or None
+        """
+        candidates = [(entry.get("publication_date") or "", name) for name, entry in self.catalog.items()
+                      if entry.get("model_uri") == model_uri]
+        if not candidates:
+            return None
+        return max(candidates)[1]
+
+    def _get_info(self, path):
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory):
+            info = self.catalog.get(os.path.basename(path))
+            if info is not None:
+                return info
+        return scan_nodeset(path)
+
+    def get_dependencies(self, path, available_uris=()):
+        """
+        return paths of the library nodesets path requires, directly or not,
+        which do not provide one of available_uris
+        """
+        info = self._get_info(path)
+        available = set(available_uris)
+        result = []
+        todo = [info]
+        while todo:
+            info = todo.pop()
+            for model in info.get("required", []):
+                uri = model.get("ModelUri")
+                if uri in available:
+                    continue
+                available.add(uri)
+                name = self.find(uri)
+                if name is None:
+                    logger.warning("Required model %s is not in nodeset library %s", uri, self.directory)
+                    continue
+                result.append(self.get_path(name))
+                todo.append(self.catalog[name])
+        return result
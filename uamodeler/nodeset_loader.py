@@ -0,0 +1,180 @@
+import inspect
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from asyncua.common.xmlimporter import XmlImporter
+from asyncua.common.xmlparser import XMLParser
+
+logger = logging.getLogger(__name__)
+
+# private members of XmlImporter used to import a parsed nodeset
+_IMPORTER_MEMBERS = ("_get_existing_model_in_namespace", "_map_aliases", "make_objects", "_add_missing_parents",
+                     "_sort_nodes_by_parentid", "_add_node_data", "_add_references", "_add_missing_reverse_references")
+
+
+class ParsedNodeSet:
+    """
+    Result of parsing a nodeset XML file, independent of any server so it
+    can be produced in another process
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.model_uris = []
+        self.required_models = []  # attributes of RequiredModel elements
+        self.namespaces = []
+        self.aliases = {}
+        self.node_datas = []
+
+    def get_required_uris(self):
+        return [model["ModelUri"] for model in self.required_models]
+
+
+def parse_nodeset(path):
+    """
+    parse nodeset file at path and return a ParsedNodeSet
+    """
+    parser = XMLParser()
+    parser.parse_sync(path)
+    nodeset = ParsedNodeSet(path)
+    for el in parser.root.iter():
+        if el.tag.endswith("}Model"):
+            nodeset.model_uris.append(el.attrib["ModelUri"])
+        elif el.tag.endswith("}RequiredModel"):
+            nodeset.required_models.append(dict(el.attrib))
+    nodeset.namespaces = parser.get_used_namespaces()
+    nodeset.aliases = parser.get_aliases()
+    nodeset.node_datas = parser.get_node_datas()
+    return nodeset
+
+
+def sort_nodesets(nodesets):
+    """
+    order nodesets so that each one comes after the nodesets providing its RequiredModels.
+    Required models not provided by one of the nodesets must already be in the server.
+    Order of independent nodesets is kept
+    """
+    providers = {}
+    for nodeset in nodesets:
+        for uri in nodeset.model_uris:
+            providers.setdefault(uri, nodeset)
+    result = []
+    done = set()
+    visiting = set()
+
+    def visit(nodeset):
+        if id(nodeset) in done:
+            return
+        if id(nodeset) in visiting:
+            raise ValueError(f"Circular RequiredModels dependency involving {nodeset.path}")
+        visiting.add(id(nodeset))
+        for uri in nodeset.get_required_uris():
+            provider = providers.get(uri)
+            if provider is not None and provider is not nodeset:
+                visit(provider)
+        visiting.discard(id(nodeset))
+        done.add(id(nodeset))
+        result.append(nodeset)
+
+    for nodeset in nodesets:
+        visit(nodeset)
+    return result
+
+
+def parse_nodesets(paths, max_workers=None):
+    """
+    parse nodeset files, in parallel processes if there are several,
+    and return them as ParsedNodeSet in dependency order
+    """
+    workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        # spawn, forking a process running the server and Qt threads is not safe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            nodesets = list(executor.map(parse_nodeset, paths))
+    else:
+        nodesets = [parse_nodeset(path) for path in paths]
+    return sort_nodesets(nodesets)
+
+
+class ParsedXmlImporter(XmlImporter):
+    """
+    XmlImporter adding the nodes of an already parsed nodeset,
+    the file is not read again
+    """
+
+    def __init__(self, server, nodeset):
+        XmlImporter.__init__(self, server)
+        self.nodeset = nodeset
+
+    @staticmethod
+    def is_supported():
+        """
+        return True if XmlImporter has the private members ParsedXmlImporter uses,
+        asyncua does not guarantee them between versions
+        """
+        if not all(hasattr(XmlImporter, name) for name in _IMPORTER_MEMBERS):
+            return False
+        return "no_namespace_migration" in inspect.signature(XmlImporter._add_node_data).parameters
+
+    async def import_nodeset(self):
+        """
+        import nodeset and return added nodes, as XmlImporter.import_xml does
+        """
+        logger.info("Importing parsed nodeset %s", self.nodeset.path)
+        await self._check_parsed_required_models()
+        self.namespaces = await self._map_parsed_namespaces()
+        logger.info("namespace map: %s", self.namespaces)
+        self._unmigrated_aliases = self.nodeset.aliases
+        self.aliases = self._map_aliases(self._unmigrated_aliases)
+        self.refs = []
+        dnodes = self.make_objects(self.nodeset.node_datas)
+        self._add_missing_parents(dnodes)
+        nodes = []
+        for nodedata in self._sort_nodes_by_parentid(dnodes):
+            try:
+                node = await self._add_node_data(nodedata, no_namespace_migration=True)
+            except Exception:
+                logger.warning("failure adding node %s", nodedata)
+                raise
+            nodes.append(node)
+        self.refs, remaining_refs = [], self.refs
+        await self._add_references(remaining_refs)
+        missing_nodes = await self._add_missing_reverse_references(nodes)
+        if missing_nodes:
+            logger.warning("The following references exist, but the Nodes are missing: %s", missing_nodes)
+        if self.refs:
+            logger.warning("The following references could not be imported and are probably broken: %s", self.refs)
+        return nodes
+
+    async def _map_parsed_namespaces(self):
+        """
+        namespace index in nodeset -> namespace index in server, missing namespaces are registered
+        """
+        server_uris = await self.server.get_namespace_array()
+        mapping = {}
+        for idx, uri in enumerate(self.nodeset.namespaces, start=1):
+            if uri in server_uris:
+                mapping[idx] = server_uris.index(uri)
+            else:
+                mapping[idx] = await self.server.register_namespace(uri)
+        return mapping
+
+    async def _check_parsed_required_models(self):
+        if not self.nodeset.required_models:
+            return
+        existing = await self._get_existing_model_in_namespace()
+        missing = []
+        for req in self.nodeset.required_models:
+            for model in existing:
+                if model["ModelUri"] == req["ModelUri"] and model["PublicationDate"] >= req.get("PublicationDate", "") \
+                        and model.get("Version", "") >= req.get("Version", ""):
+                    break
+            else:
+                missing.append(req)
+        for req in missing:
+            logger.warning("Model is missing: %s - Version: %s - PublicationDate: %s or newer",
+                           req["ModelUri"], req.get("Version"), req.get("PublicationDate"))
+        if missing:
+            raise ValueError(f"Server doesn't satisfy required models of {self.nodeset.path}. Import them first!")
@@ -0,0 +1,275 @@
+import logging
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QStandardItem
+from PyQt5.QtWidgets import QAction, QInputDialog
+
+from uawidgets.tree_widget import TreeWidget, TreeViewModel
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500  # children added to tree at a time
+PLACEHOLDER_ROLE = Qt.UserRole + 1  # set on the row standing for the children not loaded yet
+
+
+class _Pages:
+    """
+    Paging state of the children of one node
+    """
+
+    def __init__(self):
+        self.continuation = None  # BrowseContinuation of next page
+        self.placeholder = None  # item of the "more" row ending the children
+        self.nodeids = set()  # children shown, a child referenced twice is shown once
+        self.shown = 0
+
+
+def _matches(desc, text):
+    if not text:
+        return True
+    return text in desc.BrowseName.Name.lower() or (desc.DisplayName.Text is not None and text in desc.DisplayName.Text.lower())
+
+
+class PagedTreeViewModel(TreeViewModel):
+    """
+    Tree model browsing the children of a node PAGE_SIZE at a time.
+    While a node has more children a placeholder row ends them, it is
+    replaced by the next page when it is scrolled into view or activated.
+    Children of a node can be filtered by name, a page then holds
+    PAGE_SIZE matching children
+    """
+
+    def __init__(self):
+        TreeViewModel.__init__(self)
+        self.server_mgr = None
+        self._pages = {}  # nodeid -> _Pages
+        self._filters = {}  # nodeid -> lower case text the names of children must contain
+
+    def clear(self):
+        for pages in self._pages.values():
+            self._release(pages)
+        self._pages.clear()
+        self._filters.clear()
+        TreeViewModel.clear(self)
+
+    def reset_cache(self, node):
+        TreeViewModel.reset_cache(self, node)
+        pages = self._pages.pop(node.nodeid, None)
+        if pages is not None:
+            self._release(pages)
+
+    def _release(self, pages):
+        if self.server_mgr is not None:
+            self.server_mgr.release_continuation(pages.continuation)
+
+    def canFetchMore(self, idx):
+        if idx.data(PLACEHOLDER_ROLE):
+            return False
+        return TreeViewModel.canFetchMore(self, idx)
+
+    def hasChildren(self, idx):
+        if idx.data(PLACEHOLDER_ROLE):
+            return False
+        return TreeViewModel.hasChildren(self, idx)
+
+    def _fetchMore(self, parent):
+        if self.server_mgr is None:
+            return TreeViewModel._fetchMore(self, parent)
+        node = parent.data(Qt.UserRole)
+        if node.nodeid in self._pages:
+            return  # already fetched, next pages are loaded through the placeholder
+        try:
+            pages = self._pages[node.nodeid] = _Pages()
+            self._add_page(parent, node.nodeid, pages)
+        except Exception as ex:
+            self.error.emit(ex)
+            raise
+
+    def fetch_next_page(self, placeholder):
+        """
+        replace placeholder item by the next page of children
+        """
+        parent = placeholder.parent()
+        node = parent.data(Qt.UserRole)
+        pages = self._pages.get(node.nodeid)
+        if pages is None or pages.placeholder is not placeholder:
+            return
+        try:
+            self._add_page(parent, node.nodeid, pages)
+        except Exception as ex:
+            self.error.emit(ex)
+            raise
+
+    def _add_page(self, parent, nodeid, pages):
+        text = self._filters.get(nodeid)
+        descs = []
+        while len(descs) < PAGE_SIZE:
+            refs, pages.continuation = self.server_mgr.browse_children(nodeid, PAGE_SIZE, pages.continuation)
+            for desc in refs:
+                if desc.NodeId not in pages.nodeids and _matches(desc, text):
+                    pages.nodeids.add(desc.NodeId)
+                    descs.append(desc)
+            if pages.continuation is None:
+                break
+        if pages.placeholder is not None:
+            parent.removeRow(pages.placeholder.row())
+            pages.placeholder = None
+        if not pages.shown and pages.continuation is None:
+            descs.sort(key=lambda x: x.BrowseName)  # all children fit in one page, sort them
+        for desc in descs:
+            self.add_item(desc, parent)
+        pages.shown += len(descs)
+        if pages.continuation is not None:
+            pages.placeholder = self._make_placeholder(pages, text)
+            parent.appendRow(pages.placeholder)
+
+    def _make_placeholder(self, pages, text):
+        remaining = pages.continuation.remaining
+        if text:
+            label = f"More children named *{text}*..."
+        elif remaining is not None:
+            label = f"{remaining} more..."
+        else:
+            label = "More..."
+        item = QStandardItem(label)
+        item.setData(True, PLACEHOLDER_ROLE)
+        item.setToolTip(f"{pages.shown} children shown, scroll or activate to load {PAGE_SIZE} more")
+        font = item.font()
+        font.setItalic(True)
+        item.setFont(font)
+        return item
+
+    def get_placeholders(self):
+        return [pages.placeholder for pages in self._pages.values() if pages.placeholder is not None]
+
+    def find_child(self, parent, nodeid):
+        """
+        return the item of child nodeid of parent item, loading pages until it is found
+        """
+        idx = self.indexFromItem(parent)
+        if self.canFetchMore(idx):
+            self.fetchMore(idx)
+        row = 0
+        while True:
+            for row in range(row, parent.rowCount()):
+                child = parent.child(row, 0)
+                node = child.data(Qt.UserRole)
+                if node is not None and node.nodeid == nodeid:
+                    return child
+            pages = self._pages.get(parent.data(Qt.UserRole).nodeid)
+            if pages is None or pages.placeholder is None:
+                return None
+            row = pages.placeholder.row()
+            self.fetch_next_page(pages.placeholder)
+
+    def get_filter(self, item):
+        return self._filters.get(item.data(Qt.UserRole).nodeid, "")
+
+    def set_filter(self, item, text):
+        """
+        only show the children of item whose BrowseName or DisplayName contain text, all if text is empty
+        """
+        node = item.data(Qt.UserRole)
+        if text:
+            self._filters[node.nodeid] = text.lower()
+            item.setToolTip(f"Children filtered by name: {text}")
+        else:
+            self._filters.pop(node.nodeid, None)
+            item.setToolTip("")
+
+
+class PagedTreeWidget(TreeWidget):
+    """
+    TreeWidget showing children of nodes in pages, see PagedTreeViewModel
+    """
+
+    def __init__(self, view):
+        TreeWidget.__init__(self, view)
+        self.model = PagedTreeViewModel()
+        self.model.error.connect(self.error)
+        self.view.setModel(self.model)
+        self.model.setHorizontalHeaderLabels(['DisplayName', "BrowseName", 'NodeId'])
+        state = self.settings.value("tree_widget_state", None)
+        if state is not None:
+            self.view.header().restoreState(state)
+        self._fetching = False
+        self.view.verticalScrollBar().valueChanged.connect(self._fetch_visible_pages)
+        self.view.expanded.connect(self._fetch_visible_pages)
+        self.view.activated.connect(self._placeholder_activated)
+
+        self.actionFilter = QAction("Filter Children...", self)
+        self.actionFilter.triggered.connect(self.filter_current)
+
+    def set_server_manager(self, server_mgr):
+        self.model.server_mgr = server_mgr
+
+    def get_current_node(self, idx=None):
+        if idx is None:
+            idx = self.view.currentIndex()
+        if idx.sibling(idx.row(), 0).data(PLACEHOLDER_ROLE):
+            return None
+        return TreeWidget.get_current_node(self, idx)
+
+    def _fetch_visible_pages(self, *args):
+        if self._fetching:
+            return  # rows inserted by a fetch move the scroll bar
+        self._fetching = True
+        try:
+            rect = self.view.viewport().rect()
+            for placeholder in self.model.get_placeholders():
+                if self.view.visualRect(placeholder.index()).intersects(rect):
+                    self.model.fetch_next_page(placeholder)
+        finally:
+            self._fetching = False
+
+    def _placeholder_activated(self, idx):
+        idx = idx.sibling(idx.row(), 0)
+        if idx.data(PLACEHOLDER_ROLE):
+            self.model.fetch_next_page(self.model.itemFromIndex(idx))
+
+    def expand_to_node(self, node):
+        """
+        Expand tree until given node and select it, loading
+        the pages of children until the node is found
+        """
+        if isinstance(node, str):
+            idxlist = self.model.match(self.model.index(0, 0), Qt.DisplayRole, node, 1, Qt.MatchExactly | Qt.MatchRecursive)
+            if not idxlist:
+                raise ValueError(f"Node {node} not found in tree")
+            node = self.model.data(idxlist[0], Qt.UserRole)
+        path = node.get_path()
+        item = self.model.item(0, 0)
+        if item is None or item.data(Qt.UserRole).nodeid != path[0].nodeid:
+            logger.warning("Node %s is not under root of tree", node)
+            return
+        for child in path[1:]:
+            self.view.setExpanded(self.model.indexFromItem(item), True)
+            item = self.model.find_child(item, child.nodeid)
+            if item is None:
+                logger.warning("Could not find node %s in tree, children of its parent may be filtered", child)
+                return
+        idx = self.model.indexFromItem(item)
+        self.view.setExpanded(idx, True)
+        self.view.setCurrentIndex(idx)
+        self.view.activated.emit(idx)
+
+    def set_children_filter(self, item, text):
+        """
+        show only the children of item whose name contains text, all of them if text is empty
+        """
+        self.model.set_filter(item, text)
+        self.reload(item)
+        idx = self.model.indexFromItem(item)
+        if self.model.canFetchMore(idx):
+            self.model.fetchMore(idx)
+        self.view.setExpanded(idx, True)
+
+    def filter_current(self):
+        idx = self.view.currentIndex()
+        item = self.model.itemFromIndex(idx.sibling(idx.row(), 0))
+        if item is None or item.data(Qt.UserRole) is None:
+            return
+        text, ok = QInputDialog.getText(self.view, "Filter Children", "Show children whose name contains (empty for all)",
+                                        text=self.model.get_filter(item))
+        if ok:
+            self.set_children_filter(item, text)
@@ -0,0 +1,115 @@
+import logging
+import os
+import xml.etree.ElementTree as Et
+from threading import Thread
+
+from uamodeler.binary_project import BinaryProject
+from uamodeler.nodeset_loader import parse_nodesets
+
+logger = logging.getLogger(__name__)
+
+
+def read_ua_model(path):
+    """
+    return the reference nodeset paths, the model XML path
+    and the current node string of a .uamodel file
+    """
+    root = Et.parse(path).getroot()
+    refpaths = [ref_el.attrib['path'] for ref_el in root.findall("Reference")]
+    mod_el = root.find("Model")
+    xmlpath = os.path.join(os.path.dirname(path), mod_el.attrib['path'])
+    return refpaths, xmlpath, mod_el.attrib.get("current_node")
+
+
+def get_binary_nodeset_paths(path, project):
+    """
+    paths of the reference nodesets of a binary model, relative to the model directory if they exist there
+    """
+    dirname = os.path.dirname(path)
+    return [os.path.join(dirname, refpath) if os.path.exists(os.path.join(dirname, refpath)) else refpath
+            for refpath in project.nodesets]
+
+
+class PrewarmedModel:
+    """
+    Files of a model read before the model is opened
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.project = None  # BinaryProject of a binary model
+        self.nodesets = {}  # path -> ParsedNodeSet, of model XML and reference nodesets
+
+    def is_current(self):
+        """
+        True if the model file was not modified since it was read
+        """
+        try:
+            return self.mtime is not None and os.stat(self.path).st_mtime == self.mtime
+        except OSError:
+            return False
+
+
+def read_model(path):
+    """
+    read and parse all files of model at path, return a PrewarmedModel
+    """
+    model = PrewarmedModel(path)
+    model.mtime = os.stat(path).st_mtime
+    if path.endswith(".xml"):
+        paths = [path]
+    elif path.endswith(".uamodelb"):
+        model.project = BinaryProject.read(path)
+        paths = get_binary_nodeset_paths(path, model.project)
+    else:
+        refpaths, xmlpath, _ = read_ua_model(path)
+        paths = refpaths + [xmlpath]
+    for nodeset in parse_nodesets(paths):
+        model.nodesets[nodeset.path] = nodeset
+    return model
+
+
+class Prewarmer:
+    """
+    Read the files of a model in a background thread, while the user has not
+    decided yet what to open. Opening another model discards the result
+    without waiting for the thread
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._path = None
+        self._result = {}  # filled by the thread, a discarded thread fills a dict nobody reads
+
+    def start(self, path):
+        if self._thread is not None:
+            return
+        logger.info("Prewarming %s", path)
+        self._path = path
+        self._result = {}
+        self._thread = Thread(target=self._run, args=(path, self._result), daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _run(path, result):
+        try:
+            result["model"] = read_model(path)
+        except Exception as ex:
+            logger.warning("Could not prewarm %s: %s", path, ex)
+
+    def take(self, path):
+        """
+        return the PrewarmedModel of path, waiting for it if it is still being read.
+        An empty PrewarmedModel is returned if path was not prewarmed or was modified since.
+        The prewarmed model is only used once
+        """
+        thread, self._thread = self._thread, None
+        result, self._result = self._result, {}
+        if thread is not None and self._path == path:
+            thread.join()
+            model = result.get("model")
+            if model is not None and model.is_current():
+                logger.info("Using prewarmed %s", path)
+                return model
+        return PrewarmedModel(path)
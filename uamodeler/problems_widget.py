@@ -0,0 +1,68 @@
+import logging
+
+from PyQt5.QtCore import pyqtSignal, Qt, QObject
+from PyQt5.QtGui import QStandardItemModel, QStandardItem, QBrush, QColor
+
+from asyncua import ua
+
+from uawidgets.utils import trycatchslot
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProblemsWidget(QObject):
+    """
+    Live view of the problems found by ModelValidator
+    """
+
+    error = pyqtSignal(Exception)
+    node_activated = pyqtSignal(ua.NodeId)
+
+    def __init__(self, view):
+        QObject.__init__(self, view)
+        self.view = view
+        self.model = QStandardItemModel()
+        self.view.setModel(self.model)
+        self.validator = None
+        self._rows = {}  # nodeid -> first item of each row showing a problem of node
+        self.clear()
+        self.view.doubleClicked.connect(self._activated)
+
+    def set_validator(self, validator):
+        self.validator = validator
+        validator.problemsChanged.connect(self.update_problems)
+        self.reload()
+
+    def clear(self):
+        self.model.clear()
+        self.model.setHorizontalHeaderLabels(['Severity', 'Node', 'Problem'])
+        self._rows = {}
+
+    def reload(self):
+        self.clear()
+        if self.validator:
+            for problem in self.validator.get_problems():
+                self._add_row(problem)
+
+    @trycatchslot
+    def update_problems(self, nodeids):
+        for nodeid in nodeids:
+            for item in self._rows.pop(nodeid, []):
+                self.model.removeRow(item.row())
+            for problem in self.validator.get_problems(nodeid):
+                self._add_row(problem)
+
+    def _add_row(self, problem):
+        sev_item = QStandardItem(problem.severity)
+        sev_item.setData(problem.nodeid, Qt.UserRole)
+        if problem.severity == problem.ERROR:
+            sev_item.setForeground(QBrush(QColor("red")))
+        self.model.appendRow([sev_item, QStandardItem(problem.nodeid.to_string()), QStandardItem(problem.message)])
+        self._rows.setdefault(problem.nodeid, []).append(sev_item)
+
+    @trycatchslot
+    def _activated(self, idx):
+        item = self.model.itemFromIndex(idx.sibling(idx.row(), 0))
+        if item:
+            self.node_activated.emit(item.data(Qt.UserRole))
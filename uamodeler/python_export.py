@@ -0,0 +1,196 @@
+import dataclasses
+import datetime
+import enum
+import logging
+import math
+import os
+import uuid
+
+from asyncua import ua
+from asyncua.ua.ua_binary import variant_to_binary
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000  # AddNodesItem per AddNodes request of generated module
+
+_HEADER = '''"""
+OPC UA address space of model {name}, generated by FreeOpcUa modeler.
+Build it in an asyncua Server, instead of importing the NodeSet2 XML file, with:
+
+    from {name} import build
+    await build(server)
+
+Load custom structures and enums afterwards, as after an XML import,
+with server.load_data_type_definitions() or server.load_type_definitions()
+"""
+import datetime
+import logging
+import uuid
+
+from asyncua import ua
+from asyncua.common.utils import Buffer
+from asyncua.ua.ua_binary import variant_from_binary
+
+_logger = logging.getLogger(__name__)
+
+NAMESPACES = {namespaces}
+CHUNK_SIZE = {chunk_size}
+
+
+def _variant(data):
+    return variant_from_binary(Buffer(data))
+'''
+
+_BUILD = '''
+
+async def build(server):
+    """
+    add the nodes of the model to asyncua Server server, parents before their children,
+    with one AddNodes request per CHUNK_SIZE nodes. Return the NodeIds of added nodes
+    """
+    ns = [0]
+    for uri in NAMESPACES:
+        ns.append(await server.register_namespace(uri))
+    session = server.iserver.isession
+    nodes = _nodes(ns)
+    added = []
+    for i in range(0, len(nodes), CHUNK_SIZE):
+        for res in await session.add_nodes(nodes[i:i + CHUNK_SIZE]):
+            res.StatusCode.check()
+            added.append(res.AddedNodeId)
+    references = _references(ns)
+    for item, res in zip(references, await session.add_references(references)):
+        if not res.is_good():
+            _logger.warning("Could not add reference %s: %s", item, res)
+    return added
+'''
+
+
+class _NotLiteral(Exception):
+    """
+    value cannot be written as Python source
+    """
+
+
+def write_python(project, path):
+    """
+    write the nodes and references of BinaryProject project to a Python module at path
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    writer = _SourceWriter()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(_HEADER.format(name=name, namespaces=repr(project.namespaces), chunk_size=CHUNK_SIZE))
+        _write_list(f, "_nodes", [writer.to_source(item) for item in project.nodes])
+        references = project.references + _type_definition_references(project)
+        _write_list(f, "_references", [writer.to_source(item) for item in references])
+        f.write(_BUILD)
+    if writer.binary_variants:
+        logger.info("%s values of types unknown to asyncua written in binary encoding", writer.binary_variants)
+
+
+def _type_definition_references(project):
+    """
+    inverse HasTypeDefinition references from the type definitions to the nodes of project.
+    AddNodes does not create them, the XML importer does, as it adds the missing
+    opposite of every reference
+    """
+    reftype = ua.NodeId(ua.ObjectIds.HasTypeDefinition)
+    existing = {(item.SourceNodeId, item.ReferenceTypeId, item.TargetNodeId, item.IsForward) for item in project.references}
+    refs = []
+    for node in project.nodes:
+        if node.TypeDefinition.is_null() or (node.TypeDefinition, reftype, node.RequestedNewNodeId, False) in existing:
+            continue
+        item = ua.AddReferencesItem()
+        item.SourceNodeId = node.TypeDefinition
+        item.ReferenceTypeId = reftype
+        item.TargetNodeId = node.RequestedNewNodeId
+        item.IsForward = False
+        refs.append(item)
+    return refs
+
+
+def _write_list(f, name, items):
+    f.write(f"\n\ndef {name}(ns):\n")
+    f.write("    return [\n")
+    for item in items:
+        f.write(f"        {item},\n")
+    f.write("    ]\n")
+
+
+class _SourceWriter:
+    """
+    write asyncua values as Python source. Namespace indexes are written
+    as ns[index] so the generated module maps them to the indexes of its server.
+    Variants holding classes unknown to asyncua, custom structures for example,
+    are written in binary encoding
+    """
+
+    def __init__(self):
+        self._defaults = {}  # dataclass -> instance made without arguments
+        self.binary_variants = 0
+
+    def to_source(self, value):
+        if value is None or isinstance(value, (bool, str, bytes)):
+            return repr(value)
+        if isinstance(value, enum.Enum):
+            return self._enum_source(value)
+        if isinstance(value, int):
+            return repr(value)
+        if isinstance(value, float):
+            return repr(value) if math.isfinite(value) else f'float("{value}")'
+        if isinstance(value, datetime.datetime):
+            return repr(value)
+        if isinstance(value, uuid.UUID):
+            return f"uuid.UUID({str(value)!r})"
+        if isinstance(value, (list, tuple)):
+            return "[" + ", ".join(self.to_source(val) for val in value) + "]"
+        if isinstance(value, ua.Variant):
+            try:
+                return self._dataclass_source(value)
+            except _NotLiteral:
+                self.binary_variants += 1
+                return f"_variant({variant_to_binary(value)!r})"
+        if isinstance(value, ua.NodeId) and not isinstance(value, ua.ExpandedNodeId):
+            # NodeIdType is deduced from identifier, the index of namespace may change it
+            return f"ua.NodeId({self.to_source(value.Identifier)}, {_ns_source(value.NamespaceIndex)})"
+        if dataclasses.is_dataclass(value):
+            return self._dataclass_source(value)
+        raise _NotLiteral(f"Cannot write {type(value).__name__} as Python source")
+
+    def _enum_source(self, value):
+        cls = type(value)
+        if getattr(ua, cls.__name__, None) is not cls:
+            return repr(int(value))
+        if value.name is not None and value.name.isidentifier():
+            return f"ua.{cls.__name__}.{value.name}"
+        return f"ua.{cls.__name__}({int(value)})"
+
+    def _dataclass_source(self, value):
+        cls = type(value)
+        if getattr(ua, cls.__name__, None) is not cls:
+            raise _NotLiteral(f"{cls.__name__} is not an asyncua class")
+        default = self._get_default(cls)
+        args = []
+        for field in dataclasses.fields(cls):
+            if not field.init:
+                continue
+            val = getattr(value, field.name)
+            if default is not None and val == getattr(default, field.name):
+                continue
+            if field.name == "NamespaceIndex":
+                args.append(f"{field.name}={_ns_source(val)}")
+            else:
+                args.append(f"{field.name}={self.to_source(val)}")
+        return f"ua.{cls.__name__}({', '.join(args)})"
+
+    def _get_default(self, cls):
+        if cls not in self._defaults:
+            try:
+                self._defaults[cls] = cls()
+            except Exception:
+                self._defaults[cls] = None  # no default, write all fields
+        return self._defaults[cls]
+
+
+def _ns_source(idx):
+    return f"ns[{idx}]" if idx else "0"
@@ -0,0 +1,196 @@
+import logging
+import re
+from collections import defaultdict
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+
+class Query:
+    """
+    Criteria of a query over model nodes, None means any.
+    under is a nodeid, matching nodes must be below it in hierarchy
+    access is a mask of ua.AccessLevel bits matching nodes must all have
+    """
+
+    def __init__(self, nodeclass=None, datatype=None, typedef=None, under=None, namespace=None,
+                 name=None, access=None, historizing=None, missing_mandatory=False):
+        self.nodeclass = nodeclass
+        self.datatype = datatype
+        self.typedef = typedef
+        self.under = under
+        self.namespace = namespace
+        self.name = name
+        self.access = access
+        self.historizing = historizing
+        self.missing_mandatory = missing_mandatory
+
+
+class QueryIndex:
+    """
+    Indexes of model nodes on NodeClass, DataType, TypeDefinition, parent and
+    namespace, so that queries are answered without browsing the server.
+    Nodes are indexed with one batched Browse and Read per update
+    """
+
+    def __init__(self, server_mgr, type_templates):
+        self.server_mgr = server_mgr
+        self.type_templates = type_templates
+        self._nodes = {}  # nodeid -> (nodeclass, bname, datatype, typedef, parent, access, historizing)
+        self._by_class = defaultdict(set)
+        self._by_datatype = defaultdict(set)
+        self._by_typedef = defaultdict(set)
+        self._by_namespace = defaultdict(set)
+        self._children = defaultdict(set)  # parent nodeid -> nodeids
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, nodeid):
+        return nodeid in self._nodes
+
+    def clear(self):
+        self._nodes.clear()
+        self._by_class.clear()
+        self._by_datatype.clear()
+        self._by_typedef.clear()
+        self._by_namespace.clear()
+        self._children.clear()
+
+    def update(self, nodes):
+        """
+        index again added or modified nodes, nodes which do not exist anymore are removed
+        """
+        self.remove(nodes)
+        nodeids = [node.nodeid for node in nodes]
+        if not nodeids:
+            return
+        attrs = [ua.AttributeIds.NodeClass, ua.AttributeIds.BrowseName, ua.AttributeIds.DataType,
+                 ua.AttributeIds.AccessLevel, ua.AttributeIds.Historizing]
+        results, parents, typedefs = self.server_mgr.gather(
+            self.server_mgr.read_attributes_async(nodeids, attrs),
+            self.server_mgr.browse_async(nodeids, direction=ua.BrowseDirection.Inverse),
+            self.server_mgr.browse_async(nodeids, refs=ua.ObjectIds.HasTypeDefinition))
+        for nodeid, values, parent, typedef in zip(nodeids, results, parents, typedefs):
+            nclass, bname, dtype, access, historizing = [dv.Value.Value if dv.StatusCode.is_good() else None for dv in values]
+            if nclass is None:
+                continue  # node does not exist
+            entry = (
+                ua.NodeClass(nclass),
+                bname,
+                dtype,
+                typedef[0].NodeId if typedef else None,
+                parent[0].NodeId if parent else None,
+                access,
+                historizing,
+            )
+            self._add(nodeid, entry)
+
+    def _add(self, nodeid, entry):
+        nclass, _, dtype, typedef, parent, _, _ = entry
+        self._nodes[nodeid] = entry
+        self._by_class[nclass].add(nodeid)
+        self._by_namespace[nodeid.NamespaceIndex].add(nodeid)
+        if dtype is not None:
+            self._by_datatype[dtype].add(nodeid)
+        if typedef is not None:
+            self._by_typedef[typedef].add(nodeid)
+        if parent is not None:
+            self._children[parent].add(nodeid)
+
+    def remove(self, nodes):
+        for node in nodes:
+            entry = self._nodes.pop(node.nodeid, None)
+            if entry is None:
+                continue
+            nclass, _, dtype, typedef, parent, _, _ = entry
+            _discard(self._by_class, nclass, node.nodeid)
+            _discard(self._by_namespace, node.nodeid.NamespaceIndex, node.nodeid)
+            _discard(self._by_datatype, dtype, node.nodeid)
+            _discard(self._by_typedef, typedef, node.nodeid)
+            _discard(self._children, parent, node.nodeid)
+
+    def get_parent(self, nodeid):
+        entry = self._nodes.get(nodeid)
+        return entry[4] if entry else None
+
+    def is_under(self, nodeid, ancestor):
+        seen = set()
+        while nodeid is not None and nodeid not in seen:
+            if nodeid == ancestor:
+                return True
+            seen.add(nodeid)
+            nodeid = self.get_parent(nodeid)
+        return False
+
+    def run(self, query):
+        """
+        return the set of nodeids of model nodes matching query
+        """
+        candidates = []
+        if query.nodeclass is not None:
+            candidates.append(self._by_class.get(query.nodeclass, set()))
+        if query.datatype is not None:
+            candidates.append(self._by_datatype.get(query.datatype, set()))
+        if query.typedef is not None:
+            candidates.append(self._by_typedef.get(query.typedef, set()))
+        if query.namespace is not None:
+            candidates.append(self._by_namespace.get(query.namespace, set()))
+        if query.under is not None:
+            candidates.append(self._descendants(query.under))
+        if candidates:
+            candidates.sort(key=len)
+            result = set(candidates[0])
+            for other in candidates[1:]:
+                result &= other
+        else:
+            result = set(self._nodes.keys())
+
+        if query.name:
+            regex = re.compile(query.name, re.IGNORECASE)
+            result = {nodeid for nodeid in result if regex.search(self._nodes[nodeid][1].Name)}
+        if query.access:
+            result = {nodeid for nodeid in result if (self._nodes[nodeid][5] or 0) & query.access == query.access}
+        if query.historizing is not None:
+            result = {nodeid for nodeid in result if bool(self._nodes[nodeid][6]) == query.historizing}
+        if query.missing_mandatory:
+            result = {nodeid for nodeid in result if self.get_missing_mandatory(nodeid)}
+        return result
+
+    def _descendants(self, nodeid):
+        result = set()
+        level = [nodeid]
+        while level:
+            next_level = []
+            for parent in level:
+                for child in self._children.get(parent, ()):
+                    if child not in result:
+                        result.add(child)
+                        next_level.append(child)
+            level = next_level
+        return result
+
+    def get_missing_mandatory(self, nodeid):
+        """
+        return the browse names of the mandatory children declared by
+        the type of node which node does not have.
+        Placeholder declarations only describe children an instance may have
+        under other names, they are not required by name
+        """
+        nclass, _, _, typedef, _, _, _ = self._nodes[nodeid]
+        if nclass not in (ua.NodeClass.Object, ua.NodeClass.Variable) or typedef is None:
+            return []
+        template = self.type_templates.get(self.server_mgr.get_node(typedef), instantiate_optional=False)
+        declared = [rec.bname for rec in template.records.values() if rec.parent == template.nodeid
+                    and template.rules.get(rec.nodeid) != ua.NodeId(ua.ObjectIds.ModellingRule_MandatoryPlaceholder)]
+        present = {self._nodes[child][1] for child in self._children.get(nodeid, ())}
+        return [bname for bname in declared if bname not in present]
+
+
+def _discard(index, key, nodeid):
+    nodeids = index.get(key)
+    if nodeids is not None:
+        nodeids.discard(nodeid)
+        if not nodeids:
+            del index[key]
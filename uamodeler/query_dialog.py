@@ -0,0 +1,90 @@
+from PyQt5.QtWidgets import QDialog, QFormLayout, QComboBox, QLineEdit, QCheckBox, QSpinBox, QDialogButtonBox
+
+from asyncua import ua
+
+from uamodeler.query import Query
+
+
+class QueryDialog(QDialog):
+    """
+    Dialog to enter the criteria of a Query.
+    DataType and TypeDefinition are given as a NodeId string or as a
+    BrowseName from namespace 0
+    """
+
+    def __init__(self, parent, server_mgr, current_node=None):
+        QDialog.__init__(self, parent)
+        self.setWindowTitle("Query Model")
+        self.server_mgr = server_mgr
+        self.current_node = current_node
+        layout = QFormLayout(self)
+
+        self.nodeClassComboBox = QComboBox(self)
+        self.nodeClassComboBox.addItem("Any", None)
+        for nclass in ua.NodeClass:
+            if nclass != ua.NodeClass.Unspecified:
+                self.nodeClassComboBox.addItem(nclass.name, nclass)
+        layout.addRow("NodeClass", self.nodeClassComboBox)
+
+        self.dataTypeLineEdit = QLineEdit(self)
+        self.dataTypeLineEdit.setPlaceholderText("Double or ns=1;i=3001")
+        layout.addRow("DataType", self.dataTypeLineEdit)
+
+        self.typeDefinitionLineEdit = QLineEdit(self)
+        self.typeDefinitionLineEdit.setPlaceholderText("FolderType or ns=1;i=2001")
+        layout.addRow("TypeDefinition", self.typeDefinitionLineEdit)
+
+        self.nameLineEdit = QLineEdit(self)
+        self.nameLineEdit.setPlaceholderText("Regular expression")
+        layout.addRow("BrowseName", self.nameLineEdit)
+
+        self.namespaceSpinBox = QSpinBox(self)
+        self.namespaceSpinBox.setRange(-1, 65535)
+        self.namespaceSpinBox.setSpecialValueText("Any")
+        self.namespaceSpinBox.setValue(-1)
+        layout.addRow("Namespace index", self.namespaceSpinBox)
+
+        self.underCheckBox = QCheckBox("Only below current node", self)
+        self.underCheckBox.setEnabled(current_node is not None)
+        layout.addRow(self.underCheckBox)
+
+        self.historizingCheckBox = QCheckBox("Historizing", self)
+        layout.addRow(self.historizingCheckBox)
+
+        self.historyReadCheckBox = QCheckBox("AccessLevel has HistoryRead", self)
+        layout.addRow(self.historyReadCheckBox)
+
+        self.missingMandatoryCheckBox = QCheckBox("Missing mandatory children", self)
+        layout.addRow(self.missingMandatoryCheckBox)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def _get_nodeid(self, text):
+        text = text.strip()
+        if not text:
+            return None
+        if "=" in text:
+            return ua.NodeId.from_string(text)
+        if hasattr(ua.ObjectIds, text):
+            return ua.NodeId(getattr(ua.ObjectIds, text))
+        raise ValueError(f"Unknown node {text}, use a NodeId string")
+
+    def get_query(self):
+        query = Query()
+        query.nodeclass = self.nodeClassComboBox.currentData()
+        query.datatype = self._get_nodeid(self.dataTypeLineEdit.text())
+        query.typedef = self._get_nodeid(self.typeDefinitionLineEdit.text())
+        query.name = self.nameLineEdit.text() or None
+        if self.namespaceSpinBox.value() >= 0:
+            query.namespace = self.namespaceSpinBox.value()
+        if self.underCheckBox.isChecked():
+            query.under = self.current_node.nodeid
+        if self.historizingCheckBox.isChecked():
+            query.historizing = True
+        if self.historyReadCheckBox.isChecked():
+            query.access = ua.AccessLevel.HistoryRead.mask
+        query.missing_mandatory = self.missingMandatoryCheckBox.isChecked()
+        return query
@@ -0,0 +1,106 @@
+import logging
+from collections import defaultdict
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+_TYPE_CLASSES = (ua.NodeClass.ObjectType, ua.NodeClass.VariableType, ua.NodeClass.DataType, ua.NodeClass.ReferenceType)
+
+
+class ReferenceIndex:
+    """
+    Reverse references of model nodes: target -> set of (source, reftype).
+    The DataType attribute of variables is indexed like a reference with
+    reftype None, so the users of a data type are found the same way as
+    the instances of a type.
+    Nodes are indexed with batched Browse and Read requests and must be
+    indexed again when their references change
+    """
+
+    def __init__(self, server_mgr):
+        self.server_mgr = server_mgr
+        self._referrers = defaultdict(set)  # target -> set of (source, reftype)
+        self._refs = {}  # source -> set of (reftype, target), used to unindex
+        self._classes = {}  # source -> NodeClass
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __contains__(self, nodeid):
+        return nodeid in self._refs
+
+    def clear(self):
+        self._referrers.clear()
+        self._refs.clear()
+        self._classes.clear()
+
+    def get_referrers(self, nodeid):
+        """
+        return the list of (source, reftype) of indexed nodes referencing nodeid
+        """
+        return list(self._referrers.get(nodeid, ()))
+
+    def collect(self, nodeids, hierarchical):
+        """
+        return the indexed nodes needed to export nodeids on their own, in no particular order:
+        nodeids, their children, the types, data types and encodings they use
+        and the supertypes of these types, recursively.
+        hierarchical is the set of hierarchical reference types.
+        Only the index is used, no request is sent to server
+        """
+        has_subtype = ua.NodeId(ua.ObjectIds.HasSubtype)
+        has_encoding = ua.NodeId(ua.ObjectIds.HasEncoding)
+        result = set()
+        todo = [nodeid for nodeid in nodeids if nodeid in self._refs]
+        while todo:
+            nodeid = todo.pop()
+            if nodeid in result:
+                continue
+            result.add(nodeid)
+            for reftype, target in self._refs[nodeid]:
+                if target in result or target not in self._refs:
+                    continue
+                if reftype == has_subtype:
+                    continue  # subtypes are not needed by their supertype
+                if reftype in hierarchical or reftype == has_encoding or self._classes[target] in _TYPE_CLASSES:
+                    todo.append(target)
+            if self._classes[nodeid] in _TYPE_CLASSES:
+                todo.extend(source for source, reftype in self._referrers.get(nodeid, ())
+                            if reftype == has_subtype and source in self._refs)
+            # reference types used by node
+            todo.extend(reftype for reftype, _ in self._refs[nodeid] if reftype in self._refs)
+        return result
+
+    def update(self, nodes):
+        """
+        index nodes again, nodes which do not exist anymore are removed
+        """
+        self.remove(nodes)
+        nodeids = [node.nodeid for node in nodes]
+        if not nodeids:
+            return
+        refs, dtypes = self.server_mgr.gather(
+            self.server_mgr.browse_async(nodeids, refs=ua.ObjectIds.References),
+            self.server_mgr.read_attributes_async(nodeids, [ua.AttributeIds.NodeClass, ua.AttributeIds.DataType]))
+        for nodeid, node_refs, (nclass, dtype) in zip(nodeids, refs, dtypes):
+            if not nclass.StatusCode.is_good():
+                continue
+            targets = {(ref.ReferenceTypeId, ref.NodeId) for ref in node_refs if ref.IsForward}
+            if dtype.StatusCode.is_good():
+                targets.add((None, dtype.Value.Value))
+            self._refs[nodeid] = targets
+            self._classes[nodeid] = ua.NodeClass(nclass.Value.Value)
+            for reftype, target in targets:
+                self._referrers[target].add((nodeid, reftype))
+
+    def remove(self, nodes):
+        for node in nodes:
+            nodeid = node.nodeid
+            self._classes.pop(nodeid, None)
+            for reftype, target in self._refs.pop(nodeid, ()):
+                referrers = self._referrers.get(target)
+                if referrers is not None:
+                    referrers.discard((nodeid, reftype))
+                    if not referrers:
+                        del self._referrers[target]
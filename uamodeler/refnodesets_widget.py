@@ -1,17 +1,22 @@
 import os
+from collections import OrderedDict
 
-from PyQt5.QtCore import pyqtSignal, Qt, QObject
+from PyQt5.QtCore import pyqtSignal, Qt, QObject, QSettings
 from PyQt5.QtGui import QStandardItemModel, QStandardItem
-from PyQt5.QtWidgets import QMenu, QAction, QFileDialog
+from PyQt5.QtWidgets import QMenu, QAction, QFileDialog, QInputDialog
 
 
 from uawidgets.utils import trycatchslot
 
+from uamodeler.nodeset_loader import parse_nodesets, sort_nodesets
+from uamodeler.nodeset_library import NodeSetLibrary
+
 
 class RefNodeSetsWidget(QObject):
 
     error = pyqtSignal(Exception)
     nodeset_added = pyqtSignal(str)
+    nodesets_imported = pyqtSignal(list)  # emitted once after nodeset_added of each nodeset
     nodeset_removed = pyqtSignal(str)
 
     def __init__(self, view):
@@ -22,9 +27,18 @@ class RefNodeSetsWidget(QObject):
         self.nodesets = []
         self.server_mgr = None
         self.view.header().setSectionResizeMode(1)
+        self.settings = QSettings()
+        self.library = None
+        library_dir = self.settings.value("nodeset_library_dir", "")
+        if library_dir and os.path.isdir(library_dir):
+            self.library = NodeSetLibrary(library_dir)
 
         addNodeSetAction = QAction("Add Reference Node Set", self.model)
         addNodeSetAction.triggered.connect(self.add_nodeset)
+        self.addFromLibraryAction = QAction("Add Reference Node Set From Library", self.model)
+        self.addFromLibraryAction.triggered.connect(self.add_nodeset_from_library)
+        setLibraryAction = QAction("Set Node Set Library Directory", self.model)
+        setLibraryAction.triggered.connect(self.set_library_dir)
         self.removeNodeSetAction = QAction("Remove Reference Node Set", self.model)
         self.removeNodeSetAction.triggered.connect(self.remove_nodeset)
 
@@ -32,14 +46,58 @@ class RefNodeSetsWidget(QObject):
         self.view.customContextMenuRequested.connect(self.showContextMenu)
         self._contextMenu = QMenu()
         self._contextMenu.addAction(addNodeSetAction)
+        self._contextMenu.addAction(self.addFromLibraryAction)
         self._contextMenu.addAction(self.removeNodeSetAction)
+        self._contextMenu.addSeparator()
+        self._contextMenu.addAction(setLibraryAction)
 
     @trycatchslot
     def add_nodeset(self):
         path, ok = QFileDialog.getOpenFileName(self.view, caption="Import OPC UA XML Node Set", filter="XML Files (*.xml *.XML)", directory=".")
         if not ok:
             return None
-        self.import_nodeset(path)
+        self.import_nodesets(self.get_dependencies(path) + [path])
+
+    @trycatchslot
+    def set_library_dir(self):
+        directory = QFileDialog.getExistingDirectory(self.view, "Select Node Set Library Directory", self.settings.value("nodeset_library_dir", "."))
+        if not directory:
+            return
+        self.settings.setValue("nodeset_library_dir", directory)
+        self.library = NodeSetLibrary(directory)
+        self.library.refresh()
+
+    @trycatchslot
+    def add_nodeset_from_library(self):
+        if self.library is None:
+            self.set_library_dir()
+            if self.library is None:
+                return
+        self.library.refresh()
+        names = []
+        labels = []
+        for name, entry in sorted(self.library.catalog.items()):
+            if entry.get("model_uri") is None:
+                continue
+            names.append(name)
+            labels.append(self.library.describe(name))
+        if not labels:
+            raise RuntimeError(f"No node set found in library {self.library.directory}")
+        label, ok = QInputDialog.getItem(self.view, "Add Reference Node Set", "Node set:", labels, editable=False)
+        if not ok:
+            return
+        path = self.library.get_path(names[labels.index(label)])
+        self.import_nodesets(self.get_dependencies(path) + [path])
+
+    def get_dependencies(self, path):
+        """
+        return paths of the nodesets from library required by nodeset at path
+        and not already in server
+        """
+        if self.library is None:
+            return []
+        self.library.refresh()
+        return self.library.get_dependencies(path, self.server_mgr.get_namespace_array())
 
     def import_nodeset(self, path):
         print("IMPORT", path)
@@ -52,6 +110,41 @@ class RefNodeSetsWidget(QObject):
             self.error.emit(ex)
             raise
 
+        self._add_item(path)
+        self.nodesets_imported.emit([path])
+
+    def import_nodesets(self, paths, parsed=None):
+        """
+        import several nodesets, parsed in parallel processes and
+        imported in the order given by their RequiredModels.
+        parsed is a dict path -> ParsedNodeSet of nodesets already parsed
+        """
+        paths = [path for path in OrderedDict.fromkeys(paths) if os.path.basename(path) not in self.nodesets]
+        if not paths:
+            return
+        imported = []
+        try:
+            if parsed:
+                by_path = {path: parsed[path] for path in paths if path in parsed}
+                by_path.update((nodeset.path, nodeset) for nodeset in parse_nodesets([path for path in paths if path not in parsed]))
+                nodesets = sort_nodesets([by_path[path] for path in paths])
+            else:
+                nodesets = parse_nodesets(paths)
+            for nodeset in nodesets:
+                self.server_mgr.import_parsed_nodeset(nodeset)
+                if self.library is not None:
+                    self.library.set_node_count(nodeset.path, len(nodeset.node_datas))
+                self._add_item(nodeset.path)
+                imported.append(nodeset.path)
+        except Exception as ex:
+            self.error.emit(ex)
+            raise
+        finally:
+            if imported:
+                self.nodesets_imported.emit(imported)
+
+    def _add_item(self, path):
+        name = os.path.basename(path)
         item = QStandardItem(name)
         self.model.appendRow([item])
         self.nodesets.append(name)
@@ -92,4 +185,5 @@ class RefNodeSetsWidget(QObject):
             self.removeNodeSetAction.setEnabled(False)
         else:
             self.removeNodeSetAction.setEnabled(True)
+        self.addFromLibraryAction.setEnabled(self.library is not None)
         self._contextMenu.exec_(self.view.viewport().mapToGlobal(position))
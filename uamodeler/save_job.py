@@ -0,0 +1,51 @@
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    yield a temporary path, next to path, to write a file to. The file replaces
+    path when the block succeeds and is removed otherwise, so path is always
+    either the old or the new complete file
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SaveJob:
+    """
+    A snapshot of the model and the functions writing it to files.
+    Writers only use the snapshot, not the server or widgets, so
+    they can run in a worker thread while the model is edited
+    """
+
+    def __init__(self, path, edits, binary):
+        self.path = path  # path of model file, .uamodel or .uamodelb
+        self.edits = edits  # edit count of model when snapshot was taken
+        self.binary = binary
+        self.writers = []  # (path, function writing the file to the path it is given)
+        self.error = None
+
+    def add_writer(self, path, writer):
+        self.writers.append((path, writer))
+
+    def write(self):
+        """
+        write the files, each one atomically
+        """
+        for path, writer in self.writers:
+            with atomic_path(path) as tmp_path:
+                writer(tmp_path)
+            logger.info("%s saved", path)
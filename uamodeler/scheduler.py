@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+_current_lane = contextvars.ContextVar("lane", default=INTERACTIVE)  # lane of the task sending a request
+
+
+class LaneMetrics:
+    """
+    Requests of one lane: how many wait, how many were sent and how long they waited
+    """
+
+    def __init__(self):
+        self.depth = 0  # requests waiting for their turn
+        self.requests = 0  # requests sent
+        self.total_wait = 0.0  # seconds
+        self.max_wait = 0.0
+
+    @property
+    def mean_wait(self):
+        return self.total_wait / self.requests if self.requests else 0.0
+
+    def format(self):
+        return f"{self.requests} requests, {self.depth} queued, wait mean {self.mean_wait * 1000:.1f} ms, max {self.max_wait * 1000:.1f} ms"
+
+
+class RequestScheduler:
+    """
+    Two lanes for the requests sent to the server loop. Interactive requests,
+    from selection, expand and edits, are sent at once. Background requests,
+    from import, export and indexing, are sent one at a time and only when no
+    interactive request is in flight, so an interactive request never waits
+    for more than one background chunk.
+    The lane is chosen by the calling thread, interactive unless it runs in
+    a background() block. Requests of uawidgets panels do not go through
+    the scheduler but also only wait for one background chunk
+    """
+
+    def __init__(self):
+        self.metrics = {lane: LaneMetrics() for lane in LANES}
+        self._local = threading.local()
+        self._loop = None
+        self._background_slot = None
+        self._no_interactive = None
+        self._interactive = 0  # interactive requests in flight
+
+    @property
+    def lane(self):
+        return getattr(self._local, "lane", INTERACTIVE)
+
+    @contextmanager
+    def background(self):
+        """
+        send requests of calling thread in the background lane in this block
+        """
+        previous = self.lane
+        self._local.lane = BACKGROUND
+        try:
+            yield
+        finally:
+            self._local.lane = previous
+            if previous == INTERACTIVE:
+                logger.debug("Server requests: %s", self.format())
+
+    def wrap(self, coro):
+        """
+        coroutine running coro in the lane of calling thread, to be run on the server loop
+        """
+        return self._run_in_lane(self.lane, coro)
+
+    async def _run_in_lane(self, lane, coro):
+        _current_lane.set(lane)  # inherited by the tasks coro creates
+        return await coro
+
+    def _bind(self):
+        # the loop changes when a new server is started
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._background_slot = asyncio.Lock()
+            self._no_interactive = asyncio.Event()
+            self._no_interactive.set()
+            self._interactive = 0
+
+    async def send(self, request):
+        """
+        await coroutine request, a service request, in the lane of current task
+        """
+        self._bind()
+        lane = _current_lane.get()
+        metrics = self.metrics[lane]
+        start = time.monotonic()
+        metrics.depth += 1
+        if lane == INTERACTIVE:
+            self._record(metrics, start)
+            self._interactive += 1
+            self._no_interactive.clear()
+            try:
+                return await request
+            finally:
+                self._interactive -= 1
+                if not self._interactive:
+                    self._no_interactive.set()
+        try:
+            async with self._background_slot:
+                await asyncio.sleep(0)  # interactive requests posted meanwhile start first
+                await self._no_interactive.wait()
+                self._record(metrics, start)
+                start = None
+                return await request
+        finally:
+            if start is not None:  # cancelled while waiting
+                metrics.depth -= 1
+                request.close()
+
+    @staticmethod
+    def _record(metrics, start):
+        wait = time.monotonic() - start
+        metrics.depth -= 1
+        metrics.requests += 1
+        metrics.total_wait += wait
+        metrics.max_wait = max(metrics.max_wait, wait)
+
+    def format(self):
+        return "; ".join(f"{lane}: {metrics.format()}" for lane, metrics in self.metrics.items())
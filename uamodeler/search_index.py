@@ -0,0 +1,216 @@
+import bisect
+import logging
+import re
+from collections import defaultdict
+from threading import Thread
+
+from PyQt5.QtCore import pyqtSignal, QObject
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text):
+    """
+    return the lower case tokens of text: the whole text, its words and the
+    parts of its CamelCase words, so that 'MotorTemperature' is found by
+    'motor', 'temp' or 'motortemp'
+    """
+    text = text.strip()
+    if not text:
+        return set()
+    tokens = {text.lower()}
+    for word in re.split(r"[\s\.,;:/\\\-_=\[\]\(\)\"']+", text):
+        if word:
+            tokens.add(word.lower())
+            tokens.update(part.lower() for part in _WORD_RE.findall(word))
+    return tokens
+
+
+class SearchIndex(QObject):
+    """
+    In memory inverted index over BrowseName, DisplayName, Description and
+    NodeId string of all nodes of address space.
+    The full index is built in a background thread, edits done while it is
+    being built are applied once it is ready. After that nodes are indexed
+    again one batched Read at a time when they are modified
+    """
+
+    ready = pyqtSignal()
+    _built = pyqtSignal(int, object)
+
+    def __init__(self, server_mgr):
+        QObject.__init__(self)
+        self.server_mgr = server_mgr
+        self._tokens = {}  # nodeid -> tokens of node
+        self._names = {}  # nodeid -> display name, used to sort results
+        self._postings = defaultdict(set)  # token -> nodeids
+        self._sorted_tokens = None  # sorted list of tokens, for prefix lookup
+        self._generation = 0
+        self._thread = None
+        self._pending = None  # nodeids modified while index is being built
+        self._built.connect(self._set_entries)
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def is_ready(self):
+        return self._pending is None
+
+    def clear(self):
+        """
+        drop index, and results of a build in progress.
+        The thread of a build in progress is not waited for,
+        it stops at its next check of the generation
+        """
+        self._generation += 1
+        self._thread = None
+        self._pending = None
+        self._tokens.clear()
+        self._names.clear()
+        self._postings.clear()
+        self._sorted_tokens = None
+
+    def build(self, background=True):
+        """
+        index every node reachable from root
+        """
+        self.clear()
+        self._pending = set()
+        if not background:
+            self._set_entries(self._generation, self._read_all(self._generation))
+            return
+        self._thread = Thread(target=self._run, args=(self._generation,), daemon=True)
+        self._thread.start()
+
+    def _run(self, generation):
+        try:
+            with self.server_mgr.background():
+                entries = self._read_all(generation)
+        except Exception:
+            if generation == self._generation:
+                logger.exception("Building search index failed")
+            return
+        if entries is not None:
+            self._built.emit(generation, entries)
+
+    def _read_all(self, generation):
+        """
+        read entries of all nodes one depth of hierarchy at a time,
+        return None as soon as the build is cancelled by a newer one
+        """
+        entries = {}
+        level = [ua.NodeId(ua.ObjectIds.RootFolder)]
+        seen = set(level)
+        while level:
+            if generation != self._generation:
+                return None
+            entries.update(self._read_entries(level))
+            next_level = []
+            for descs in self.server_mgr.browse(level):
+                for desc in descs:
+                    if desc.NodeId not in seen:
+                        seen.add(desc.NodeId)
+                        next_level.append(desc.NodeId)
+            level = next_level
+        logger.info("Read %s nodes for search index", len(entries))
+        return entries
+
+    def _read_entries(self, nodeids):
+        attrs = [ua.AttributeIds.BrowseName, ua.AttributeIds.DisplayName, ua.AttributeIds.Description]
+        entries = {}
+        for nodeid, (bname, dname, desc) in zip(nodeids, self.server_mgr.read_attributes(nodeids, attrs)):
+            if not bname.StatusCode.is_good():
+                continue  # node does not exist
+            bname = bname.Value.Value.Name
+            dname = dname.Value.Value.Text if dname.StatusCode.is_good() and dname.Value.Value.Text else bname
+            desc = desc.Value.Value.Text if desc.StatusCode.is_good() and desc.Value.Value else None
+            entries[nodeid] = (bname, dname, desc)
+        return entries
+
+    def _set_entries(self, generation, entries):
+        if generation != self._generation:
+            return
+        self._thread = None
+        for nodeid, entry in entries.items():
+            self._add(nodeid, entry)
+        pending, self._pending = self._pending, None
+        if pending:
+            self.update([self.server_mgr.get_node(nodeid) for nodeid in pending])
+        logger.info("Search index ready, %s nodes, %s tokens", len(self._tokens), len(self._postings))
+        self.ready.emit()
+
+    def _add(self, nodeid, entry):
+        bname, dname, desc = entry
+        tokens = tokenize(bname) | tokenize(dname) | tokenize(nodeid.to_string())
+        if desc:
+            tokens |= tokenize(desc)
+        self._tokens[nodeid] = tokens
+        self._names[nodeid] = dname
+        for token in tokens:
+            self._postings[token].add(nodeid)
+        self._sorted_tokens = None
+
+    def _remove(self, nodeid):
+        for token in self._tokens.pop(nodeid, ()):
+            nodeids = self._postings[token]
+            nodeids.discard(nodeid)
+            if not nodeids:
+                del self._postings[token]
+        self._names.pop(nodeid, None)
+        self._sorted_tokens = None
+
+    def update(self, nodes):
+        """
+        index again added or modified nodes
+        """
+        nodeids = [node.nodeid for node in nodes]
+        if self._pending is not None:
+            self._pending.update(nodeids)
+            return
+        for nodeid in nodeids:
+            self._remove(nodeid)
+        for nodeid, entry in self._read_entries(nodeids).items():
+            self._add(nodeid, entry)
+
+    def remove(self, nodes):
+        if self._pending is not None:
+            self._pending.update(node.nodeid for node in nodes)
+            return
+        for node in nodes:
+            self._remove(node.nodeid)
+
+    def _prefix_match(self, term):
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings.keys())
+        result = set()
+        idx = bisect.bisect_left(self._sorted_tokens, term)
+        while idx < len(self._sorted_tokens) and self._sorted_tokens[idx].startswith(term):
+            result.update(self._postings[self._sorted_tokens[idx]])
+            idx += 1
+        return result
+
+    def search(self, text, nodeids=None, limit=None):
+        """
+        return nodeids having a token starting with each word of text,
+        sorted by display name. If nodeids is given only those nodes are matched
+        """
+        terms = [term.lower() for term in text.split()]
+        if not terms:
+            return []
+        result = None
+        for term in terms:
+            matches = self._prefix_match(term)
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+        if nodeids is not None:
+            result &= set(nodeids)
+        result = sorted(result, key=lambda nodeid: (self._names.get(nodeid, ""), nodeid.to_string()))
+        if limit is not None:
+            result = result[:limit]
+        return result
@@ -1,3 +1,4 @@
+import asyncio
 import time
 import logging
 from threading import Thread
@@ -5,10 +6,16 @@ from threading import Thread
 from PyQt5.QtCore import QSettings
 
 from asyncua import ua
-from asyncua.sync import Server, Client, XmlExporter
+from asyncua.sync import Server, Client
+
+from uamodeler.nodeset_loader import ParsedXmlImporter
+from uamodeler.xml_export import export_xml
+from uamodeler.scheduler import RequestScheduler
 
 logger = logging.getLogger(__name__)
 
+BATCH_SIZE = 1000  # maximum number of items sent in one service request
+
 OPEN62541 = True
 try:
     import open62541
@@ -20,7 +27,10 @@ except ImportError as ex:
 class ServerManager(object):
     def __init__(self, action):
         self._backend = ServerPython()
+        self._spare = None  # (endpoint, started ServerPython) of prewarm
+        self._spare_thread = None
         self._action = action
+        self.scheduler = RequestScheduler()
         self._settings = QSettings()
 
         if OPEN62541:
@@ -60,9 +70,51 @@ class ServerManager(object):
         uris.append("http//freeopcua/defaults/modeler")
         self._backend.nodes.namespace_array.write_value(uris)
 
+    def prewarm(self, endpoint):
+        """
+        start a python server for endpoint in a background thread,
+        the next start_server for that endpoint uses it instead of starting one
+        """
+        if self._spare_thread is not None or not isinstance(self._backend, ServerPython):
+            return
+        self._spare_thread = Thread(target=self._start_spare, args=(endpoint,), daemon=True)
+        self._spare_thread.start()
+
+    def _start_spare(self, endpoint):
+        backend = ServerPython()
+        try:
+            backend.start_server(endpoint)
+        except Exception as ex:
+            logger.warning("Could not prewarm server: %s", ex)
+            return
+        self._spare = (endpoint, backend)
+
+    def _take_spare(self, endpoint):
+        """
+        return the prewarmed backend if it can be used for endpoint, stop it otherwise
+        """
+        if self._spare_thread is not None:
+            self._spare_thread.join()
+            self._spare_thread = None
+        spare, self._spare = self._spare, None
+        if spare is None:
+            return None
+        if spare[0] == endpoint and isinstance(self._backend, ServerPython):
+            return spare[1]
+        spare[1].stop_server()
+        return None
+
+    def discard_prewarmed(self):
+        self._take_spare(None)
+
     def start_server(self, endpoint):
         self._action.setEnabled(False)
-        self._backend.start_server(endpoint)
+        backend = self._take_spare(endpoint)
+        if backend is not None:
+            logger.info("Using prewarmed server")
+            self._backend = backend
+        else:
+            self._backend.start_server(endpoint)
 
     def stop_server(self):
         self._backend.stop_server()
@@ -73,8 +125,39 @@ class ServerManager(object):
     def import_xml(self, path):
         return self._backend.import_xml(path)
 
-    def export_xml(self, nodes, uris, path):
-        return self._backend.export_xml(nodes, uris, path)
+    def background(self):
+        """
+        context manager sending the requests of calling thread in the background lane,
+        for import, export and indexing, see RequestScheduler
+        """
+        return self.scheduler.background()
+
+    def _run(self, coro):
+        return self._backend.run(self.scheduler.wrap(coro))
+
+    def get_address_space(self):
+        """
+        dict nodeid -> NodeData of the address space of server,
+        None if the backend does not give access to it
+        """
+        return self._backend.get_address_space()
+
+    def import_parsed_nodeset(self, nodeset):
+        """
+        import a nodeset already parsed by nodeset_loader, return nodeids of imported nodes
+        """
+        if not ParsedXmlImporter.is_supported():
+            logger.warning("XmlImporter of installed asyncua lacks the members used to import parsed nodesets, importing %s again", nodeset.path)
+            return self.import_xml(nodeset.path)
+        importer = ParsedXmlImporter(self.get_server().aio_obj, nodeset)
+        return self._run(self.scheduler.send(importer.import_nodeset()))
+
+    def export_xml(self, nodes, uris, path, max_workers=None):
+        """
+        export nodes to a NodeSet2 XML file, serialized in parallel processes
+        for large exports, see xml_export.export_xml
+        """
+        return export_xml(self, nodes, uris, path, max_workers)
 
     def load_type_definitions(self):
         return self._backend.load_type_definitions()
@@ -82,11 +165,229 @@ class ServerManager(object):
     def load_enums(self):
         return self._backend.load_enums()
 
+    def gather(self, *coros):
+        """
+        run independent coroutines of this class, read_async and browse_async for example,
+        concurrently on the server loop and return their results.
+        With a client backend their requests are on the wire at the same time
+        """
+        return self._run(_gather(coros))
+
+    async def read_async(self, nodes_to_read):
+        """
+        read a list of ReadValueId, the Read requests of all chunks are sent concurrently
+        """
+        requests = []
+        for chunk in _chunks(nodes_to_read):
+            params = ua.ReadParameters()
+            params.NodesToRead = chunk
+            requests.append(self.scheduler.send(self._backend.session.read(params)))
+        return [result for results in await asyncio.gather(*requests) for result in results]
+
+    def read(self, nodes_to_read):
+        """
+        read a list of ReadValueId using as few Read requests as possible
+        """
+        if not nodes_to_read:
+            return []
+        return self._run(self.read_async(nodes_to_read))
+
+    async def read_attributes_async(self, nodeids, attrs):
+        rvs = []
+        for nodeid in nodeids:
+            for attr in attrs:
+                rv = ua.ReadValueId()
+                rv.NodeId = nodeid
+                rv.AttributeId = attr
+                rvs.append(rv)
+        results = await self.read_async(rvs)
+        return [results[i:i + len(attrs)] for i in range(0, len(results), len(attrs))]
+
+    def read_attributes(self, nodeids, attrs):
+        """
+        read the same attributes of many nodes in batched requests
+        return one list of DataValue per nodeid
+        """
+        if not nodeids:
+            return []
+        return self._run(self.read_attributes_async(nodeids, attrs))
+
+    def write(self, nodes_to_write):
+        """
+        write a list of WriteValue using as few Write requests as possible
+        return one StatusCode per WriteValue
+        """
+        results = []
+        for chunk in _chunks(nodes_to_write):
+            params = ua.WriteParameters()
+            params.NodesToWrite = chunk
+            results.extend(self._run(self.scheduler.send(self._backend.session.write(params))))
+        return results
+
+    async def browse_async(self, nodeids, refs=ua.ObjectIds.HierarchicalReferences, direction=ua.BrowseDirection.Forward, includesubtypes=True):
+        descs = [_browse_description(nodeid, refs, direction, includesubtypes) for nodeid in nodeids]
+        requests = []
+        for chunk in _chunks(descs):
+            params = ua.BrowseParameters()
+            params.NodesToBrowse = chunk
+            requests.append(self.scheduler.send(self._backend.session.browse(params)))
+        return [res.References for results in await asyncio.gather(*requests) for res in results]
+
+    def browse(self, nodeids, refs=ua.ObjectIds.HierarchicalReferences, direction=ua.BrowseDirection.Forward, includesubtypes=True):
+        """
+        browse many nodes in batched requests
+        return one list of ReferenceDescription per nodeid
+        """
+        if not nodeids:
+            return []
+        return self._run(self.browse_async(nodeids, refs, direction, includesubtypes))
+
+    def browse_children(self, nodeid, max_refs, continuation=None, refs=ua.ObjectIds.HierarchicalReferences):
+        """
+        browse the children of nodeid through forward references of type refs at most max_refs at a time
+        return the references of the first page, or of the page following continuation,
+        and the BrowseContinuation of the next page, None after the last page
+        """
+        if continuation is None:
+            params = ua.BrowseParameters()
+            params.RequestedMaxReferencesPerNode = max_refs
+            params.NodesToBrowse = [_browse_description(nodeid, refs, ua.BrowseDirection.Forward, True)]
+            result = self._run(self.scheduler.send(self._backend.session.browse(params)))[0]
+        elif continuation.pending is not None:
+            refs, pending = continuation.pending[:max_refs], continuation.pending[max_refs:]
+            return refs, BrowseContinuation(pending=pending) if pending else None
+        else:
+            params = ua.BrowseNextParameters()
+            params.ReleaseContinuationPoints = False
+            params.ContinuationPoints = [continuation.point]
+            result = self._run(self.scheduler.send(self._backend.session.browse_next(params)))[0]
+        result.StatusCode.check()
+        refs = result.References
+        if len(refs) > max_refs:
+            # server ignores the requested maximum, the python server does, page on our side
+            return refs[:max_refs], BrowseContinuation(pending=refs[max_refs:])
+        return refs, BrowseContinuation(point=result.ContinuationPoint) if result.ContinuationPoint else None
+
+    def release_continuation(self, continuation):
+        """
+        free the continuation point kept by server for a paged browse which will not be continued
+        """
+        if continuation is None or continuation.point is None or self._backend.run is None:
+            return
+        params = ua.BrowseNextParameters()
+        params.ReleaseContinuationPoints = True
+        params.ContinuationPoints = [continuation.point]
+        try:
+            self._run(self.scheduler.send(self._backend.session.browse_next(params)))
+        except Exception as ex:
+            logger.info("Could not release continuation point: %s", ex)
+
+    def walk(self, nodeids, refs=ua.ObjectIds.HierarchicalReferences):
+        """
+        return nodeids followed by all nodes reachable from them through
+        forward references of type refs, one batched Browse per depth
+        """
+        result = list(nodeids)
+        seen = set(result)
+        level = list(result)
+        while level:
+            next_level = []
+            for descs in self.browse(level, refs=refs):
+                for desc in descs:
+                    if desc.NodeId not in seen:
+                        seen.add(desc.NodeId)
+                        next_level.append(desc.NodeId)
+            result.extend(next_level)
+            level = next_level
+        return result
+
+    def add_nodes(self, items):
+        """
+        add a list of AddNodesItem in batched requests
+        """
+        results = []
+        for chunk in _chunks(items):
+            results.extend(self._run(self.scheduler.send(self._backend.session.add_nodes(chunk))))
+        return results
+
+    def add_references(self, items):
+        """
+        add a list of AddReferencesItem in batched requests
+        """
+        results = []
+        for chunk in _chunks(items):
+            results.extend(self._run(self.scheduler.send(self._backend.session.add_references(chunk))))
+        return results
+
+    def delete_nodes(self, nodeids, delete_references=False):
+        """
+        delete a list of nodes in batched requests
+        """
+        results = []
+        for chunk in _chunks(nodeids):
+            params = ua.DeleteNodesParameters()
+            for nodeid in chunk:
+                item = ua.DeleteNodesItem()
+                item.NodeId = nodeid
+                item.DeleteTargetReferences = delete_references
+                params.NodesToDelete.append(item)
+            results.extend(self._run(self.scheduler.send(self._backend.session.delete_nodes(params))))
+        return results
+
+    def delete_references(self, items):
+        """
+        delete a list of DeleteReferencesItem in batched requests
+        """
+        results = []
+        for chunk in _chunks(items):
+            results.extend(self._run(self.scheduler.send(self._backend.session.delete_references(chunk))))
+        return results
+
+
+class BrowseContinuation:
+    """
+    Where a paged browse stopped: the continuation point of server, or the
+    references not returned yet when server does not page itself
+    """
+
+    def __init__(self, point=None, pending=None):
+        self.point = point
+        self.pending = pending
+
+    @property
+    def remaining(self):
+        """
+        number of references left, None if only server knows it
+        """
+        return len(self.pending) if self.pending is not None else None
+
+
+def _browse_description(nodeid, refs, direction, includesubtypes):
+    desc = ua.BrowseDescription()
+    desc.NodeId = nodeid
+    desc.BrowseDirection = direction
+    desc.ReferenceTypeId = ua.NodeId(refs)
+    desc.IncludeSubtypes = includesubtypes
+    desc.NodeClassMask = ua.NodeClass.Unspecified
+    desc.ResultMask = ua.BrowseResultMask.All
+    return desc
+
+
+async def _gather(coros):
+    return await asyncio.gather(*coros)
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 
 class ServerPython(object):
     def __init__(self):
         self._server = None
         self.nodes = None
+        self.session = None
+        self.run = None
         self.get_node = None
         self.get_namespace_array = None
 
@@ -103,6 +404,8 @@ class ServerPython(object):
         self.get_namespace_array = self._server.get_namespace_array
         self.load_type_definitions = self._server.load_type_definitions
         self.load_enums = self._server.load_enums
+        self.session = self._server.aio_obj.iserver.isession
+        self.run = self._server.tloop.post
         # now remove freeopcua namespace, not necessary when modeling and
         # ensures correct idx for exported nodesets
         ns_node = self._server.get_node(ua.NodeId(ua.ObjectIds.Server_NamespaceArray))
@@ -114,16 +417,18 @@ class ServerPython(object):
         if self._server is not None:
             self._server.stop()
             self._server = None
+            self.session = None
+            self.run = None
             self.get_node = None
             self.get_namespace_array = None
 
     def import_xml(self, path):
         return self._server.import_xml(path)
 
-    def export_xml(self, nodes, uris, path):
-        exp = XmlExporter(self._server)
-        exp.build_etree(nodes, uris=uris)
-        exp.write_xml(path)
+    def get_address_space(self):
+        if self._server is None:
+            return None
+        return self._server.aio_obj.iserver.aspace._nodes
 
 
 class UAServer(Thread):
@@ -148,6 +453,8 @@ class ServerC(object):
         self._server = None
         self._client = None
         self.nodes = None
+        self.session = None
+        self.run = None
         self.get_node = None
         self.get_namespace_array = None
 
@@ -167,6 +474,8 @@ class ServerC(object):
         self.nodes = self._client.nodes
         self.get_node = self._client.get_node
         self.get_namespace_array = self._client.get_namespace_array
+        self.session = self._client.aio_obj.uaclient
+        self.run = self._client.tloop.post
         # now remove freeopcua namespace, not necessary when modeling and
         # ensures correct idx for exported nodesets
         ns_node = self._client.get_node(ua.NodeId(ua.ObjectIds.Server_NamespaceArray))
@@ -180,14 +489,15 @@ class ServerC(object):
             self._server.stop()
             time.sleep(0.2)
             self._server = None
+            self.session = None
+            self.run = None
             self.get_node = None
             self.get_namespace_array = None
 
     def import_xml(self, path):
         return self._client.import_xml(path)
 
-    def export_xml(self, nodes, uris, path):
-        exp = XmlExporter(self._client)
-        exp.build_etree(nodes, uris=uris)
-        exp.write_xml(path)
+    def get_address_space(self):
+        return None  # address space is in the C server
+
 
@@ -0,0 +1,290 @@
+import copy
+import logging
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+# inverse references of a node which do not make their source a parent of the node
+_NOT_PARENT_REFS = (
+    ua.NodeId(ua.ObjectIds.HasTypeDefinition),
+    ua.NodeId(ua.ObjectIds.HasModellingRule),
+)
+
+
+class NodeRecord:
+    """
+    Everything needed to recreate one node of a subtree
+    """
+
+    def __init__(self, nodeid, parent, reftype):
+        self.nodeid = nodeid
+        self.parent = parent  # nodeid of parent in snapshot, None for root
+        self.reftype = reftype  # reference type from parent
+        self.bname = None
+        self.nodeclass = None
+        self.typedef = ua.NodeId()
+        self.attrs = None
+        self.refs = []  # other forward references as (reftype, target)
+
+
+class SubtreeSnapshot:
+    """
+    Read a node and its hierarchical children once, using batched Browse
+    and Read requests. The subtree can then be recreated any number of
+    times with AddNodes and AddReferences requests, NodeIds are generated
+    by server and references between nodes of the subtree are rewritten
+    to point to the new nodes
+    """
+
+    def __init__(self, server_mgr, node):
+        self.server_mgr = server_mgr
+        self.nodeid = node.nodeid
+        self.levels = []  # records grouped by depth, root first
+        self.records = {}
+        self._read()
+
+    def __len__(self):
+        return len(self.records)
+
+    def _read(self):
+        root = NodeRecord(self.nodeid, None, None)
+        self.records[root.nodeid] = root
+        level = [root]
+        while level:
+            self.levels.append(level)
+            nodeids = [rec.nodeid for rec in level]
+            childs, others = self.server_mgr.gather(
+                self.server_mgr.browse_async(nodeids),
+                self.server_mgr.browse_async(nodeids, refs=ua.ObjectIds.NonHierarchicalReferences))
+            next_level = []
+            for rec, descs, refs in zip(level, childs, others):
+                for ref in refs:
+                    if ref.ReferenceTypeId == ua.NodeId(ua.ObjectIds.HasTypeDefinition):
+                        rec.typedef = ref.NodeId
+                    else:
+                        rec.refs.append((ref.ReferenceTypeId, ref.NodeId))
+                for desc in descs:
+                    if desc.NodeId in self.records:
+                        # node has several parents in subtree, only create it once
+                        rec.refs.append((desc.ReferenceTypeId, desc.NodeId))
+                        continue
+                    child = NodeRecord(desc.NodeId, rec.nodeid, desc.ReferenceTypeId)
+                    self.records[child.nodeid] = child
+                    next_level.append(child)
+            level = next_level
+        self._read_attributes()
+
+    def _read_attributes(self):
+        records = list(self.records.values())
+        results = self.server_mgr.read_attributes([rec.nodeid for rec in records],
+                                                  [ua.AttributeIds.NodeClass, ua.AttributeIds.BrowseName])
+        for rec, (nclass, bname) in zip(records, results):
+            rec.nodeclass = ua.NodeClass(nclass.Value.Value)
+            rec.bname = bname.Value.Value
+            rec.attrs = getattr(ua, rec.nodeclass.name + "Attributes")()
+        read_node_attributes(self.server_mgr, records)
+
+    def paste(self, parent, count=1):
+        """
+        Recreate the subtree count times under parent
+        return the list of added nodes
+        """
+        if parent.read_type_definition() == ua.NodeId(ua.ObjectIds.FolderType):
+            root_reftype = ua.NodeId(ua.ObjectIds.Organizes)
+        else:
+            root_reftype = ua.NodeId(ua.ObjectIds.HasComponent)
+        return self._add_copies(parent, root_reftype, [None] * count)
+
+    def _add_copies(self, parent, root_reftype, roots):
+        """
+        add one copy of the subtree per element of roots
+        an element of roots is None or a (nodeid, bname, dname) tuple
+        overriding the values of the root node of that copy
+        """
+        copies = [{} for _ in roots]  # one dict old nodeid -> new nodeid per copy
+        added = []
+        # all nodes of one depth are added in the same requests, for all copies
+        for level in self.levels:
+            items = []
+            for mapping, root in zip(copies, roots):
+                for rec in level:
+                    if rec.parent is None:
+                        item = self._make_add_item(rec, parent.nodeid, root_reftype, self._child_nodeid(rec, parent.nodeid))
+                        if root is not None:
+                            nodeid, bname, dname = root
+                            if nodeid is not None:
+                                item.RequestedNewNodeId = nodeid
+                            if bname is not None:
+                                item.BrowseName = bname
+                            if dname is not None:
+                                item.NodeAttributes = copy.copy(rec.attrs)
+                                item.NodeAttributes.DisplayName = dname
+                    else:
+                        parentid = mapping[rec.parent]
+                        item = self._make_add_item(rec, parentid, rec.reftype, self._child_nodeid(rec, parentid))
+                    items.append(item)
+            results = iter(self.server_mgr.add_nodes(items))
+            for mapping in copies:
+                for rec in level:
+                    res = next(results)
+                    res.StatusCode.check()
+                    mapping[rec.nodeid] = res.AddedNodeId
+                    added.append(res.AddedNodeId)
+        refs = []
+        for mapping in copies:
+            for rec in self.records.values():
+                for reftype, target in rec.refs:
+                    refs.extend(_make_ref_items(mapping[rec.nodeid], reftype, mapping.get(target, target)))
+        for res in self.server_mgr.add_references(refs):
+            res.check()
+        return [self.server_mgr.get_node(nodeid) for nodeid in added]
+
+    def _child_nodeid(self, rec, parentid):
+        """
+        NodeId requested for the copy of rec added under parentid
+        """
+        return ua.NodeId(NamespaceIndex=rec.nodeid.NamespaceIndex)
+
+    @staticmethod
+    def _make_add_item(rec, parentid, reftype, nodeid):
+        item = ua.AddNodesItem()
+        item.RequestedNewNodeId = nodeid
+        item.BrowseName = rec.bname
+        item.ParentNodeId = parentid
+        item.ReferenceTypeId = reftype
+        item.TypeDefinition = rec.typedef
+        item.NodeClass = rec.nodeclass
+        item.NodeAttributes = rec.attrs
+        return item
+
+
+def read_node_records(server_mgr, nodeids):
+    """
+    read nodes with batched requests and return a dict nodeid -> NodeRecord,
+    their references which are not created by AddNodes, as
+    (source, reftype, target, forward) tuples, and the opposite references
+    expected to be stored in nodes which are not in nodeids
+    """
+    nodeset = set(nodeids)
+    records = {}
+    parents, allrefs = server_mgr.gather(
+        server_mgr.browse_async(nodeids, direction=ua.BrowseDirection.Inverse),
+        server_mgr.browse_async(nodeids, refs=ua.ObjectIds.References, direction=ua.BrowseDirection.Both))
+    orphans = [nodeid for nodeid, parent in zip(nodeids, parents) if not parent]
+    if orphans:
+        # nodes only referenced non hierarchically, encodings of a DataType for example,
+        # are added with that reference
+        orphan_parents = dict(zip(orphans, server_mgr.browse(orphans, refs=ua.ObjectIds.NonHierarchicalReferences, direction=ua.BrowseDirection.Inverse)))
+    for nodeid, parent in zip(nodeids, parents):
+        if not parent:
+            parent = [desc for desc in orphan_parents[nodeid] if desc.ReferenceTypeId not in _NOT_PARENT_REFS]
+        if parent:
+            records[nodeid] = NodeRecord(nodeid, parent[0].NodeId, parent[0].ReferenceTypeId)
+        else:
+            records[nodeid] = NodeRecord(nodeid, None, None)
+    refs = []
+    outside = []
+    for nodeid, node_refs in zip(nodeids, allrefs):
+        rec = records[nodeid]
+        for ref in node_refs:
+            if ref.ReferenceTypeId == ua.NodeId(ua.ObjectIds.HasTypeDefinition) and ref.IsForward:
+                rec.typedef = ref.NodeId
+            elif not ref.IsForward and ref.NodeId == rec.parent and ref.ReferenceTypeId == rec.reftype:
+                pass  # added by AddNodes
+            elif ref.IsForward and ref.NodeId in nodeset and records[ref.NodeId].parent == nodeid \
+                    and records[ref.NodeId].reftype == ref.ReferenceTypeId:
+                pass  # added by AddNodes of child
+            else:
+                refs.append((nodeid, ref.ReferenceTypeId, ref.NodeId, ref.IsForward))
+            if ref.NodeId not in nodeset:
+                opposite = (ref.NodeId, ref.ReferenceTypeId, nodeid, not ref.IsForward)
+                if not (opposite[3] and ref.NodeId == rec.parent and ref.ReferenceTypeId == rec.reftype):
+                    outside.append(opposite)
+    results = server_mgr.read_attributes(nodeids, [ua.AttributeIds.NodeClass, ua.AttributeIds.BrowseName])
+    for nodeid, (nclass, bname) in zip(nodeids, results):
+        rec = records[nodeid]
+        rec.nodeclass = ua.NodeClass(nclass.Value.Value)
+        rec.bname = bname.Value.Value
+        rec.attrs = getattr(ua, rec.nodeclass.name + "Attributes")()
+    read_node_attributes(server_mgr, list(records.values()))
+    return records, refs, outside
+
+
+def group_by_depth(records):
+    """
+    return records grouped in lists by depth so that parents come before their children,
+    records is a dict nodeid -> NodeRecord, parents not in records are at depth -1
+    """
+    depth = {}
+
+    def get_depth(nodeid):
+        path = []
+        while nodeid in records and nodeid not in depth and nodeid not in path:
+            path.append(nodeid)
+            nodeid = records[nodeid].parent
+        base = depth.get(nodeid, -1)
+        for node in reversed(path):
+            base += 1
+            depth[node] = base
+        return depth[path[0]] if path else base
+
+    levels = []
+    for nodeid, rec in records.items():
+        level = get_depth(nodeid)
+        while len(levels) <= level:
+            levels.append([])
+        levels[level].append(rec)
+    return levels
+
+
+def read_node_attributes(server_mgr, records):
+    """
+    fill the attrs struct of records with the attributes of their nodeid
+    using batched Read requests. Attributes which cannot be read are not
+    set and not marked in SpecifiedAttributes
+    """
+    rvs = []
+    names = []
+    for rec in records:
+        rec.attrs.SpecifiedAttributes = 0
+        attr_names = _attribute_names(rec.attrs)
+        names.append(attr_names)
+        for name in attr_names:
+            rv = ua.ReadValueId()
+            rv.NodeId = rec.nodeid
+            rv.AttributeId = getattr(ua.AttributeIds, name)
+            rvs.append(rv)
+    results = iter(server_mgr.read(rvs))
+    for rec, attr_names in zip(records, names):
+        for name in attr_names:
+            dv = next(results)
+            if not dv.StatusCode.is_good():
+                logger.debug("Could not read attribute %s of %s: %s", name, rec.nodeid, dv.StatusCode)
+                continue
+            if name == "Value":
+                setattr(rec.attrs, name, dv.Value)
+            else:
+                setattr(rec.attrs, name, dv.Value.Value)
+            rec.attrs.SpecifiedAttributes |= getattr(ua.NodeAttributesMask, name)
+
+
+def _attribute_names(attrs):
+    return [name for name in attrs.__dict__.keys() if not name.startswith("_") and name not in (
+        "BodyLength", "TypeId", "SpecifiedAttributes", "Encoding", "data_type",
+    )]
+
+
+def _make_ref_items(source, reftype, target):
+    """
+    return forward and inverse AddReferencesItem, as Node.add_reference does
+    """
+    items = []
+    for forward in (True, False):
+        item = ua.AddReferencesItem()
+        item.SourceNodeId = source if forward else target
+        item.TargetNodeId = target if forward else source
+        item.ReferenceTypeId = reftype
+        item.IsForward = forward
+        items.append(item)
+    return items
@@ -0,0 +1,167 @@
+import logging
+
+from asyncua import ua
+
+from uamodeler.subtree import SubtreeSnapshot, NodeRecord, read_node_attributes
+
+logger = logging.getLogger(__name__)
+
+
+_INSTANCE_CLASSES = {
+    ua.NodeClass.Object: ua.NodeClass.Object,
+    ua.NodeClass.ObjectType: ua.NodeClass.Object,
+    ua.NodeClass.Variable: ua.NodeClass.Variable,
+    ua.NodeClass.VariableType: ua.NodeClass.Variable,
+    ua.NodeClass.Method: ua.NodeClass.Method,
+    ua.NodeClass.DataType: ua.NodeClass.DataType,
+}
+
+_OPTIONAL_RULES = (
+    ua.NodeId(ua.ObjectIds.ModellingRule_Optional),
+    ua.NodeId(ua.ObjectIds.ModellingRule_OptionalPlaceholder),
+)
+
+
+class TypeTemplate(SubtreeSnapshot):
+    """
+    The resolved instance declaration tree of a type: the children with a
+    modelling rule of the type and of its supertypes, recursively, as
+    instantiate() of python-asyncua would create them.
+    Everything is read once, instances are then created with batched
+    AddNodes requests
+    """
+
+    def __init__(self, server_mgr, node_type, instantiate_optional=True):
+        self.instantiate_optional = instantiate_optional
+        self.depends = set()  # type hierarchy and declarations, a change to them invalidates template
+        self.rules = {}  # nodeid of declaration -> nodeid of its modelling rule
+        SubtreeSnapshot.__init__(self, server_mgr, node_type)
+
+    def _read(self):
+        supertypes = self._read_supertypes()
+        self.depends.update(supertypes)
+        root = NodeRecord(self.nodeid, None, None)
+        root.typedef = self.nodeid
+        self.records[root.nodeid] = root
+        # declarations of root are children of the type and its supertypes,
+        # a child of a subtype overrides a child with same browse name in a supertype
+        level = [(root, supertypes)]
+        while level:
+            self.levels.append([rec for rec, _ in level])
+            browsed = [nodeid for _, nodeids in level for nodeid in nodeids]
+            results = iter(self.server_mgr.browse(browsed))
+            candidates = []
+            for rec, nodeids in level:
+                bnames = set()
+                for _ in nodeids:
+                    for desc in next(results):
+                        if desc.ReferenceTypeId == ua.NodeId(ua.ObjectIds.HasSubtype):
+                            continue
+                        if desc.BrowseName in bnames or desc.NodeId in self.records:
+                            continue
+                        bnames.add(desc.BrowseName)
+                        candidates.append((rec, desc))
+            rules = self.server_mgr.browse([desc.NodeId for _, desc in candidates], refs=ua.ObjectIds.HasModellingRule)
+            next_level = []
+            for (rec, desc), rule in zip(candidates, rules):
+                if not rule:
+                    # spec says to ignore nodes without modelling rules
+                    continue
+                if rule[0].NodeId in _OPTIONAL_RULES and not self.instantiate_optional:
+                    continue
+                child = NodeRecord(desc.NodeId, rec.nodeid, desc.ReferenceTypeId)
+                child.bname = desc.BrowseName
+                child.typedef = desc.TypeDefinition
+                self.records[child.nodeid] = child
+                self.rules[child.nodeid] = rule[0].NodeId
+                self.depends.add(child.nodeid)
+                # declarations are instances, they have no supertypes
+                next_level.append((child, [child.nodeid]))
+            level = next_level
+        self._read_attributes()
+
+    def _read_supertypes(self):
+        supertypes = [self.nodeid]
+        while True:
+            descs = self.server_mgr.browse([supertypes[-1]], refs=ua.ObjectIds.HasSubtype, direction=ua.BrowseDirection.Inverse)[0]
+            if not descs:
+                break
+            supertypes.append(descs[0].NodeId)
+        if len(supertypes) > 1:
+            supertypes.pop()  # skip base type, as python-asyncua does
+        return supertypes
+
+    def _read_attributes(self):
+        records = list(self.records.values())
+        results = self.server_mgr.read_attributes([rec.nodeid for rec in records],
+                                                  [ua.AttributeIds.NodeClass, ua.AttributeIds.BrowseName])
+        for rec, (nclass, bname) in zip(records, results):
+            nclass = ua.NodeClass(nclass.Value.Value)
+            if nclass not in _INSTANCE_CLASSES:
+                raise RuntimeError(f"Instantiate: Node class not supported: {nclass}")
+            rec.nodeclass = _INSTANCE_CLASSES[nclass]
+            if rec.bname is None:
+                rec.bname = bname.Value.Value
+            rec.attrs = getattr(ua, rec.nodeclass.name + "Attributes")()
+        read_node_attributes(self.server_mgr, records)
+        for rec in records:
+            if rec.nodeclass == ua.NodeClass.Object and not rec.attrs.SpecifiedAttributes & ua.NodeAttributesMask.EventNotifier:
+                # an ObjectType has no EventNotifier, instances get the default as with instantiate() of python-asyncua
+                rec.attrs.EventNotifier = 0
+                rec.attrs.SpecifiedAttributes |= ua.NodeAttributesMask.EventNotifier
+
+    def _child_nodeid(self, rec, parentid):
+        # same NodeId generation as instantiate() of python-asyncua
+        if rec.parent is not None and parentid.NodeIdType == ua.NodeIdType.String:
+            return ua.NodeId(f"{parentid.Identifier}.{rec.bname.Name}", parentid.NamespaceIndex)
+        return ua.NodeId(NamespaceIndex=parentid.NamespaceIndex)
+
+    def instantiate(self, parent, roots):
+        """
+        create one instance of type per (nodeid, bname, dname) tuple in roots
+        return the list of added nodes
+        """
+        if parent.read_type_definition() == ua.NodeId(ua.ObjectIds.FolderType):
+            root_reftype = ua.NodeId(ua.ObjectIds.Organizes)
+        else:
+            root_reftype = ua.NodeId(ua.ObjectIds.HasComponent)
+        return self._add_copies(parent, root_reftype, roots)
+
+
+class TypeTemplateCache:
+    """
+    Cache of TypeTemplate per type. A template is invalidated when one of
+    the nodes it was built from, the type, its supertypes or one of the
+    declarations, is modified, or when a node is added to or deleted from them
+    """
+
+    def __init__(self, server_mgr):
+        self.server_mgr = server_mgr
+        self._templates = {}
+
+    def get(self, node_type, instantiate_optional=True):
+        key = (node_type.nodeid, instantiate_optional)
+        template = self._templates.get(key)
+        if template is None:
+            logger.info("Building instantiation template for %s", node_type)
+            template = TypeTemplate(self.server_mgr, node_type, instantiate_optional)
+            self._templates[key] = template
+        return template
+
+    def invalidate(self, *nodeids):
+        """
+        invalidate the templates depending on nodeids or on one of their parents,
+        call it before deleting nodes, their parents are not found afterwards
+        """
+        if not self._templates or not nodeids:
+            return
+        changed = set(nodeids)
+        for descs in self.server_mgr.browse(list(nodeids), direction=ua.BrowseDirection.Inverse):
+            changed.update(desc.NodeId for desc in descs)
+        for key, template in list(self._templates.items()):
+            if not changed.isdisjoint(template.depends):
+                logger.info("Invalidating instantiation template for %s", key[0])
+                del self._templates[key]
+
+    def clear(self):
+        self._templates.clear()
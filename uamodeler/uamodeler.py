@@ -5,28 +5,38 @@ import os
 import logging
 
 from PyQt5.QtCore import QTimer, QSettings, QModelIndex, Qt, QCoreApplication, QObject, pyqtSignal
-from PyQt5.QtGui import QIcon, QFont
-from PyQt5.QtWidgets import QMainWindow, QApplication, QFileDialog, QMessageBox, QStyledItemDelegate, QMenu, QAction
+from PyQt5.QtGui import QIcon, QFont, QFontDatabase
+from PyQt5.QtWidgets import QMainWindow, QApplication, QFileDialog, QMessageBox, QStyledItemDelegate, QMenu, QAction, QInputDialog, \
+    QDialog, QVBoxLayout, QPlainTextEdit
 
 
 from asyncua import ua
 
 from uawidgets import resources
 from uawidgets.attrs_widget import AttrsWidget
-from uawidgets.tree_widget import TreeWidget
-from uawidgets.refs_widget import RefsWidget
 from uawidgets.new_node_dialogs import NewNodeBaseDialog, NewUaObjectDialog, NewUaVariableDialog, NewUaMethodDialog
 from uawidgets.utils import trycatchslot
-from uawidgets.logger import QtHandler
 
 from uamodeler.uamodeler_ui import Ui_UaModeler
 from uamodeler.namespace_widget import NamespaceWidget
 from uamodeler.refnodesets_widget import RefNodeSetsWidget
+from uamodeler.problems_widget import ProblemsWidget
+from uamodeler.node_list_widget import NodeListWidget
+from uamodeler.paged_tree import PagedTreeWidget
+from uamodeler.virtual_refs import VirtualRefsWidget
+from uamodeler.log_view import BufferedQtHandler
 from uamodeler.model_manager import ModelManager
+from uamodeler.query_dialog import QueryDialog
+from uamodeler.diff_dialog import DiffDialog
+from uamodeler.bulk_dialog import BulkCreateDialog
+from uamodeler.bulk_import import read_table
+from uamodeler.bulk_edit import EDITABLE_ATTRIBUTES, MODELLING_RULES, ACCESS_LEVELS, parse_attribute_value
 
 
 logger = logging.getLogger(__name__)
 
+SEARCH_LIMIT = 1000  # maximum number of search results shown
+
 
 class BoldDelegate(QStyledItemDelegate):
 
@@ -60,10 +70,14 @@ class ActionsManager:
         self.ui.actionCopy.triggered.connect(self.model_mgr.copy)
         self.ui.actionQuit.triggered.connect(self.window.close)
         self.ui.actionPaste.triggered.connect(self.model_mgr.paste)
+        self.ui.actionPasteMany.triggered.connect(self.model_mgr.paste_many)
         self.ui.actionDelete.triggered.connect(self.model_mgr.delete)
         self.ui.actionImport.triggered.connect(self.model_mgr.import_xml)
         self.ui.actionSave.triggered.connect(self.model_mgr.save)
         self.ui.actionSaveAs.triggered.connect(self.model_mgr.save_as)
+        self.ui.actionExportXml.triggered.connect(self.model_mgr.export_xml)
+        self.ui.actionExportSelection.triggered.connect(self.model_mgr.export_selection)
+        self.ui.actionExportPython.triggered.connect(self.model_mgr.export_python)
         self.ui.actionCloseModel.triggered.connect(self.model_mgr.close_model)
         self.ui.actionAddObjectType.triggered.connect(self.model_mgr.add_object_type)
         self.ui.actionAddObject.triggered.connect(self.model_mgr.add_object)
@@ -73,6 +87,19 @@ class ActionsManager:
         self.ui.actionAddVariable.triggered.connect(self.model_mgr.add_variable)
         self.ui.actionAddVariableType.triggered.connect(self.model_mgr.add_variable_type)
         self.ui.actionAddProperty.triggered.connect(self.model_mgr.add_property)
+        self.ui.actionBulkCreate.triggered.connect(self.model_mgr.bulk_create)
+        # variables can be created from a file wherever they can be added one by one
+        self.ui.actionAddVariable.changed.connect(lambda: self.ui.actionBulkCreate.setEnabled(self.ui.actionAddVariable.isEnabled()))
+        self.ui.actionValidate.triggered.connect(self.model_mgr.validate)
+        self.ui.actionFindUsages.triggered.connect(self.model_mgr.find_usages)
+        self.ui.actionFind.triggered.connect(self.model_mgr.show_search)
+        self.ui.actionQuery.triggered.connect(self.model_mgr.query)
+        self.ui.actionMemoryReport.triggered.connect(self.model_mgr.memory_report)
+        self.ui.actionCompare.triggered.connect(self.model_mgr.compare_with)
+        self.ui.actionSetAttribute.triggered.connect(self.model_mgr.set_attribute)
+        self.ui.actionSetModellingRule.triggered.connect(self.model_mgr.set_modelling_rule)
+        self.ui.actionRename.triggered.connect(self.model_mgr.rename)
+        self.ui.actionSetAccessLevel.triggered.connect(self.model_mgr.set_access_level)
 
         self.disable_all_actions()
 
@@ -82,6 +109,7 @@ class ActionsManager:
         self.ui.actionOpen.setIcon(QIcon(":/open.svg"))
         self.ui.actionCopy.setIcon(QIcon(":/copy.svg"))
         self.ui.actionPaste.setIcon(QIcon(":/paste.svg"))
+        self.ui.actionPasteMany.setIcon(QIcon(":/paste.svg"))
         self.ui.actionDelete.setIcon(QIcon(":/delete.svg"))
         self.ui.actionSave.setIcon(QIcon(":/save.svg"))
         self.ui.actionAddFolder.setIcon(QIcon(":/folder.svg"))
@@ -109,7 +137,8 @@ class ActionsManager:
         typedefinition = node.read_type_definition()
 
         self.ui.actionCopy.setEnabled(True)
-        self.ui.actionDelete.setEnabled(True)
+        self.ui.actionFindUsages.setEnabled(True)
+        self.enable_selection_actions()
 
         if typedefinition == ua.NodeId(ua.ObjectIds.PropertyType):
             return
@@ -120,6 +149,7 @@ class ActionsManager:
             return
 
         self.ui.actionPaste.setEnabled(True)
+        self.ui.actionPasteMany.setEnabled(True)
 
         if self.model_mgr.get_current_server().nodes.base_object_type in path:
             self.ui.actionAddObjectType.setEnabled(True)
@@ -141,10 +171,27 @@ class ActionsManager:
         self.ui.actionAddProperty.setEnabled(True)
         self.ui.actionAddMethod.setEnabled(True)
 
+    def enable_selection_actions(self):
+        """
+        enable actions applying to the selected nodes
+        """
+        self.ui.actionDelete.setEnabled(True)
+        self.ui.actionExportSelection.setEnabled(True)
+        self.ui.actionSetAttribute.setEnabled(True)
+        self.ui.actionSetModellingRule.setEnabled(True)
+        self.ui.actionRename.setEnabled(True)
+        self.ui.actionSetAccessLevel.setEnabled(True)
+
     def disable_model_actions(self):
         self.ui.actionImport.setEnabled(False)
+        self.ui.actionValidate.setEnabled(False)
+        self.ui.actionQuery.setEnabled(False)
+        self.ui.actionMemoryReport.setEnabled(False)
+        self.ui.actionCompare.setEnabled(False)
         self.ui.actionSave.setEnabled(False)
         self.ui.actionSaveAs.setEnabled(False)
+        self.ui.actionExportXml.setEnabled(False)
+        self.ui.actionExportPython.setEnabled(False)
 
     def disable_all_actions(self):
         self.disable_add_actions()
@@ -152,8 +199,15 @@ class ActionsManager:
 
     def disable_add_actions(self):
         self.ui.actionPaste.setEnabled(False)
+        self.ui.actionPasteMany.setEnabled(False)
         self.ui.actionCopy.setEnabled(False)
         self.ui.actionDelete.setEnabled(False)
+        self.ui.actionFindUsages.setEnabled(False)
+        self.ui.actionExportSelection.setEnabled(False)
+        self.ui.actionSetAttribute.setEnabled(False)
+        self.ui.actionSetModellingRule.setEnabled(False)
+        self.ui.actionRename.setEnabled(False)
+        self.ui.actionSetAccessLevel.setEnabled(False)
         self.ui.actionAddObject.setEnabled(False)
         self.ui.actionAddFolder.setEnabled(False)
         self.ui.actionAddVariable.setEnabled(False)
@@ -165,8 +219,14 @@ class ActionsManager:
 
     def enable_model_actions(self):
         self.ui.actionImport.setEnabled(True)
+        self.ui.actionValidate.setEnabled(True)
+        self.ui.actionQuery.setEnabled(True)
+        self.ui.actionMemoryReport.setEnabled(True)
+        self.ui.actionCompare.setEnabled(True)
         self.ui.actionSave.setEnabled(True)
         self.ui.actionSaveAs.setEnabled(True)
+        self.ui.actionExportXml.setEnabled(True)
+        self.ui.actionExportPython.setEnabled(True)
 
 
 class ModelManagerUI(QObject):
@@ -177,6 +237,7 @@ class ModelManagerUI(QObject):
 
     error = pyqtSignal(Exception)
     titleChanged = pyqtSignal(str)
+    saved = pyqtSignal(str)
 
     def __init__(self, modeler):
         QObject.__init__(self)
@@ -184,6 +245,8 @@ class ModelManagerUI(QObject):
         self._model_mgr = ModelManager(modeler)
         self._model_mgr.error.connect(self.error)
         self._model_mgr.titleChanged.connect(self.titleChanged)
+        self._model_mgr.saved.connect(self.saved)
+        self._model_mgr.search_index.ready.connect(self.search)
         self.settings = QSettings()
         self._last_model_dir = self.settings.value("last_model_dir", ".")
         self._copy_clipboard = None
@@ -205,8 +268,13 @@ class ModelManagerUI(QObject):
 
     @trycatchslot
     def delete(self):
-        node = self.modeler.get_current_node()
-        self._model_mgr.delete_node(node)
+        if not self.modeler.is_results_selection():
+            node = self.modeler.get_current_node()
+            self._model_mgr.delete_node(node)
+            return
+        deleted = self._model_mgr.delete_nodes(self.modeler.get_selected_nodes())
+        self.modeler.results_ui.remove_nodeids([node.nodeid for node in deleted])
+        self.modeler.tree_ui.reload()
 
     @trycatchslot
     def copy(self):
@@ -219,11 +287,108 @@ class ModelManagerUI(QObject):
         if self._copy_clipboard:
             self._model_mgr.paste_node(self._copy_clipboard)
 
+    @trycatchslot
+    def paste_many(self):
+        if not self._copy_clipboard:
+            return
+        count, ok = QInputDialog.getInt(self.modeler, "Paste N Times", "Number of copies:", 2, 1, 100000)
+        if ok:
+            self._model_mgr.paste_node(self._copy_clipboard, count)
+
     @trycatchslot
     def close_model(self):
         self.try_close_model()
 
+    @trycatchslot
+    def validate(self):
+        self._model_mgr.validate()
+
+    def show_search(self):
+        self.modeler.ui.resultsDock.show()
+        self.modeler.ui.resultsDock.raise_()
+        self.modeler.ui.searchLineEdit.setFocus()
+        self.modeler.ui.searchLineEdit.selectAll()
+
+    @trycatchslot
+    def search(self, *args):
+        text = self.modeler.ui.searchLineEdit.text()
+        if not text.strip() or not self._model_mgr.server_mgr.get_server():
+            self.modeler.results_ui.clear()
+            self.modeler.ui.resultsDock.setWindowTitle("Results")
+            return
+        new_nodes_only = self.modeler.ui.searchNewNodesCheckBox.isChecked()
+        nodes = self._model_mgr.search(text, new_nodes_only, limit=SEARCH_LIMIT)
+        self.modeler.results_ui.set_nodes(self._model_mgr.server_mgr, [(node.nodeid, "") for node in nodes])
+        self.modeler.ui.resultsDock.setWindowTitle(f"Search results ({len(nodes)})")
+
+    @trycatchslot
+    def show_first_result(self):
+        nodeids = self.modeler.results_ui.get_nodeids()
+        if nodeids:
+            self.modeler.show_node(nodeids[0])
+
+    @trycatchslot
+    def query(self):
+        dia = QueryDialog(self.modeler, self._model_mgr.server_mgr, self.modeler.get_current_node())
+        if not dia.exec_():
+            return
+        query = dia.get_query()
+        nodes = self._model_mgr.query(query)
+        index = self._model_mgr.query_index
+        rows = []
+        for node in nodes:
+            if query.missing_mandatory:
+                details = "Missing " + ", ".join(bname.to_string() for bname in index.get_missing_mandatory(node.nodeid))
+            else:
+                details = ""
+            rows.append((node.nodeid, details))
+        self.modeler.results_ui.set_nodes(self._model_mgr.server_mgr, rows)
+        self.modeler.ui.resultsDock.setWindowTitle(f"Query results ({len(rows)})")
+        self.modeler.ui.resultsDock.show()
+        self.modeler.ui.resultsDock.raise_()
+
+    @trycatchslot
+    def memory_report(self):
+        report = self._model_mgr.memory_report()
+        dia = QDialog(self.modeler)
+        dia.setWindowTitle("Memory Report")
+        layout = QVBoxLayout(dia)
+        text = QPlainTextEdit(dia)
+        text.setReadOnly(True)
+        text.setLineWrapMode(QPlainTextEdit.NoWrap)
+        text.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        text.setPlainText(report.format())
+        layout.addWidget(text)
+        dia.resize(800, 400)
+        dia.exec_()
+
+    @trycatchslot
+    def compare_with(self):
+        path, ok = QFileDialog.getOpenFileName(self.modeler, caption="Compare Model With OPC UA XML", filter="XML Files (*.xml *.XML)", directory=self._last_model_dir)
+        if not ok:
+            return
+        diff = self._model_mgr.compare_with(path)
+        dia = DiffDialog(self.modeler, diff, f"Differences between {os.path.basename(path)} and model")
+        dia.exec_()
+
+    @trycatchslot
+    def find_usages(self):
+        node = self.modeler.get_current_node()
+        if not node:
+            return
+        rows = []
+        names = {None: "DataType"}
+        for source, reftype in self._model_mgr.find_usages(node):
+            if reftype not in names:
+                names[reftype] = self._model_mgr.server_mgr.get_node(reftype).read_browse_name().Name
+            rows.append((source.nodeid, names[reftype]))
+        self.modeler.results_ui.set_nodes(self._model_mgr.server_mgr, rows)
+        self.modeler.ui.resultsDock.setWindowTitle(f"Usages of {node.read_browse_name().Name} ({len(rows)})")
+        self.modeler.ui.resultsDock.show()
+        self.modeler.ui.resultsDock.raise_()
+
     def try_close_model(self):
+        self._model_mgr.wait_saved()
         if self._model_mgr.modified:
             reply = QMessageBox.question(
                 self.modeler,
@@ -240,7 +405,7 @@ class ModelManagerUI(QObject):
     def open(self):
         if not self.try_close_model():
             return
-        path, ok = QFileDialog.getOpenFileName(self.modeler, caption="Open OPC UA XML", filter="XML Files (*.xml *.XML *.uamodel)", directory=self._last_model_dir)
+        path, ok = QFileDialog.getOpenFileName(self.modeler, caption="Open OPC UA XML", filter="OPC UA Models (*.xml *.XML *.uamodel *.uamodelb)", directory=self._last_model_dir)
         if not ok:
             return
         if self._last_model_dir != os.path.dirname(path):
@@ -252,6 +417,12 @@ class ModelManagerUI(QObject):
     def open_file(self, path):
         self._model_mgr.open(path)
 
+    def prewarm(self, path):
+        self._model_mgr.prewarm(path)
+
+    def discard_prewarmed(self):
+        self._model_mgr.discard_prewarmed()
+
     @trycatchslot
     def import_xml(self):
         last_import_dir = self.settings.value("last_import_dir", ".")
@@ -266,22 +437,48 @@ class ModelManagerUI(QObject):
         self._save_as()
 
     def _save_as(self):
-        path, ok = QFileDialog.getSaveFileName(self.modeler, caption="Save OPC UA XML", filter="XML Files (*.xml *.XML)")
+        path, ok = QFileDialog.getSaveFileName(self.modeler, caption="Save OPC UA Model", filter="XML Files (*.xml *.XML);;Binary OPC UA Model (*.uamodelb)")
         if ok:
             if self._last_model_dir != os.path.dirname(path):
                 self._last_model_dir = os.path.dirname(path)
                 self.settings.setValue("last_model_dir", self._last_model_dir)
-            self._model_mgr.save_xml(path)
-            path = self._model_mgr.save_ua_model(path)
+            binary = path.endswith(".uamodelb") or ok.startswith("Binary")
+            path = self._model_mgr.save(path, binary, background=True)
             self.modeler.update_recent_files(path)
 
+    @trycatchslot
+    def export_xml(self):
+        path, ok = QFileDialog.getSaveFileName(self.modeler, caption="Export OPC UA XML", filter="XML Files (*.xml *.XML)", directory=self._last_model_dir)
+        if ok:
+            if not path.lower().endswith(".xml"):
+                path += ".xml"
+            self._model_mgr.export_xml(path)
+
+    @trycatchslot
+    def export_python(self):
+        path, ok = QFileDialog.getSaveFileName(self.modeler, caption="Export asyncua Python Module", filter="Python Files (*.py)", directory=self._last_model_dir)
+        if ok:
+            if not path.lower().endswith(".py"):
+                path += ".py"
+            self._model_mgr.export_python(path)
+
+    @trycatchslot
+    def export_selection(self):
+        nodes = self.modeler.get_selected_nodes()
+        if not nodes:
+            return
+        path, ok = QFileDialog.getSaveFileName(self.modeler, caption="Export Selection to OPC UA XML", filter="XML Files (*.xml *.XML)", directory=self._last_model_dir)
+        if ok:
+            if not path.lower().endswith(".xml"):
+                path += ".xml"
+            self._model_mgr.export_selection(nodes, path)
+
     @trycatchslot
     def save(self):
         if not self._model_mgr.current_path:
             self.save_as()
         else:
-            self._model_mgr.save_xml()
-            self._model_mgr.save_ua_model()
+            self._model_mgr.save(background=True)
 
     @trycatchslot
     def add_method(self):
@@ -314,11 +511,54 @@ class ModelManagerUI(QObject):
     def _add_modelling_rule(self, nodes):
         if not isinstance(nodes, (list, tuple)):
             nodes = [nodes]
-        for node in nodes:
-            path = node.get_path()
-            if self._model_mgr.server_mgr.nodes.base_object_type in path:
-                # we are creating a new type, add modeling rule
-                node.set_modelling_rule(True)
+        # nodes added together are under the same parent
+        if nodes and self._model_mgr.server_mgr.nodes.base_object_type in nodes[0].get_path():
+            # we are creating a new type, add modeling rule
+            self._model_mgr.set_modelling_rule(nodes, MODELLING_RULES["Mandatory"])
+
+    @trycatchslot
+    def set_attribute(self):
+        nodes = self.modeler.get_selected_nodes()
+        if not nodes:
+            return
+        names = [attr.name for attr in EDITABLE_ATTRIBUTES]
+        name, ok = QInputDialog.getItem(self.modeler, "Set Attribute", f"Attribute to set on {len(nodes)} nodes", names, 0, False)
+        if not ok:
+            return
+        text, ok = QInputDialog.getText(self.modeler, "Set Attribute", f"New {name}")
+        if ok:
+            attr = getattr(ua.AttributeIds, name)
+            self._model_mgr.write_attribute(nodes, attr, parse_attribute_value(attr, text))
+
+    @trycatchslot
+    def set_modelling_rule(self):
+        nodes = self.modeler.get_selected_nodes()
+        if not nodes:
+            return
+        name, ok = QInputDialog.getItem(self.modeler, "Set Modelling Rule", f"Modelling rule of {len(nodes)} nodes", list(MODELLING_RULES), 0, False)
+        if ok:
+            self._model_mgr.set_modelling_rule(nodes, MODELLING_RULES[name])
+
+    @trycatchslot
+    def rename(self):
+        nodes = self.modeler.get_selected_nodes()
+        if not nodes:
+            return
+        pattern, ok = QInputDialog.getText(self.modeler, "Rename", f"Regular expression to replace in names of {len(nodes)} nodes")
+        if not ok or not pattern:
+            return
+        repl, ok = QInputDialog.getText(self.modeler, "Rename", f"Replace {pattern} with (\\1 for first group)")
+        if ok:
+            self._model_mgr.rename(nodes, pattern, repl)
+
+    @trycatchslot
+    def set_access_level(self):
+        nodes = self.modeler.get_selected_nodes()
+        if not nodes:
+            return
+        name, ok = QInputDialog.getItem(self.modeler, "Set Access Level", f"Access level of variables among {len(nodes)} nodes", list(ACCESS_LEVELS), 0, False)
+        if ok:
+            self._model_mgr.set_access_level(nodes, ACCESS_LEVELS[name])
 
     @trycatchslot
     def add_data_type(self):
@@ -340,6 +580,20 @@ class ModelManagerUI(QObject):
             node = self._model_mgr.add_property(*args)
             self._add_modelling_rule(node)
 
+    @trycatchslot
+    def bulk_create(self):
+        parent = self.modeler.get_current_node()
+        last_dir = self.settings.value("last_signal_list_dir", ".")
+        path, ok = QFileDialog.getOpenFileName(self.modeler, caption="Create Variables From Signal List", filter="Signal Lists (*.csv *.txt *.xlsx *.xlsm)", directory=last_dir)
+        if not ok:
+            return
+        self.settings.setValue("last_signal_list_dir", os.path.dirname(path))
+        headers, rows = read_table(path)
+        dia = BulkCreateDialog(self.modeler, os.path.basename(path), headers, len(rows))
+        if not dia.exec_():
+            return
+        self._model_mgr.bulk_create(parent, path, dia.get_mapping(), dia.get_namespace_idx())
+
     @trycatchslot
     def add_variable_type(self):
         args, ok = NewUaObjectDialog.getArgs(self.modeler, "Add Variable Type", self._model_mgr.server_mgr, base_node_type=self._model_mgr.server_mgr.get_node(ua.ObjectIds.BaseVariableType))
@@ -369,10 +623,10 @@ class UaModeler(QMainWindow):
 
         self._restore_ui_geometri()
 
-        self.tree_ui = TreeWidget(self.ui.treeView)
+        self.tree_ui = PagedTreeWidget(self.ui.treeView)
         self.tree_ui.error.connect(self.show_error)
 
-        self.refs_ui = RefsWidget(self.ui.refView)
+        self.refs_ui = VirtualRefsWidget(self.ui.refView)
         self.refs_ui.error.connect(self.show_error)
         self.refs_ui.reference_changed.connect(self.tree_ui.reload_current)  # FIXME: shoudl reload a specific node
         self.attrs_ui = AttrsWidget(self.ui.attrView, show_timestamps=False)
@@ -380,8 +634,15 @@ class UaModeler(QMainWindow):
         self.idx_ui = NamespaceWidget(self.ui.namespaceView)
         self.nodesets_ui = RefNodeSetsWidget(self.ui.refNodeSetsView)
         self.nodesets_ui.error.connect(self.show_error)
-        self.nodesets_ui.nodeset_added.connect(self.nodesets_change)
+        self.nodesets_ui.nodesets_imported.connect(self.nodesets_change)
         self.nodesets_ui.nodeset_removed.connect(self.nodesets_change)
+        self.problems_ui = ProblemsWidget(self.ui.problemsView)
+        self.problems_ui.error.connect(self.show_error)
+        self.problems_ui.node_activated.connect(self.show_node)
+        self.results_ui = NodeListWidget(self.ui.resultsView)
+        self.results_ui.error.connect(self.show_error)
+        self.results_ui.node_activated.connect(self.show_node)
+        self.tabifyDockWidget(self.ui.problemsDock, self.ui.resultsDock)
 
         self.ui.treeView.activated.connect(self.show_refs)
         self.ui.treeView.clicked.connect(self.show_refs)
@@ -391,9 +652,16 @@ class UaModeler(QMainWindow):
         self.model_mgr = ModelManagerUI(self)
         self.model_mgr.error.connect(self.show_error)
         self.model_mgr.titleChanged.connect(self.update_title)
+        self.model_mgr.saved.connect(lambda path: self.show_msg(f"{path} saved"))
+        self.tree_ui.set_server_manager(self.model_mgr.get_current_server())
+        self.refs_ui.set_server_manager(self.model_mgr.get_current_server())
         self.actions = ActionsManager(self, self.ui, self.model_mgr)
+        self.ui.searchLineEdit.textChanged.connect(self.model_mgr.search)
+        self.ui.searchLineEdit.returnPressed.connect(self.model_mgr.show_first_result)
+        self.ui.searchNewNodesCheckBox.toggled.connect(self.model_mgr.search)
 
         self.setup_context_menu_tree()
+        self.setup_context_menu_results()
 
         delegate = BoldDelegate(self, self.tree_ui.model, self.model_mgr.get_new_nodes())
         self.ui.treeView.setItemDelegate(delegate)
@@ -405,6 +673,19 @@ class UaModeler(QMainWindow):
         for act in self._recent_files_acts:
             self.ui.menuRecentFiles.addAction(act)
         self._update_recent_files_ui()
+        self.ui.actionPrewarm.setChecked(int(self.settings.value("prewarm_recent_model", 0)))
+        self.ui.actionPrewarm.toggled.connect(lambda val: self.settings.setValue("prewarm_recent_model", int(val)))
+
+    def prewarm_recent_model(self):
+        """
+        if enabled, start the server and read the most recent model in background,
+        to be called once the window is shown
+        """
+        if not self.ui.actionPrewarm.isChecked() or not self._recent_files:
+            return
+        path = self._recent_files[0]
+        if os.path.exists(path) and self.model_mgr.get_current_server().get_server() is None:
+            self.model_mgr.prewarm(path)
 
     def open_recent_files(self):
         if not self.model_mgr.try_close_model():
@@ -435,6 +716,45 @@ class UaModeler(QMainWindow):
     def get_current_node(self, idx=None):
         return self.tree_ui.get_current_node(idx)
 
+    def get_selected_nodes(self):
+        """
+        nodes of the selected result rows when acting from the context menu of results,
+        otherwise nodes of the selected tree rows, current node if no row is selected
+        """
+        if self._results_selection:
+            server = self.get_current_server()
+            return [server.get_node(nodeid) for nodeid in self.results_ui.get_selected_nodeids()]
+        nodes = [self.get_current_node(idx) for idx in self.ui.treeView.selectionModel().selectedRows(0)]
+        if not nodes:
+            node = self.get_current_node()
+            if node:
+                nodes.append(node)
+        return nodes
+
+    def is_results_selection(self):
+        return self._results_selection
+
+    def update_tree_names(self, nodeids):
+        """
+        show the new names of nodeids in all loaded tree items, read with one batched request
+        """
+        nodeids = set(nodeids)
+        items = {}  # nodeid -> list of (DisplayName item, BrowseName item)
+        todo = [self.tree_ui.model.invisibleRootItem()]
+        while todo:
+            parent = todo.pop()
+            for row in range(parent.rowCount()):
+                item = parent.child(row, 0)
+                node = item.data(Qt.UserRole)
+                if node is not None and node.nodeid in nodeids:
+                    items.setdefault(node.nodeid, []).append((item, parent.child(row, 1)))
+                todo.append(item)
+        attrs = [ua.AttributeIds.DisplayName, ua.AttributeIds.BrowseName]
+        for (dname, bname), tree_items in zip(self.get_current_server().read_attributes(list(items), attrs), items.values()):
+            for dname_item, bname_item in tree_items:
+                dname_item.setText(dname.Value.Value.Text)
+                bname_item.setText(bname.Value.Value.to_string())
+
     def get_current_server(self):
         """
         Used by tests
@@ -444,9 +764,12 @@ class UaModeler(QMainWindow):
     def clear_all_widgets(self):
         self.tree_ui.clear()
         self.refs_ui.clear()
+        self.refs_ui.clear_cache()
         self.attrs_ui.clear()
         self.idx_ui.clear()
         self.nodesets_ui.clear()
+        self.problems_ui.clear()
+        self.results_ui.clear()
 
     @trycatchslot
     def _update_actions_state(self, current, previous):
@@ -461,19 +784,47 @@ class UaModeler(QMainWindow):
         # tree view menu
         self._contextMenu.addAction(self.ui.actionCopy)
         self._contextMenu.addAction(self.ui.actionPaste)
+        self._contextMenu.addAction(self.ui.actionPasteMany)
         self._contextMenu.addAction(self.ui.actionDelete)
         self._contextMenu.addSeparator()
+        self._contextMenu.addAction(self.ui.actionFindUsages)
+        self._contextMenu.addAction(self.ui.actionExportSelection)
         self._contextMenu.addAction(self.tree_ui.actionReload)
+        self._contextMenu.addAction(self.tree_ui.actionFilter)
+        self._contextMenu.addSeparator()
+        self._contextMenu.addMenu(self.ui.menuEditSelection)
         self._contextMenu.addSeparator()
         self._contextMenu.addAction(self.ui.actionAddFolder)
         self._contextMenu.addAction(self.ui.actionAddObject)
         self._contextMenu.addAction(self.ui.actionAddVariable)
         self._contextMenu.addAction(self.ui.actionAddProperty)
+        self._contextMenu.addAction(self.ui.actionBulkCreate)
         self._contextMenu.addAction(self.ui.actionAddMethod)
         self._contextMenu.addAction(self.ui.actionAddObjectType)
         self._contextMenu.addAction(self.ui.actionAddVariableType)
         self._contextMenu.addAction(self.ui.actionAddDataType)
 
+    def setup_context_menu_results(self):
+        self._results_selection = False  # actions apply to selected results while their menu is shown
+        self.ui.resultsView.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.ui.resultsView.customContextMenuRequested.connect(self._show_context_menu_results)
+        self._resultsContextMenu = QMenu()
+        self._resultsContextMenu.addAction(self.ui.actionDelete)
+        self._resultsContextMenu.addAction(self.ui.actionExportSelection)
+        self._resultsContextMenu.addSeparator()
+        self._resultsContextMenu.addMenu(self.ui.menuEditSelection)
+
+    def _show_context_menu_results(self, position):
+        if not self.results_ui.get_selected_nodeids():
+            return
+        self.actions.enable_selection_actions()
+        self._results_selection = True
+        try:
+            self._resultsContextMenu.exec_(self.ui.resultsView.viewport().mapToGlobal(position))
+        finally:
+            self._results_selection = False
+            self.actions.update_actions_states(self.get_current_node())
+
     def _show_context_menu_tree(self, position):
         node = self.tree_ui.get_current_node()
         if node:
@@ -517,10 +868,16 @@ class UaModeler(QMainWindow):
         if node:
             self.attrs_ui.show_attrs(node)
 
+    @trycatchslot
+    def show_node(self, nodeid):
+        node = self.get_current_server().get_node(nodeid)
+        self.tree_ui.expand_to_node(node)
+
     def nodesets_change(self, data):
         self.idx_ui.reload()
         self.tree_ui.reload()
         self.refs_ui.clear()
+        self.refs_ui.clear_cache()
         self.attrs_ui.clear()
         self.model_mgr.setModified(True)
 
@@ -538,19 +895,29 @@ class UaModeler(QMainWindow):
         self.settings.setValue("splitter_right", self.ui.splitterRight.saveState())
         self.settings.setValue("splitter_center", self.ui.splitterCenter.saveState())
         self.settings.setValue("recent_files", self._recent_files)
+        self.model_mgr.discard_prewarmed()
         event.accept()
 
 
 def main():
     app = QApplication(sys.argv)
     modeler = UaModeler()
-    handler = QtHandler(modeler.ui.logTextEdit)
+    handler = BufferedQtHandler(modeler.ui.logTextEdit)
     logging.getLogger().addHandler(handler)
+    # only warnings and errors are also written to console, writing every record would slow down logging
+    console = logging.StreamHandler()
+    console.setLevel(logging.WARNING)
+    console.setFormatter(handler.formatter)
+    logging.getLogger().addHandler(console)
     logging.getLogger("uamodeler").setLevel(logging.INFO)
     logging.getLogger("uawidgets").setLevel(logging.INFO)
     #logging.getLogger("asyncua").setLevel(logging.INFO)  # to enable logging of ua server
     modeler.show()
-    sys.exit(app.exec_())
+    QTimer.singleShot(0, modeler.prewarm_recent_model)
+    ret = app.exec_()
+    logging.getLogger().removeHandler(handler)
+    handler.close()
+    sys.exit(ret)
 
 
 if __name__ == "__main__":
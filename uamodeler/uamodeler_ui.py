@@ -44,6 +44,7 @@ class Ui_UaModeler(object):
         self.treeView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.treeView.setDragEnabled(True)
         self.treeView.setDragDropMode(QtWidgets.QAbstractItemView.DragOnly)
+        self.treeView.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.treeView.setObjectName("treeView")
         self.splitterRight = QtWidgets.QSplitter(self.splitterCenter)
         self.splitterRight.setOrientation(QtCore.Qt.Vertical)
@@ -97,8 +98,12 @@ class Ui_UaModeler(object):
         self.menuBar.setObjectName("menuBar")
         self.menuOPC_UA_Client = QtWidgets.QMenu(self.menuBar)
         self.menuOPC_UA_Client.setObjectName("menuOPC_UA_Client")
+        self.menuEditSelection = QtWidgets.QMenu(self.menuBar)
+        self.menuEditSelection.setObjectName("menuEditSelection")
         self.menuRecentFiles = QtWidgets.QMenu(self.menuBar)
         self.menuRecentFiles.setObjectName("menuRecentFiles")
+        self.menuTools = QtWidgets.QMenu(self.menuBar)
+        self.menuTools.setObjectName("menuTools")
         UaModeler.setMenuBar(self.menuBar)
         self.statusBar = QtWidgets.QStatusBar(UaModeler)
         self.statusBar.setObjectName("statusBar")
@@ -106,6 +111,47 @@ class Ui_UaModeler(object):
         self.toolBar = QtWidgets.QToolBar(UaModeler)
         self.toolBar.setObjectName("toolBar")
         UaModeler.addToolBar(QtCore.Qt.TopToolBarArea, self.toolBar)
+        self.problemsDock = QtWidgets.QDockWidget(UaModeler)
+        self.problemsDock.setObjectName("problemsDock")
+        self.problemsDockContents = QtWidgets.QWidget()
+        self.problemsDockContents.setObjectName("problemsDockContents")
+        self.verticalLayout_3 = QtWidgets.QVBoxLayout(self.problemsDockContents)
+        self.verticalLayout_3.setContentsMargins(11, 11, 11, 11)
+        self.verticalLayout_3.setSpacing(6)
+        self.verticalLayout_3.setObjectName("verticalLayout_3")
+        self.problemsView = QtWidgets.QTreeView(self.problemsDockContents)
+        self.problemsView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.problemsView.setRootIsDecorated(False)
+        self.problemsView.setObjectName("problemsView")
+        self.verticalLayout_3.addWidget(self.problemsView)
+        self.problemsDock.setWidget(self.problemsDockContents)
+        UaModeler.addDockWidget(QtCore.Qt.DockWidgetArea(8), self.problemsDock)
+        self.resultsDock = QtWidgets.QDockWidget(UaModeler)
+        self.resultsDock.setObjectName("resultsDock")
+        self.resultsDockContents = QtWidgets.QWidget()
+        self.resultsDockContents.setObjectName("resultsDockContents")
+        self.verticalLayout_4 = QtWidgets.QVBoxLayout(self.resultsDockContents)
+        self.verticalLayout_4.setContentsMargins(11, 11, 11, 11)
+        self.verticalLayout_4.setSpacing(6)
+        self.verticalLayout_4.setObjectName("verticalLayout_4")
+        self.horizontalLayout = QtWidgets.QHBoxLayout()
+        self.horizontalLayout.setSpacing(6)
+        self.horizontalLayout.setObjectName("horizontalLayout")
+        self.searchLineEdit = QtWidgets.QLineEdit(self.resultsDockContents)
+        self.searchLineEdit.setClearButtonEnabled(True)
+        self.searchLineEdit.setObjectName("searchLineEdit")
+        self.horizontalLayout.addWidget(self.searchLineEdit)
+        self.searchNewNodesCheckBox = QtWidgets.QCheckBox(self.resultsDockContents)
+        self.searchNewNodesCheckBox.setObjectName("searchNewNodesCheckBox")
+        self.horizontalLayout.addWidget(self.searchNewNodesCheckBox)
+        self.verticalLayout_4.addLayout(self.horizontalLayout)
+        self.resultsView = QtWidgets.QTreeView(self.resultsDockContents)
+        self.resultsView.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.resultsView.setRootIsDecorated(False)
+        self.resultsView.setObjectName("resultsView")
+        self.verticalLayout_4.addWidget(self.resultsView)
+        self.resultsDock.setWidget(self.resultsDockContents)
+        UaModeler.addDockWidget(QtCore.Qt.DockWidgetArea(8), self.resultsDock)
         self.actionAddObject = QtWidgets.QAction(UaModeler)
         self.actionAddObject.setObjectName("actionAddObject")
         self.actionAddVariable = QtWidgets.QAction(UaModeler)
@@ -151,16 +197,66 @@ class Ui_UaModeler(object):
         self.actionUseOpenUa = QtWidgets.QAction(UaModeler)
         self.actionUseOpenUa.setCheckable(True)
         self.actionUseOpenUa.setObjectName("actionUseOpenUa")
+        self.actionPasteMany = QtWidgets.QAction(UaModeler)
+        self.actionPasteMany.setObjectName("actionPasteMany")
+        self.actionValidate = QtWidgets.QAction(UaModeler)
+        self.actionValidate.setObjectName("actionValidate")
+        self.actionFindUsages = QtWidgets.QAction(UaModeler)
+        self.actionFindUsages.setObjectName("actionFindUsages")
+        self.actionFind = QtWidgets.QAction(UaModeler)
+        self.actionFind.setObjectName("actionFind")
+        self.actionQuery = QtWidgets.QAction(UaModeler)
+        self.actionQuery.setObjectName("actionQuery")
+        self.actionExportXml = QtWidgets.QAction(UaModeler)
+        self.actionExportXml.setObjectName("actionExportXml")
+        self.actionExportSelection = QtWidgets.QAction(UaModeler)
+        self.actionExportSelection.setObjectName("actionExportSelection")
+        self.actionExportPython = QtWidgets.QAction(UaModeler)
+        self.actionExportPython.setObjectName("actionExportPython")
+        self.actionCompare = QtWidgets.QAction(UaModeler)
+        self.actionCompare.setObjectName("actionCompare")
+        self.actionPrewarm = QtWidgets.QAction(UaModeler)
+        self.actionPrewarm.setCheckable(True)
+        self.actionPrewarm.setObjectName("actionPrewarm")
+        self.actionBulkCreate = QtWidgets.QAction(UaModeler)
+        self.actionBulkCreate.setObjectName("actionBulkCreate")
+        self.actionMemoryReport = QtWidgets.QAction(UaModeler)
+        self.actionMemoryReport.setObjectName("actionMemoryReport")
+        self.actionSetAttribute = QtWidgets.QAction(UaModeler)
+        self.actionSetAttribute.setObjectName("actionSetAttribute")
+        self.actionSetModellingRule = QtWidgets.QAction(UaModeler)
+        self.actionSetModellingRule.setObjectName("actionSetModellingRule")
+        self.actionRename = QtWidgets.QAction(UaModeler)
+        self.actionRename.setObjectName("actionRename")
+        self.actionSetAccessLevel = QtWidgets.QAction(UaModeler)
+        self.actionSetAccessLevel.setObjectName("actionSetAccessLevel")
         self.menuOPC_UA_Client.addAction(self.actionNew)
         self.menuOPC_UA_Client.addAction(self.actionCloseModel)
         self.menuOPC_UA_Client.addAction(self.actionOpen)
         self.menuOPC_UA_Client.addAction(self.actionImport)
         self.menuOPC_UA_Client.addAction(self.actionSave)
         self.menuOPC_UA_Client.addAction(self.actionSaveAs)
+        self.menuOPC_UA_Client.addAction(self.actionExportXml)
+        self.menuOPC_UA_Client.addAction(self.actionExportSelection)
+        self.menuOPC_UA_Client.addAction(self.actionExportPython)
         self.menuOPC_UA_Client.addAction(self.actionUseOpenUa)
+        self.menuOPC_UA_Client.addAction(self.actionPrewarm)
         self.menuOPC_UA_Client.addAction(self.actionQuit)
+        self.menuEditSelection.addAction(self.actionSetAttribute)
+        self.menuEditSelection.addAction(self.actionSetModellingRule)
+        self.menuEditSelection.addAction(self.actionRename)
+        self.menuEditSelection.addAction(self.actionSetAccessLevel)
+        self.menuTools.addAction(self.actionValidate)
+        self.menuTools.addAction(self.actionFind)
+        self.menuTools.addAction(self.actionQuery)
+        self.menuTools.addAction(self.actionFindUsages)
+        self.menuTools.addAction(self.actionCompare)
+        self.menuTools.addSeparator()
+        self.menuTools.addAction(self.actionMemoryReport)
         self.menuBar.addAction(self.menuOPC_UA_Client.menuAction())
+        self.menuBar.addAction(self.menuEditSelection.menuAction())
         self.menuBar.addAction(self.menuRecentFiles.menuAction())
+        self.menuBar.addAction(self.menuTools.menuAction())
         self.toolBar.addAction(self.actionNew)
         self.toolBar.addAction(self.actionOpen)
         self.toolBar.addAction(self.actionSave)
@@ -187,8 +283,14 @@ class Ui_UaModeler(object):
         self.label.setText(_translate("UaModeler", "Attributes Editor"))
         self.label_2.setText(_translate("UaModeler", "References Editor"))
         self.menuOPC_UA_Client.setTitle(_translate("UaModeler", "Act&ions"))
+        self.menuEditSelection.setTitle(_translate("UaModeler", "&Edit Selection"))
         self.menuRecentFiles.setTitle(_translate("UaModeler", "Recent files"))
+        self.menuTools.setTitle(_translate("UaModeler", "&Tools"))
         self.toolBar.setWindowTitle(_translate("UaModeler", "toolBar"))
+        self.problemsDock.setWindowTitle(_translate("UaModeler", "Problems"))
+        self.resultsDock.setWindowTitle(_translate("UaModeler", "Results"))
+        self.searchLineEdit.setPlaceholderText(_translate("UaModeler", "Search nodes..."))
+        self.searchNewNodesCheckBox.setText(_translate("UaModeler", "Only new nodes"))
         self.actionAddObject.setText(_translate("UaModeler", "Add Object"))
         self.actionAddObject.setToolTip(_translate("UaModeler", "add child object to current node"))
         self.actionAddVariable.setText(_translate("UaModeler", "Add Variable"))
@@ -217,4 +319,37 @@ class Ui_UaModeler(object):
         self.actionAddEnum.setToolTip(_translate("UaModeler", "Add Enum Type"))
         self.actionUseOpenUa.setText(_translate("UaModeler", "Use Open62541 Server"))
         self.actionUseOpenUa.setToolTip(_translate("UaModeler", "User Open62541 Server"))
+        self.actionPasteMany.setText(_translate("UaModeler", "Paste N Times"))
+        self.actionPasteMany.setToolTip(_translate("UaModeler", "Paste copied node several times under current node"))
+        self.actionValidate.setText(_translate("UaModeler", "&Validate Model"))
+        self.actionValidate.setToolTip(_translate("UaModeler", "Check the whole model for problems"))
+        self.actionFindUsages.setText(_translate("UaModeler", "Find Usages"))
+        self.actionFindUsages.setToolTip(_translate("UaModeler", "List the model nodes referencing current node"))
+        self.actionFind.setText(_translate("UaModeler", "&Find Node"))
+        self.actionFind.setToolTip(_translate("UaModeler", "Search nodes by name, description or NodeId"))
+        self.actionFind.setShortcut(_translate("UaModeler", "Ctrl+F"))
+        self.actionQuery.setText(_translate("UaModeler", "&Query Model..."))
+        self.actionQuery.setToolTip(_translate("UaModeler", "Find model nodes by NodeClass, DataType, TypeDefinition, parent or namespace"))
+        self.actionExportXml.setText(_translate("UaModeler", "&Export XML"))
+        self.actionExportXml.setToolTip(_translate("UaModeler", "Export model to a NodeSet2 XML file"))
+        self.actionExportSelection.setText(_translate("UaModeler", "Export &Selection..."))
+        self.actionExportSelection.setToolTip(_translate("UaModeler", "Export selected nodes, their children and the model types they use to a NodeSet2 XML file"))
+        self.actionExportPython.setText(_translate("UaModeler", "Export &Python..."))
+        self.actionExportPython.setToolTip(_translate("UaModeler", "Export model to a Python module building it in an asyncua server, faster to load than XML"))
+        self.actionCompare.setText(_translate("UaModeler", "&Compare With File..."))
+        self.actionCompare.setToolTip(_translate("UaModeler", "Show nodes added, removed and changed since a NodeSet2 XML revision of the model"))
+        self.actionPrewarm.setText(_translate("UaModeler", "Prewarm Most Recent Model"))
+        self.actionPrewarm.setToolTip(_translate("UaModeler", "At startup, start the server and read the most recent model in background"))
+        self.actionBulkCreate.setText(_translate("UaModeler", "Create Variables From &File..."))
+        self.actionBulkCreate.setToolTip(_translate("UaModeler", "Create variables and properties from the rows of a CSV or Excel signal list"))
+        self.actionMemoryReport.setText(_translate("UaModeler", "&Memory Report"))
+        self.actionMemoryReport.setToolTip(_translate("UaModeler", "Show memory used by each part of the modeler"))
+        self.actionSetAttribute.setText(_translate("UaModeler", "Set &Attribute..."))
+        self.actionSetAttribute.setToolTip(_translate("UaModeler", "Set an attribute of all selected nodes to the same value"))
+        self.actionSetModellingRule.setText(_translate("UaModeler", "Set &Modelling Rule..."))
+        self.actionSetModellingRule.setToolTip(_translate("UaModeler", "Set or remove the modelling rule of all selected nodes"))
+        self.actionRename.setText(_translate("UaModeler", "&Rename..."))
+        self.actionRename.setToolTip(_translate("UaModeler", "Rename selected nodes with a regular expression replacement"))
+        self.actionSetAccessLevel.setText(_translate("UaModeler", "Set A&ccess Level..."))
+        self.actionSetAccessLevel.setToolTip(_translate("UaModeler", "Set the access level of all selected variables"))
 
@@ -0,0 +1,244 @@
+import logging
+from collections import defaultdict
+
+from PyQt5.QtCore import pyqtSignal, QObject
+
+from asyncua import ua
+
+logger = logging.getLogger(__name__)
+
+
+class Problem:
+    """
+    A problem found in model
+    """
+
+    ERROR = "Error"
+    WARNING = "Warning"
+
+    def __init__(self, nodeid, severity, message):
+        self.nodeid = nodeid
+        self.severity = severity
+        self.message = message
+
+    def __str__(self):
+        return f"{self.severity}: {self.nodeid.to_string()}: {self.message}"
+
+    __repr__ = __str__
+
+
+_TYPE_CLASSES = {
+    ua.NodeClass.Object: ua.NodeClass.ObjectType,
+    ua.NodeClass.Variable: ua.NodeClass.VariableType,
+}
+
+
+class ModelValidator(QObject):
+    """
+    Validate nodes of model: dangling references, unknown data types and
+    type definitions, namespace indexes outside of namespace array.
+    Indexes of references, namespaces and known nodes are kept so that
+    after an edit only the nodes touched by that edit are checked again
+    """
+
+    problemsChanged = pyqtSignal(list)  # nodeids whose problems changed
+
+    def __init__(self, server_mgr):
+        QObject.__init__(self)
+        self.server_mgr = server_mgr
+        self.problems = {}  # nodeid -> list of Problem
+        self._reported = {}  # nodeid -> list of Problem reported by other components
+        self._refs = {}  # model node -> nodeids it references
+        self._referrers = defaultdict(set)  # nodeid -> model nodes referencing it
+        self._ns_used = defaultdict(set)  # namespace index -> model nodes using it
+        self._nodeclasses = {}  # nodeid -> NodeClass of nodes known to exist
+        self._ns_count = 0
+
+    def clear(self):
+        changed = list(self.problems.keys()) + list(self._reported.keys())
+        self.problems.clear()
+        self._reported.clear()
+        self._refs.clear()
+        self._referrers.clear()
+        self._ns_used.clear()
+        self._nodeclasses.clear()
+        self.problemsChanged.emit(changed)
+
+    def get_problems(self, nodeid=None):
+        if nodeid is not None:
+            return self.problems.get(nodeid, []) + self._reported.get(nodeid, [])
+        problems = []
+        for probs in self.problems.values():
+            problems.extend(probs)
+        for probs in self._reported.values():
+            problems.extend(probs)
+        return problems
+
+    def validate(self, nodes):
+        """
+        full validation of model made of nodes
+        """
+        changed = list(self.problems.keys())
+        self.problems.clear()
+        self._refs.clear()
+        self._referrers.clear()
+        self._ns_used.clear()
+        self._nodeclasses.clear()
+        self._ns_count = len(self.server_mgr.get_namespace_array())
+        changed.extend(self._check([node.nodeid for node in nodes]))
+        logger.info("Validated %s nodes, found %s problems", len(nodes), len(self.get_problems()))
+        self.problemsChanged.emit(changed)
+
+    def update(self, nodes):
+        """
+        check again nodes which have been added or modified
+        """
+        for node in nodes:
+            self._nodeclasses.pop(node.nodeid, None)
+        self.problemsChanged.emit(self._check([node.nodeid for node in nodes]))
+
+    def remove(self, nodes):
+        """
+        forget deleted nodes and check again nodes referencing them
+        """
+        changed = []
+        referrers = set()
+        for node in nodes:
+            self._unindex(node.nodeid)
+            self._nodeclasses.pop(node.nodeid, None)
+            referrers.update(self._referrers.get(node.nodeid, ()))
+            had = self.problems.pop(node.nodeid, None)
+            rep = self._reported.pop(node.nodeid, None)
+            if had or rep:
+                changed.append(node.nodeid)
+        referrers.difference_update(node.nodeid for node in nodes)
+        changed.extend(self._check(referrers))
+        self.problemsChanged.emit(changed)
+
+    def namespaces_changed(self):
+        """
+        check again nodes using namespace indexes affected by a change of namespace array
+        """
+        count = len(self.server_mgr.get_namespace_array())
+        nodeids = set()
+        for idx in list(self._ns_used.keys()):
+            if idx >= min(count, self._ns_count):
+                nodeids.update(self._ns_used[idx])
+        self._ns_count = count
+        self.problemsChanged.emit(self._check(nodeids))
+
+    def report(self, nodeid, message, severity=Problem.ERROR):
+        """
+        add a problem found outside of validator, for example while parsing type dictionaries
+        """
+        self._reported.setdefault(nodeid, []).append(Problem(nodeid, severity, message))
+        self.problemsChanged.emit([nodeid])
+
+    def clear_reported(self, nodeid):
+        if self._reported.pop(nodeid, None):
+            self.problemsChanged.emit([nodeid])
+
+    def _unindex(self, nodeid):
+        for target in self._refs.pop(nodeid, ()):
+            self._referrers[target].discard(nodeid)
+        for nodeids in self._ns_used.values():
+            nodeids.discard(nodeid)
+
+    def _lookup(self, nodeids):
+        """
+        read node class of nodes we do not know yet, missing nodes are not cached
+        """
+        nodeids = [nodeid for nodeid in set(nodeids) if nodeid not in self._nodeclasses]
+        if not nodeids:
+            return
+        for nodeid, (dv,) in zip(nodeids, self.server_mgr.read_attributes(nodeids, [ua.AttributeIds.NodeClass])):
+            if dv.StatusCode.is_good():
+                self._nodeclasses[nodeid] = ua.NodeClass(dv.Value.Value)
+
+    def _check(self, nodeids):
+        """
+        check nodes and update indexes, return nodeids whose problems changed
+        """
+        nodeids = list(nodeids)
+        if not nodeids:
+            return []
+        if not self._ns_count:
+            self._ns_count = len(self.server_mgr.get_namespace_array())
+        attrs, refs = self.server_mgr.gather(
+            self.server_mgr.read_attributes_async(nodeids, [ua.AttributeIds.NodeClass, ua.AttributeIds.BrowseName, ua.AttributeIds.DataType]),
+            self.server_mgr.browse_async(nodeids, refs=ua.ObjectIds.References))
+        targets = []
+        for node_refs in refs:
+            for ref in node_refs:
+                targets.append(ref.NodeId)
+                targets.append(ref.ReferenceTypeId)
+        for nclass, _, dtype in attrs:
+            if nclass.StatusCode.is_good() and dtype.StatusCode.is_good():
+                targets.append(dtype.Value.Value)
+        self._lookup(targets)
+
+        changed = []
+        for nodeid, (nclass, bname, dtype), node_refs in zip(nodeids, attrs, refs):
+            old = self.problems.pop(nodeid, [])
+            self._unindex(nodeid)
+            if not nclass.StatusCode.is_good():
+                # node does not exist anymore
+                if old:
+                    changed.append(nodeid)
+                continue
+            nclass = ua.NodeClass(nclass.Value.Value)
+            self._nodeclasses[nodeid] = nclass
+            bname = bname.Value.Value
+            dtype = dtype.Value.Value if dtype.StatusCode.is_good() else None
+            problems = self._check_node(nodeid, nclass, bname, dtype, node_refs)
+            if problems:
+                self.problems[nodeid] = problems
+            if [str(p) for p in problems] != [str(p) for p in old]:
+                changed.append(nodeid)
+        return changed
+
+    def _check_node(self, nodeid, nclass, bname, dtype, refs):
+        problems = []
+
+        def error(msg, severity=Problem.ERROR):
+            problems.append(Problem(nodeid, severity, msg))
+
+        used = {nodeid.NamespaceIndex, bname.NamespaceIndex}
+        targets = set()
+        typedef = None
+        for ref in refs:
+            targets.add(ref.NodeId)
+            used.add(ref.NodeId.NamespaceIndex)
+            if ref.NodeId not in self._nodeclasses:
+                error(f"Reference {_name(ref.ReferenceTypeId)} to missing node {ref.NodeId.to_string()}")
+            if self._nodeclasses.get(ref.ReferenceTypeId) != ua.NodeClass.ReferenceType:
+                error(f"Reference type {ref.ReferenceTypeId.to_string()} is not a ReferenceType")
+            if ref.IsForward and ref.ReferenceTypeId == ua.NodeId(ua.ObjectIds.HasTypeDefinition):
+                typedef = ref.NodeId
+
+        if dtype is not None:
+            targets.add(dtype)
+            used.add(dtype.NamespaceIndex)
+            if self._nodeclasses.get(dtype) != ua.NodeClass.DataType:
+                error(f"Unknown DataType {dtype.to_string()}")
+
+        if nclass in _TYPE_CLASSES:
+            if typedef is None:
+                error("Node has no TypeDefinition", Problem.WARNING)
+            elif typedef in self._nodeclasses and self._nodeclasses[typedef] != _TYPE_CLASSES[nclass]:
+                error(f"TypeDefinition {typedef.to_string()} is not a {_TYPE_CLASSES[nclass].name}")
+
+        for idx in sorted(used):
+            if idx >= self._ns_count:
+                error(f"Namespace index {idx} is not in namespace array")
+            self._ns_used[idx].add(nodeid)
+        self._refs[nodeid] = targets
+        for target in targets:
+            self._referrers[target].add(nodeid)
+        return problems
+
+
+def _name(nodeid):
+    if nodeid.NamespaceIndex == 0 and nodeid.Identifier in ua.ObjectIdNames:
+        return ua.ObjectIdNames[nodeid.Identifier]
+    return nodeid.to_string()
@@ -0,0 +1,245 @@
+import logging
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+
+from asyncua import ua
+from asyncua.sync import new_node
+
+from uawidgets.refs_widget import RefsWidget, MyDelegate
+from uawidgets.get_node_dialog import GetNodeTextButton
+from uawidgets.utils import trycatchslot
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000  # references added to the table at a time
+HEADERS = ['ReferenceType', 'NodeId', "BrowseName", "TypeDefinition"]
+
+
+class VirtualRefsModel(QAbstractTableModel):
+    """
+    Table of the references of a node. References are browsed PAGE_SIZE at
+    a time, as the view scrolls to the end, and the text of a row is only made
+    when the view paints it. Names of reference types and type definitions
+    outside namespace 0 are read for the painted rows only, in one batched
+    read per event loop iteration, and kept in a cache shared by all nodes
+    """
+
+    def __init__(self, parent=None):
+        QAbstractTableModel.__init__(self, parent)
+        self.server_mgr = None
+        self._refs = []
+        self._nodeid = None
+        self._continuation = None
+        self._names = {}  # nodeid -> DisplayName text, cache of resolved names
+        self._pending = set()  # nodeids to resolve
+        self._resolve_timer = QTimer(self)
+        self._resolve_timer.setSingleShot(True)
+        self._resolve_timer.timeout.connect(self.resolve_pending)
+
+    def set_node(self, node):
+        """
+        show the first page of references of node, no reference if node is None
+        """
+        self.beginResetModel()
+        try:
+            self._release()
+            self._refs = []
+            self._nodeid = None
+            if node is None:
+                return
+            self._nodeid = node.nodeid
+            if self.server_mgr is None:
+                self._refs = node.get_children_descriptions(refs=ua.ObjectIds.References)
+            else:
+                self._refs, self._continuation = self.server_mgr.browse_children(node.nodeid, PAGE_SIZE, refs=ua.ObjectIds.References)
+        finally:
+            self.endResetModel()
+
+    def _release(self):
+        if self._continuation is not None:
+            self.server_mgr.release_continuation(self._continuation)
+            self._continuation = None
+
+    def clear_cache(self):
+        self._names.clear()
+        self._pending.clear()
+
+    def get_refs(self):
+        return self._refs
+
+    def append_ref(self, ref):
+        self.beginInsertRows(QModelIndex(), len(self._refs), len(self._refs))
+        self._refs.append(ref)
+        self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._refs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return HEADERS[section]
+        return QAbstractTableModel.headerData(self, section, orientation, role)
+
+    def flags(self, idx):
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if idx.column() < 2:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._continuation is not None
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self._continuation is None:
+            return
+        refs, self._continuation = self.server_mgr.browse_children(self._nodeid, PAGE_SIZE, self._continuation)
+        self.beginInsertRows(QModelIndex(), len(self._refs), len(self._refs) + len(refs) - 1)
+        self._refs.extend(refs)
+        self.endInsertRows()
+
+    def data(self, idx, role=Qt.DisplayRole):
+        if not idx.isValid() or idx.row() >= len(self._refs):
+            return None
+        ref = self._refs[idx.row()]
+        if role == Qt.UserRole:
+            return ref if idx.column() == 0 else None
+        if role != Qt.DisplayRole:
+            return None
+        col = idx.column()
+        if col == 0:
+            return self._get_name(ref.ReferenceTypeId, str(ref.ReferenceTypeId))
+        if col == 1:
+            nodeid = ref.NodeId.to_string()
+            if ref.NodeId.NamespaceIndex == 0 and ref.NodeId.Identifier in ua.ObjectIdNames:
+                nodeid += ": " + ua.ObjectIdNames[ref.NodeId.Identifier]
+            return nodeid
+        if col == 2:
+            return ref.BrowseName.to_string()
+        return self._get_name(ref.TypeDefinition, ref.TypeDefinition.to_string())
+
+    def setData(self, idx, value, role=Qt.EditRole):
+        # display text is made from the ReferenceDescription stored as Qt.UserRole
+        if role == Qt.UserRole and idx.column() == 0:
+            self._refs[idx.row()] = value
+            self.dataChanged.emit(idx, idx.sibling(idx.row(), len(HEADERS) - 1))
+            return True
+        return role in (Qt.DisplayRole, Qt.EditRole)
+
+    def _get_name(self, nodeid, default):
+        if nodeid.is_null():
+            return default
+        if nodeid.NamespaceIndex == 0 and nodeid.Identifier in ua.ObjectIdNames:
+            return ua.ObjectIdNames[nodeid.Identifier]
+        name = self._names.get(nodeid)
+        if name is not None:
+            return name
+        if self.server_mgr is not None:
+            self._pending.add(nodeid)
+            self._resolve_timer.start(0)
+        return default
+
+    def resolve_pending(self):
+        """
+        read the names requested while painting rows and repaint them
+        """
+        nodeids = list(self._pending)
+        self._pending.clear()
+        if not nodeids:
+            return
+        try:
+            results = self.server_mgr.read_attributes(nodeids, [ua.AttributeIds.DisplayName])
+        except Exception as ex:
+            logger.warning("Could not read names of references: %s", ex)
+            return
+        for nodeid, (dname,) in zip(nodeids, results):
+            if dname.StatusCode.is_good() and dname.Value.Value.Text:
+                self._names[nodeid] = dname.Value.Value.Text
+            else:
+                self._names[nodeid] = nodeid.to_string()
+        if self._refs:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._refs) - 1, len(HEADERS) - 1))
+
+
+class VirtualRefsWidget(RefsWidget):
+    """
+    RefsWidget showing references through VirtualRefsModel, so
+    nodes with many references are shown without delay
+    """
+
+    def __init__(self, view):
+        RefsWidget.__init__(self, view)
+        for action in (self.reloadAction, self.addRefAction, self.removeRefAction):
+            action.setParent(self)  # created as children of the replaced model
+        self.model = VirtualRefsModel(self)
+        delegate = VirtualRefsDelegate(self.view, self)
+        delegate.error.connect(self.error.emit)
+        delegate.reference_changed.connect(self.reference_changed.emit)
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(delegate)
+        state = self.settings.value("WindowState/refs_widget_state", None)
+        if state is not None:
+            self.view.horizontalHeader().restoreState(state)
+        self.view.horizontalHeader().setSectionResizeMode(0)
+        self.view.horizontalHeader().setStretchLastSection(True)
+
+    def set_server_manager(self, server_mgr):
+        self.model.server_mgr = server_mgr
+
+    def clear(self):
+        self.model.set_node(None)
+        self.node = None
+
+    def clear_cache(self):
+        """
+        forget resolved names, to call when names of nodes change
+        """
+        self.model.clear_cache()
+
+    @trycatchslot
+    def reload(self):
+        node = self.node
+        self.clear_cache()
+        self.clear()
+        self.show_refs(node)
+
+    @trycatchslot
+    def remove_ref(self):
+        idx = self.view.currentIndex()
+        if not idx.isValid():
+            logger.warning("No valid reference selected to remove")
+            return
+        ref = idx.sibling(idx.row(), 0).data(Qt.UserRole)
+        self.do_remove_ref(ref)
+        self.reload()
+
+    def _show_refs(self, node):
+        try:
+            self.model.set_node(node)
+        except Exception as ex:
+            self.error.emit(ex)
+            raise
+
+    def _add_ref_row(self, ref):
+        self.model.append_ref(ref)
+
+
+class VirtualRefsDelegate(MyDelegate):
+    """
+    MyDelegate reading the edited reference from the model instead of its items
+    """
+
+    @trycatchslot
+    def createEditor(self, parent, option, idx):
+        if idx.column() > 1:
+            return None
+        ref = idx.sibling(idx.row(), 0).data(Qt.UserRole)
+        if idx.column() == 1:
+            node = new_node(self._widget.node, ref.NodeId)
+            startnode = new_node(self._widget.node, ua.ObjectIds.RootFolder)
+        else:
+            node = new_node(self._widget.node, ref.ReferenceTypeId)
+            startnode = new_node(self._widget.node, ua.ObjectIds.ReferenceTypesFolder)
+        return GetNodeTextButton(parent, node, startnode)
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from asyncua import ua
+from asyncua.common.node import Node
+from asyncua.common.xmlexporter import XmlExporter
+
+logger = logging.getLogger(__name__)
+
+MIN_PARTITION_SIZE = 2000  # nodes, smaller exports are not worth starting processes
+
+# private members of XmlExporter used to serialize partitions
+_EXPORTER_MEMBERS = ("aliases", "etree", "_addr_idx_to_xml_idx", "_get_ns_idxs_of_nodes", "_add_idxs_from_uris",
+                     "_make_idx_dict", "_add_namespace_uri_els", "_add_alias_els", "node_to_etree")
+
+_COMMON_ATTRIBUTES = (ua.AttributeIds.BrowseName, ua.AttributeIds.DisplayName, ua.AttributeIds.Description)
+_VARIABLE_ATTRIBUTES = (ua.AttributeIds.Value, ua.AttributeIds.DataType, ua.AttributeIds.ValueRank, ua.AttributeIds.ArrayDimensions)
+
+# attributes XmlExporter reads from exported nodes, per node class
+EXPORTED_ATTRIBUTES = {
+    ua.NodeClass.Object: _COMMON_ATTRIBUTES + (ua.AttributeIds.EventNotifier,),
+    ua.NodeClass.ObjectType: _COMMON_ATTRIBUTES + (ua.AttributeIds.IsAbstract,),
+    ua.NodeClass.Variable: _COMMON_ATTRIBUTES + _VARIABLE_ATTRIBUTES + (
+        ua.AttributeIds.AccessLevel,
+        ua.AttributeIds.UserAccessLevel,
+        ua.AttributeIds.MinimumSamplingInterval,
+        ua.AttributeIds.Historizing,
+    ),
+    ua.NodeClass.VariableType: _COMMON_ATTRIBUTES + _VARIABLE_ATTRIBUTES + (ua.AttributeIds.IsAbstract,),
+    ua.NodeClass.Method: _COMMON_ATTRIBUTES + (ua.AttributeIds.Executable, ua.AttributeIds.UserExecutable),
+    ua.NodeClass.ReferenceType: _COMMON_ATTRIBUTES + (ua.AttributeIds.InverseName,),
+    ua.NodeClass.DataType: _COMMON_ATTRIBUTES + (ua.AttributeIds.DataTypeDefinition,),
+}
+
+
+class ExportSnapshot:
+    """
+    Everything XmlExporter reads from server to export a list of nodes,
+    read with batched requests. It is independent of any server so
+    partitions of it can be serialized in other processes
+    """
+
+    def __init__(self):
+        self.namespaces = []
+        self.attributes = {}  # nodeid -> {attribute id: DataValue}
+        self.references = {}  # nodeid -> ReferenceDescriptions, both directions
+        self.subtypes = {}  # reference type -> itself and all its subtypes
+        self.datatypes = set()  # data types of exported variables and their supertypes
+
+    @classmethod
+    def from_server(cls, server_mgr, nodeids):
+        snapshot = cls()
+        snapshot.namespaces = server_mgr.get_namespace_array()
+        snapshot._read_reference_types(server_mgr)
+        by_class = {}
+        classes, references = server_mgr.gather(
+            server_mgr.read_attributes_async(nodeids, [ua.AttributeIds.NodeClass]),
+            server_mgr.browse_async(nodeids, refs=ua.ObjectIds.References, direction=ua.BrowseDirection.Both))
+        for nodeid, (dv,) in zip(nodeids, classes):
+            snapshot.attributes[nodeid] = {ua.AttributeIds.NodeClass: dv}
+            if dv.StatusCode.is_good():
+                by_class.setdefault(ua.NodeClass(dv.Value.Value), []).append(nodeid)
+        class_attrs = [(class_nodeids, EXPORTED_ATTRIBUTES.get(nclass, _COMMON_ATTRIBUTES)) for nclass, class_nodeids in by_class.items()]
+        results = server_mgr.gather(*(server_mgr.read_attributes_async(class_nodeids, attrs) for class_nodeids, attrs in class_attrs))
+        for (class_nodeids, attrs), class_results in zip(class_attrs, results):
+            for nodeid, dvs in zip(class_nodeids, class_results):
+                snapshot.attributes[nodeid].update(zip(attrs, dvs))
+        snapshot.references.update(zip(nodeids, references))
+        snapshot._read_datatypes(server_mgr)
+        return snapshot
+
+    def _read_reference_types(self, server_mgr):
+        children = {}
+        level = [ua.NodeId(ua.ObjectIds.References)]
+        while level:
+            next_level = []
+            for nodeid, descs in zip(level, server_mgr.browse(level, refs=ua.ObjectIds.HasSubtype)):
+                children[nodeid] = [desc.NodeId for desc in descs]
+                next_level.extend(children[nodeid])
+            level = next_level
+
+        def get_subtypes(nodeid):
+            if nodeid not in self.subtypes:
+                result = {nodeid}
+                for child in children.get(nodeid, ()):
+                    result |= get_subtypes(child)
+                self.subtypes[nodeid] = result
+            return self.subtypes[nodeid]
+
+        for nodeid in children:
+            get_subtypes(nodeid)
+
+    def _read_datatypes(self, server_mgr):
+        """
+        read supertypes of the data types of exported variables,
+        XmlExporter follows them to find how to encode values
+        """
+        level = set()
+        for attrs in self.attributes.values():
+            dv = attrs.get(ua.AttributeIds.DataType)
+            if dv is not None and dv.StatusCode.is_good():
+                level.add(dv.Value.Value)
+        while level:
+            self.datatypes |= level
+            to_browse = [nodeid for nodeid in level if nodeid not in self.references]
+            for nodeid, descs in zip(to_browse, server_mgr.browse(to_browse, refs=ua.ObjectIds.HasSubtype, direction=ua.BrowseDirection.Inverse)):
+                self.references[nodeid] = descs
+            next_level = set()
+            for nodeid in level:
+                next_level.update(ref.NodeId for ref in self.references[nodeid]
+                                  if not ref.IsForward and ref.ReferenceTypeId == ua.NodeId(ua.ObjectIds.HasSubtype))
+            level = next_level - self.datatypes
+
+    def get_partition(self, nodeids):
+        """
+        return a snapshot with the records of nodeids and of all data types
+        """
+        part = ExportSnapshot()
+        part.namespaces = self.namespaces
+        part.subtypes = self.subtypes
+        part.datatypes = self.datatypes
+        part.attributes = {nodeid: self.attributes[nodeid] for nodeid in nodeids}
+        part.references = {nodeid: self.references[nodeid] for nodeid in set(nodeids) | self.datatypes}
+        return part
+
+    def browse(self, desc):
+        refs = self.references.get(desc.NodeId, [])
+        if desc.IncludeSubtypes:
+            reftypes = self.subtypes.get(desc.ReferenceTypeId, {desc.ReferenceTypeId})
+        else:
+            reftypes = {desc.ReferenceTypeId}
+        result = []
+        for ref in refs:
+            if desc.BrowseDirection == ua.BrowseDirection.Forward and not ref.IsForward:
+                continue
+            if desc.BrowseDirection == ua.BrowseDirection.Inverse and ref.IsForward:
+                continue
+            if desc.ReferenceTypeId != ua.NodeId(ua.ObjectIds.References) and ref.ReferenceTypeId not in reftypes:
+                continue
+            if desc.NodeClassMask and not desc.NodeClassMask & ref.NodeClass:
+                continue
+            result.append(ref)
+        return result
+
+    def read(self, rv):
+        attrs = self.attributes.get(rv.NodeId)
+        if attrs is None:
+            return ua.DataValue(StatusCode_=ua.StatusCode(ua.StatusCodes.BadNodeIdUnknown))
+        dv = attrs.get(rv.AttributeId)
+        if dv is None:
+            return ua.DataValue(StatusCode_=ua.StatusCode(ua.StatusCodes.BadAttributeIdInvalid))
+        return dv
+
+
+class _SnapshotSession:
+    """
+    the part of a client session XmlExporter and Node use, answered from a snapshot
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    async def read(self, params):
+        return [self.snapshot.read(rv) for rv in params.NodesToRead]
+
+    async def browse(self, params):
+        results = []
+        for desc in params.NodesToBrowse:
+            res = ua.BrowseResult()
+            res.References = self.snapshot.browse(desc)
+            results.append(res)
+        return results
+
+    async def get_namespace_array(self):
+        return self.snapshot.namespaces
+
+    def get_node(self, nodeid):
+        return Node(self, nodeid)
+
+
+def export_xml(server_mgr, nodes, uris, path, max_workers=None):
+    """
+    export nodes to a NodeSet2 XML file at path, namespaces in uris are exported
+    even if no node uses them.
+    Nodes are read with batched requests, then serialized in partitions in
+    parallel processes. The partitions are merged in the order of nodes so
+    the file is the same as the one written by XmlExporter
+    """
+    nodeids = [node.nodeid for node in nodes]
+    write_xml(ExportSnapshot.from_server(server_mgr, nodeids), nodeids, uris, path, max_workers)
+
+
+def write_xml(snapshot, nodeids, uris, path, max_workers=None):
+    """
+    export nodeids of snapshot to a NodeSet2 XML file at path, see export_xml.
+    The server is not used, so it can be called in any thread
+    """
+    exporter = XmlExporter(_SnapshotSession(snapshot))
+    if not supports_partitions(exporter):
+        logger.warning("XmlExporter of installed asyncua lacks the members used to export in parallel, exporting with build_etree")
+        asyncio.run(exporter.build_etree([exporter.server.get_node(nodeid) for nodeid in nodeids]))
+        asyncio.run(exporter.write_xml(path))
+        return
+    asyncio.run(add_namespaces(exporter, [exporter.server.get_node(nodeid) for nodeid in nodeids], uris))
+    workers = min(max_workers or os.cpu_count() or 1, max(1, len(nodeids) // MIN_PARTITION_SIZE))
+    if workers > 1:
+        size = -(-len(nodeids) // workers)
+        partitions = [(snapshot.get_partition(nodeids[i:i + size]), nodeids[i:i + size], exporter._addr_idx_to_xml_idx)
+                      for i in range(0, len(nodeids), size)]
+        logger.info("Serializing %s nodes in %s processes", len(nodeids), len(partitions))
+        # spawn, forking a process running the server and Qt threads is not safe
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            fragments = list(executor.map(_serialize_partition, partitions))
+    else:
+        fragments = [_serialize_partition((snapshot, nodeids, exporter._addr_idx_to_xml_idx))]
+    root = exporter.etree.getroot()
+    for elements, aliases in fragments:
+        root.extend(elements)
+        exporter.aliases.update(aliases)
+    exporter._add_alias_els()
+    asyncio.run(exporter.write_xml(path))
+
+
+def supports_partitions(exporter):
+    """
+    return True if exporter has the private members of XmlExporter used to
+    serialize partitions, asyncua does not guarantee them between versions
+    """
+    return all(hasattr(exporter, name) for name in _EXPORTER_MEMBERS)
+
+
+async def add_namespaces(exporter, nodes, uris):
+    """
+    add the namespaces used by nodes, and those in uris, to exporter
+    """
+    ns_array = await exporter.server.get_namespace_array()
+    idxs = await exporter._get_ns_idxs_of_nodes(nodes)
+    exporter._add_idxs_from_uris(idxs, uris, ns_array)
+    exporter._addr_idx_to_xml_idx = exporter._make_idx_dict(idxs, ns_array)
+    ns_to_export = [ns_array[i] for i in sorted(exporter._addr_idx_to_xml_idx.keys()) if i != 0]
+    exporter._add_namespace_uri_els(ns_to_export)
+
+
+def _serialize_partition(args):
+    """
+    serialize nodes of a partition, return their elements and the aliases they use
+    """
+    snapshot, nodeids, idx_map = args
+    session = _SnapshotSession(snapshot)
+    exporter = XmlExporter(session)
+    exporter._addr_idx_to_xml_idx = idx_map
+
+    async def serialize():
+        for nodeid in nodeids:
+            await exporter.node_to_etree(session.get_node(nodeid))
+
+    asyncio.run(serialize())
+    return list(exporter.etree.getroot()), exporter.aliases